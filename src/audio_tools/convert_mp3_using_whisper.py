@@ -5,7 +5,13 @@ from src.common_llm.handlers.sound.llm_whisper_handler import AudioTranscriber
 
 
 def convert_mp3_to_txt(
-    file_path="", output_dir="", prefix="", suffix="", overwrite=False, language="en"
+    file_path="",
+    output_dir="",
+    prefix="",
+    suffix="",
+    overwrite=False,
+    language="en",
+    model_size="large",
 ):
     print(f"Convert mp3 to txt for: {file_path}")
 
@@ -31,8 +37,8 @@ def convert_mp3_to_txt(
         else:
             return read_file(save_file_path)
 
-    # Initialize transcriber with model settings
-    transcriber = AudioTranscriber(model_size="large", language=language)
+    # The model is loaded on the first call and shared by the following ones
+    transcriber = AudioTranscriber(model_size=model_size, language=language)
 
     # Transcribe with file output
     result = transcriber.transcribe_audio(
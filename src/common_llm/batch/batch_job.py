@@ -0,0 +1,247 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol
+
+from loguru import logger
+from openai import OpenAI
+
+from src.common_llm.batch.local_batch_server import LocalBatchServer
+from src.common_llm.factory.client_pool import get_openai_client
+from src.common_llm.handlers.base_model_handler import AskResult
+from src.common_llm.handlers.structured_output import openai_response_format
+from src.common_llm.llm_enums import OpenAIModels
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which nothing changes anymore
+FINAL_BATCH_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchTransport(Protocol):
+    """The four Batch API operations a BatchJob needs."""
+
+    def upload(self, content: bytes, filename: str) -> str: ...
+
+    def create_batch(
+        self, input_file_id: str, endpoint: str, completion_window: str
+    ) -> Dict[str, Any]: ...
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]: ...
+
+    def download(self, file_id: str) -> str: ...
+
+
+class OpenAIBatchTransport:
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ):
+        """
+        Batch API calls through the OpenAI client.
+
+        Point base_url at a compatible server (e.g. LocalBatchServer) to run
+        batches without the real API.
+        """
+        self.client = client or get_openai_client(api_key, base_url)
+
+    def upload(self, content: bytes, filename: str) -> str:
+        return self.client.files.create(file=(filename, content), purpose="batch").id
+
+    def create_batch(
+        self, input_file_id: str, endpoint: str, completion_window: str
+    ) -> Dict[str, Any]:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=endpoint,
+            completion_window=completion_window,
+        )
+        return batch.model_dump()
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self.client.batches.retrieve(batch_id).model_dump()
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+@dataclass
+class BatchRequest:
+    custom_id: str
+    question: str
+    json_schema: Optional[Dict[str, Any]] = None
+
+
+class BatchJob:
+    def __init__(
+        self,
+        model_name: str = OpenAIModels.GPT_4o_MINI.value,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        transport: Optional[BatchTransport] = None,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ):
+        """
+        Offline bulk requests through the Batch API - half the price of
+        synchronous calls and no rate limiting, at the cost of latency.
+
+        Questions are collected with add, serialised to JSONL, submitted as one
+        batch and polled until it finishes. Results are mapped back to their
+        questions by custom_id.
+
+        Args:
+            model_name: OpenAI model used for every request
+            system_prompt: System prompt sent with every question
+            temperature: Sampling temperature
+            transport: Batch API implementation, OpenAIBatchTransport by default
+            poll_interval: Seconds between status checks
+            completion_window: Time the provider has to finish the batch
+        """
+        self.model = model_name
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.transport = transport or OpenAIBatchTransport()
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.requests: List[BatchRequest] = []
+        self.batch: Optional[Dict[str, Any]] = None
+
+    def add(
+        self,
+        question: str,
+        custom_id: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Queue a question and return the id its result will be reported under."""
+        custom_id = custom_id or f"request-{len(self.requests)}"
+        if any(request.custom_id == custom_id for request in self.requests):
+            raise ValueError(f"Duplicate custom_id: {custom_id}")
+        self.requests.append(BatchRequest(custom_id, question, json_schema))
+        return custom_id
+
+    def _request_body(self, request: BatchRequest) -> Dict[str, Any]:
+        messages = [{"role": "user", "content": request.question}]
+        if self.system_prompt:
+            messages.insert(0, {"role": "system", "content": self.system_prompt})
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+        }
+        if request.json_schema:
+            body["response_format"] = openai_response_format(request.json_schema)
+        return body
+
+    def to_jsonl(self) -> str:
+        return "\n".join(
+            json.dumps(
+                {
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": CHAT_COMPLETIONS_ENDPOINT,
+                    "body": self._request_body(request),
+                },
+                ensure_ascii=False,
+            )
+            for request in self.requests
+        )
+
+    def submit(self) -> str:
+        """Upload the queued requests and start the batch. Returns the batch id."""
+        if not self.requests:
+            raise ValueError("No requests added to the batch")
+        file_id = self.transport.upload(
+            self.to_jsonl().encode("utf-8"), "batch_requests.jsonl"
+        )
+        self.batch = self.transport.create_batch(
+            file_id, CHAT_COMPLETIONS_ENDPOINT, self.completion_window
+        )
+        logger.info(
+            f"Submitted batch {self.batch['id']} with {len(self.requests)} requests"
+        )
+        return self.batch["id"]
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Poll the batch until it reaches a final state."""
+        if self.batch is None:
+            raise RuntimeError("Batch has not been submitted")
+        started_at = time.monotonic()
+        while self.batch["status"] not in FINAL_BATCH_STATES:
+            if timeout is not None and time.monotonic() - started_at > timeout:
+                raise TimeoutError(
+                    f"Batch {self.batch['id']} not finished after {timeout}s "
+                    f"(status: {self.batch['status']})"
+                )
+            time.sleep(self.poll_interval)
+            self.batch = self.transport.retrieve_batch(self.batch["id"])
+            logger.debug(
+                f"Batch {self.batch['id']} status: {self.batch['status']} "
+                f"{self.batch.get('request_counts')}"
+            )
+        logger.info(f"Batch {self.batch['id']} finished: {self.batch['status']}")
+        return self.batch
+
+    def _read_lines(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        content = self.transport.download(file_id)
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    @staticmethod
+    def _parse_line(line: Dict[str, Any]) -> AskResult:
+        if line.get("error"):
+            return AskResult(question="", error=str(line["error"]))
+        response = line.get("response") or {}
+        if response.get("status_code") != 200:
+            return AskResult(
+                question="",
+                error=f"HTTP {response.get('status_code')}: {response.get('body')}",
+            )
+        content = response["body"]["choices"][0]["message"]["content"]
+        return AskResult(question="", response=content.strip())
+
+    def results(self) -> List[AskResult]:
+        """Results in the order the questions were added."""
+        if self.batch is None or self.batch["status"] not in FINAL_BATCH_STATES:
+            raise RuntimeError("Batch has not finished")
+
+        by_id: Dict[str, AskResult] = {}
+        for file_id in (self.batch["output_file_id"], self.batch["error_file_id"]):
+            for line in self._read_lines(file_id):
+                by_id[line["custom_id"]] = self._parse_line(line)
+
+        results = []
+        for request in self.requests:
+            result = by_id.get(request.custom_id) or AskResult(
+                question="", error=f"No result (batch {self.batch['status']})"
+            )
+            result.question = request.question
+            results.append(result)
+        return results
+
+    def run(self, timeout: Optional[float] = None) -> List[AskResult]:
+        """Submit, wait and return the results."""
+        self.submit()
+        self.wait(timeout)
+        return self.results()
+
+
+def main():
+    # Runs against the local stand-in, pass no transport to use the real API
+    with LocalBatchServer() as server:
+        job = BatchJob(
+            system_prompt="You are a helpful AI assistant.",
+            transport=OpenAIBatchTransport(api_key="local", base_url=server.base_url),
+            poll_interval=0.1,
+        )
+        for question in ["What is Python?", "What is Java?"]:
+            job.add(question)
+        for result in job.run(timeout=10):
+            print(f"{result.question} -> {result.response or result.error}")
+
+
+if __name__ == "__main__":
+    main()
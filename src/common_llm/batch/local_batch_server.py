@@ -0,0 +1,246 @@
+import email.parser
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+
+def echo_response(body: Dict[str, Any]) -> str:
+    """Default answer of the stand-in: the last user message, echoed back."""
+    user_messages = [m for m in body["messages"] if m["role"] == "user"]
+    return f"Echo: {user_messages[-1]['content']}" if user_messages else "Echo"
+
+
+class LocalBatchServer:
+    def __init__(
+        self,
+        respond: Callable[[Dict[str, Any]], str] = echo_response,
+        processing_time: float = 0.2,
+        port: int = 0,
+    ):
+        """
+        Local stand-in for the OpenAI Files and Batch API.
+
+        Implements just enough of the API for OpenAIBatchTransport: file upload
+        and download, batch creation and status. Every request line is answered
+        with respond(body); an exception raised by respond is reported as a
+        failed request in the error file.
+
+        Args:
+            respond: Produces the assistant message for a chat completion body
+            processing_time: Seconds a batch stays in progress before completing
+            port: Port to listen on, 0 picks a free one
+        """
+        self.respond = respond
+        self.processing_time = processing_time
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "LocalBatchServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Local batch server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalBatchServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}"
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        with self._lock:
+            file = {
+                "id": self._new_id("file"),
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+                "content": content,
+            }
+            self.files[file["id"]] = file
+        return file
+
+    def create_batch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        batch = {
+            "id": self._new_id("batch"),
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"],
+            "created_at": int(time.time()),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(target=self._process, args=(batch,), daemon=True).start()
+        return batch
+
+    def _process(self, batch: Dict[str, Any]) -> None:
+        time.sleep(self.processing_time)
+        content = self.files[batch["input_file_id"]]["content"].decode("utf-8")
+        outputs, errors = [], []
+        for line in filter(None, content.splitlines()):
+            request = json.loads(line)
+            try:
+                answer = self.respond(request["body"])
+            except Exception as e:
+                errors.append(
+                    {
+                        "id": self._new_id("batch_req"),
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 500, "body": {"error": str(e)}},
+                        "error": None,
+                    }
+                )
+                continue
+            outputs.append(
+                {
+                    "id": self._new_id("batch_req"),
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "object": "chat.completion",
+                            "model": request["body"].get("model"),
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "message": {"role": "assistant", "content": answer},
+                                    "finish_reason": "stop",
+                                }
+                            ],
+                        },
+                    },
+                    "error": None,
+                }
+            )
+
+        def to_file(lines, name):
+            if not lines:
+                return None
+            data = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+            return self.add_file(data, name, "batch_output")["id"]
+
+        output_file_id = to_file(outputs, "batch_output.jsonl")
+        error_file_id = to_file(errors, "batch_errors.jsonl")
+        with self._lock:
+            batch.update(
+                status="completed",
+                output_file_id=output_file_id,
+                error_file_id=error_file_id,
+                request_counts={
+                    "total": len(outputs) + len(errors),
+                    "completed": len(outputs),
+                    "failed": len(errors),
+                },
+            )
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"Local batch server: {format % args}")
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_not_found(self) -> None:
+                self._send_json({"error": {"message": f"Not found: {self.path}"}}, 404)
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                if self.path.endswith("/files"):
+                    upload = self._parse_upload()
+                    file = server.add_file(*upload)
+                    self._send_json({k: v for k, v in file.items() if k != "content"})
+                elif self.path.endswith("/batches"):
+                    request = json.loads(self._read_body())
+                    if request.get("input_file_id") not in server.files:
+                        self._send_not_found()
+                        return
+                    self._send_json(server.create_batch(request))
+                else:
+                    self._send_not_found()
+
+            def do_GET(self):
+                content = re.search(r"/files/([^/]+)/content$", self.path)
+                batch = re.search(r"/batches/([^/]+)$", self.path)
+                if content and content.group(1) in server.files:
+                    data = server.files[content.group(1)]["content"]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                elif batch and batch.group(1) in server.batches:
+                    with server._lock:
+                        self._send_json(dict(server.batches[batch.group(1)]))
+                else:
+                    self._send_not_found()
+
+            def _parse_upload(self):
+                """Read (content, filename, purpose) from a multipart upload."""
+                message = email.parser.BytesParser().parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                    + self._read_body()
+                )
+                content, filename, purpose = b"", "upload.jsonl", "batch"
+                for part in message.get_payload():
+                    name = part.get_param("name", header="content-disposition")
+                    if name == "file":
+                        content = part.get_payload(decode=True)
+                        filename = part.get_filename() or filename
+                    elif name == "purpose":
+                        purpose = part.get_payload(decode=True).decode("utf-8")
+                return content, filename, purpose
+
+        return Handler
+
+
+def main():
+    with LocalBatchServer() as server:
+        print(f"Local batch server running on {server.base_url}, Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from tabulate import tabulate
+
+from src.common_llm.benchmark.stub_llm_server import StubLLMServer, StubServerConfig
+from src.common_llm.factory.client_pool import get_openai_client
+from src.common_llm.handlers.history_budget import count_messages_tokens
+from src.common_llm.handlers.llm_llama_handler import LlamaHandler
+from src.common_llm.handlers.llm_openAI_handler import OpenAIHandler
+from src.common_llm.handlers.vision.llm_vision_ollama_handler import VisionOllamaHandler
+from src.common_llm.handlers.vision.llm_vision_openAI_handler import VisionOpenAIHandler
+from src.common_llm.metrics import (
+    Histogram,
+    MetricsRegistry,
+    get_metrics_registry,
+    set_metrics_registry,
+)
+from src.common_llm.rate_limiter import set_rate_limits
+from src.tools.find_project_root import find_project_root
+
+# Model name sent to the stub server - unknown to the rate limiter defaults
+BENCHMARK_MODEL = "stub-model"
+
+DEFAULT_CONCURRENCY_LEVELS = (1, 2, 4, 8, 16)
+
+HandlerCall = Callable[[int], str]
+
+
+@dataclass
+class BenchmarkResult:
+    handler: str
+    concurrency: int
+    requests: int
+    failed: int
+    retries: int
+    throughput: float
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+    first_error: Optional[str] = None
+
+
+def build_handler_calls(
+    server: StubLLMServer, image_path: Optional[str] = None
+) -> Dict[str, HandlerCall]:
+    """One request per call for each handler type, all pointed at the stub server."""
+    # The stub never rate limits, so the client-side limiter must not either
+    set_rate_limits(BENCHMARK_MODEL, 1_000_000, 1_000_000_000)
+    client = get_openai_client(api_key="stub", base_url=server.openai_base_url)
+    image_path = image_path or os.path.join(
+        find_project_root(__file__), "resources", "sample1.png"
+    )
+
+    openai_handler = OpenAIHandler(
+        model_name=BENCHMARK_MODEL, client=client, initial_retry_delay=0.05
+    )
+    llama_handler = LlamaHandler(
+        model_name=BENCHMARK_MODEL, host=server.url, initial_retry_delay=0.05
+    )
+
+    def question(index: int) -> List[Dict[str, str]]:
+        # Distinct prompts, so no cache or request sharing skews the numbers
+        return [{"role": "user", "content": f"Benchmark question {index}"}]
+
+    # Vision handlers keep per-conversation state, so every call gets its own
+    return {
+        "OpenAIHandler": lambda index: openai_handler._make_request(question(index)),
+        "LlamaHandler": lambda index: llama_handler._make_request(question(index)),
+        "VisionOpenAIHandler": lambda index: VisionOpenAIHandler(
+            model_name=BENCHMARK_MODEL, client=client
+        ).ask(f"Describe image {index}", images=[image_path]),
+        "VisionOllamaHandler": lambda index: VisionOllamaHandler(
+            model_name=BENCHMARK_MODEL, host=server.url
+        ).ask(f"Describe image {index}", images=[image_path]),
+    }
+
+
+def run_level(
+    name: str, call: HandlerCall, concurrency: int, requests: int
+) -> BenchmarkResult:
+    """Send requests calls with the given number of workers and measure them."""
+    previous_registry = get_metrics_registry()
+    registry = MetricsRegistry()
+    set_metrics_registry(registry)
+    latency = Histogram()
+    failed = 0
+    first_error = None
+
+    def timed_call(index: int) -> Tuple[Optional[float], Optional[str]]:
+        start_time = time.perf_counter()
+        try:
+            call(index)
+        except Exception as e:
+            logger.warning(f"{name} request {index} failed: {str(e)}")
+            return None, f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start_time, None
+
+    try:
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed_call, range(requests)))
+        duration = time.perf_counter() - started_at
+    finally:
+        set_metrics_registry(previous_registry)
+
+    for value, error in latencies:
+        if value is None:
+            failed += 1
+            first_error = first_error or error
+        else:
+            latency.observe(value)
+
+    return BenchmarkResult(
+        handler=name,
+        concurrency=concurrency,
+        requests=requests,
+        failed=failed,
+        retries=sum(row["retries"] for row in registry.summary()),
+        throughput=(requests - failed) / duration,
+        p50=latency.percentile(50),
+        p95=latency.percentile(95),
+        p99=latency.percentile(99),
+        first_error=first_error,
+    )
+
+
+def run_benchmark(
+    config: Optional[StubServerConfig] = None,
+    concurrency_levels: Sequence[int] = DEFAULT_CONCURRENCY_LEVELS,
+    requests_per_level: int = 64,
+    handlers: Optional[Sequence[str]] = None,
+) -> List[BenchmarkResult]:
+    """
+    Load test the handlers against a local stub server at increasing concurrency.
+
+    The handlers count prompt tokens with tiktoken's cl100k_base encoding, which
+    tiktoken downloads on first use. To run offline, fetch it once while online
+    and point TIKTOKEN_CACHE_DIR at the cache directory.
+
+    Args:
+        config: Latency, token rate and error behaviour of the stub server
+        concurrency_levels: Numbers of parallel workers to measure
+        requests_per_level: Requests sent at each concurrency level
+        handlers: Names of the handlers to run, all by default
+    """
+    try:
+        count_messages_tokens([], BENCHMARK_MODEL)
+    except Exception as e:
+        raise RuntimeError(
+            "Could not load the cl100k_base tokenizer the handlers count tokens "
+            "with - run once online or set TIKTOKEN_CACHE_DIR to a directory "
+            f"holding it: {str(e)}"
+        ) from e
+    results = []
+    with StubLLMServer(config) as server:
+        calls = build_handler_calls(server)
+        for name, call in calls.items():
+            if handlers and name not in handlers:
+                continue
+            for concurrency in concurrency_levels:
+                result = run_level(name, call, concurrency, requests_per_level)
+                logger.info(
+                    f"{name} x{concurrency}: {result.throughput:.1f} req/s, "
+                    f"p95 {result.p95 or 0:.3f}s, {result.failed} failed"
+                )
+                if result.first_error:
+                    logger.warning(
+                        f"{name} x{concurrency} first error: {result.first_error}"
+                    )
+                results.append(result)
+    return results
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    rows = [asdict(result) for result in results]
+    return tabulate(rows, headers="keys", floatfmt=".3f")
+
+
+def main():
+    print("Healthy backend:")
+    print(format_results(run_benchmark()))
+
+    print("\nFlaky backend (10% errors, half of them 429):")
+    flaky = StubServerConfig(error_rate=0.1)
+    print(format_results(run_benchmark(flaky, concurrency_levels=(4, 16))))
+
+
+if __name__ == "__main__":
+    main()
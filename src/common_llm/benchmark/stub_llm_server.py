@@ -0,0 +1,291 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # Benchmarks open many connections at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+@dataclass
+class StubServerConfig:
+    """
+    Behaviour of the stub model server.
+
+    latency: Seconds before the first token (time to first token)
+    latency_jitter: Random extra latency, uniform in [0, latency_jitter]
+    tokens_per_second: Generation speed of the completion
+    completion_tokens: Tokens in every completion
+    error_rate: Share of requests that fail
+    rate_limit_share: Share of failures answered with 429 + Retry-After, others get 500
+    retry_after_ms: Retry-After sent with 429 responses
+    """
+
+    latency: float = 0.05
+    latency_jitter: float = 0.02
+    tokens_per_second: float = 500.0
+    completion_tokens: int = 20
+    error_rate: float = 0.0
+    rate_limit_share: float = 0.5
+    retry_after_ms: int = 50
+
+
+class StubLLMServer:
+    def __init__(self, config: Optional[StubServerConfig] = None, port: int = 0):
+        """
+        Local OpenAI- and Ollama-compatible server with scripted latency and errors.
+
+        Serves /v1/chat/completions (OpenAI, incl. streaming) and /api/chat,
+        /api/generate (Ollama, incl. streaming), so handlers can be load tested
+        without spending tokens. Answers are dummy words.
+
+        Args:
+            config: Latency, token rate and error behaviour
+            port: Port to listen on, 0 picks a free one
+        """
+        self.config = config or StubServerConfig()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = _StubHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Stub LLM server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+
+    def _next_outcome(self) -> Optional[int]:
+        """Count the request and decide whether it fails - None or an HTTP status."""
+        with self._lock:
+            self.requests += 1
+            if random.random() >= self.config.error_rate:
+                return None
+            self.errors += 1
+        return 429 if random.random() < self.config.rate_limit_share else 500
+
+    def _wait_first_token(self) -> None:
+        time.sleep(self.config.latency + random.uniform(0, self.config.latency_jitter))
+
+    def _token_delay(self) -> float:
+        return 1 / self.config.tokens_per_second
+
+    def _handler_class(self):
+        server = self
+        config = self.config
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(
+                self,
+                payload: Dict[str, Any],
+                status: int = 200,
+                headers: Optional[Dict[str, str]] = None,
+            ) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_error(self, status: int, ollama: bool) -> None:
+                message = "Rate limit reached" if status == 429 else "Stub server error"
+                headers = {}
+                if status == 429:
+                    headers["retry-after-ms"] = str(config.retry_after_ms)
+                payload = (
+                    {"error": message}
+                    if ollama
+                    else {"error": {"message": message, "type": "stub_error"}}
+                )
+                self._send_json(payload, status, headers)
+
+            def _start_stream(self, content_type: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _end_stream(self) -> None:
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                ollama = self.path.startswith("/api/")
+                if self.path.endswith("/chat/completions"):
+                    handle = self._openai_chat
+                elif self.path in ("/api/chat", "/api/generate"):
+                    handle = self._ollama_chat
+                else:
+                    self._send_json({"error": f"Not found: {self.path}"}, 404)
+                    return
+
+                status = server._next_outcome()
+                server._wait_first_token()
+                if status:
+                    self._send_error(status, ollama)
+                    return
+                handle(body)
+
+            def _prompt_tokens(self, body: Dict[str, Any]) -> int:
+                text = json.dumps(body.get("messages") or body.get("prompt") or "")
+                return max(1, len(text) // 4)
+
+            def _openai_chat(self, body: Dict[str, Any]) -> None:
+                tokens = config.completion_tokens
+                usage = {
+                    "prompt_tokens": self._prompt_tokens(body),
+                    "completion_tokens": tokens,
+                    "total_tokens": self._prompt_tokens(body) + tokens,
+                }
+                base = {
+                    "id": "chatcmpl-stub",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                }
+                if not body.get("stream"):
+                    time.sleep(tokens * server._token_delay())
+                    self._send_json(
+                        {
+                            **base,
+                            "object": "chat.completion",
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": " ".join(["token"] * tokens),
+                                    },
+                                    "finish_reason": "stop",
+                                }
+                            ],
+                            "usage": usage,
+                        },
+                        headers={
+                            "x-ratelimit-remaining-requests": "10000",
+                            "x-ratelimit-remaining-tokens": "10000000",
+                        },
+                    )
+                    return
+
+                self._start_stream("text/event-stream")
+                for index in range(tokens):
+                    chunk = {
+                        **base,
+                        "object": "chat.completion.chunk",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": "token "},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                    if index:
+                        time.sleep(server._token_delay())
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                usage_chunk = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [],
+                    "usage": usage,
+                }
+                self._write_chunk(f"data: {json.dumps(usage_chunk)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._end_stream()
+
+            def _ollama_part(self, text: str) -> Dict[str, Any]:
+                if self.path == "/api/generate":
+                    return {"response": text}
+                return {"message": {"role": "assistant", "content": text}}
+
+            def _ollama_chat(self, body: Dict[str, Any]) -> None:
+                tokens = config.completion_tokens
+                if self.path == "/api/generate" and not body.get("prompt"):
+                    # Warm-up request, only loads the model
+                    tokens = 0
+                base = {"model": body.get("model", "stub"), "created_at": "now"}
+                done = {
+                    **base,
+                    "done": True,
+                    "prompt_eval_count": self._prompt_tokens(body),
+                    "eval_count": tokens,
+                }
+                if body.get("stream") is False:
+                    time.sleep(tokens * server._token_delay())
+                    text = " ".join(["token"] * tokens)
+                    self._send_json({**done, **self._ollama_part(text)})
+                    return
+
+                self._start_stream("application/x-ndjson")
+                for index in range(tokens):
+                    if index:
+                        time.sleep(server._token_delay())
+                    line = {**base, "done": False, **self._ollama_part("token ")}
+                    self._write_chunk((json.dumps(line) + "\n").encode())
+                last_line = {**done, **self._ollama_part("")}
+                self._write_chunk((json.dumps(last_line) + "\n").encode())
+                self._end_stream()
+
+        return Handler
+
+
+def main():
+    config = StubServerConfig(latency=0.2, error_rate=0.1)
+    with StubLLMServer(config) as server:
+        print(f"OpenAI base URL: {server.openai_base_url}, Ollama host: {server.url}")
+        print("Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+def split_single_turn(
+    messages: List[Dict[str, Any]],
+) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Return (system_prompt, user_prompt) for a one-question conversation, None otherwise.
+
+    Only such conversations are eligible for the semantic cache - with earlier
+    turns the meaning of the prompt depends on more than its own text.
+    """
+    system_prompt = None
+    rest = messages
+    if messages and messages[0]["role"] == "system":
+        system_prompt = messages[0]["content"]
+        rest = messages[1:]
+    if len(rest) == 1 and rest[0]["role"] == "user":
+        if isinstance(rest[0]["content"], str):
+            return system_prompt, rest[0]["content"]
+    return None
+
+
+def get_cached_response(
+    handler: Any,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[Any] = None,
+) -> Optional[str]:
+    """
+    Look the request up in the handler's exact and then semantic cache.
+
+    Structured requests (response_format set) only use the exact cache.
+    """
+    if getattr(handler, "bypass_cache", False):
+        return None
+
+    cache = getattr(handler, "cache", None)
+    if cache is not None:
+        cached = cache.get_response(
+            handler.model, handler.temperature, messages, response_format
+        )
+        if cached is not None:
+            return cached
+
+    semantic_cache = getattr(handler, "semantic_cache", None)
+    if semantic_cache is not None and response_format is None:
+        single_turn = split_single_turn(messages)
+        if single_turn:
+            try:
+                return semantic_cache.lookup(handler.model, *single_turn)
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {str(e)}")
+    return None
+
+
+def store_response(
+    handler: Any,
+    messages: List[Dict[str, Any]],
+    response: str,
+    response_format: Optional[Any] = None,
+) -> None:
+    """Store a fresh response in the caches configured on the handler."""
+    cache = getattr(handler, "cache", None)
+    if cache is not None:
+        cache.set_response(
+            handler.model, handler.temperature, messages, response, response_format
+        )
+
+    semantic_cache = getattr(handler, "semantic_cache", None)
+    if semantic_cache is not None and response_format is None:
+        single_turn = split_single_turn(messages)
+        if single_turn:
+            try:
+                semantic_cache.add(handler.model, *single_turn, response)
+            except Exception as e:
+                logger.warning(f"Semantic cache update failed: {str(e)}")
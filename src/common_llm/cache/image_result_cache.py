@@ -0,0 +1,155 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from src.tools.find_project_root import find_project_root
+
+load_dotenv()
+
+DEFAULT_IMAGE_CACHE_FILE = "image_results.sqlite"
+
+
+def text_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ImageResultCache:
+    def __init__(self, db_path: str):
+        """
+        Persistent cache of results computed from images (descriptions, OCR).
+
+        Entries are keyed by the image content hash, the model (or OCR engine),
+        the prompt hash and the additional-context hash. The same picture under
+        another name is a hit; a changed prompt, context or model is a miss for
+        exactly the entries it affects.
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # (path, size, mtime) -> content hash, so unchanged files are hashed once
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # The primary key doubles as the lookup index
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS image_results (
+                    image_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    context_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    image_path TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (image_hash, model, prompt_hash, context_hash)
+                )
+                """
+            )
+            self._connection.commit()
+
+    def image_hash(self, image_path: str) -> str:
+        """Content hash of an image file."""
+        stat = os.stat(image_path)
+        file_key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hashes.get(file_key)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as image_file:
+            for block in iter(lambda: image_file.read(1024 * 1024), b""):
+                digest.update(block)
+        with self._lock:
+            self._file_hashes[file_key] = digest.hexdigest()
+        return digest.hexdigest()
+
+    def _key(
+        self, image_path: str, model: str, prompt: str, context: Optional[str]
+    ) -> Tuple[str, str, str, str]:
+        return self.image_hash(image_path), model, text_hash(prompt), text_hash(context)
+
+    def get(
+        self, image_path: str, model: str, prompt: str, context: Optional[str] = None
+    ) -> Optional[str]:
+        key = self._key(image_path, model, prompt, context)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result FROM image_results WHERE image_hash = ? AND model = ? "
+                "AND prompt_hash = ? AND context_hash = ?",
+                key,
+            ).fetchone()
+        if row is not None:
+            logger.debug(f"Image result cache hit for {image_path} ({model})")
+        return row[0] if row else None
+
+    def set(
+        self,
+        image_path: str,
+        model: str,
+        prompt: str,
+        context: Optional[str],
+        result: str,
+    ) -> None:
+        key = self._key(image_path, model, prompt, context)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO image_results "
+                "(image_hash, model, prompt_hash, context_hash, result, image_path, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, result, image_path, time.time()),
+            )
+            self._connection.commit()
+
+    def invalidate(self, image_path: str) -> None:
+        """Drop every result computed from the image."""
+        image_hash = self.image_hash(image_path)
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM image_results WHERE image_hash = ?", (image_hash,)
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM image_results")
+            self._connection.commit()
+        logger.info("Image result cache cleared")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM image_results"
+            ).fetchone()
+        return count
+
+
+_default_cache: Optional[ImageResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_image_result_cache() -> ImageResultCache:
+    """
+    Process-wide cache stored in IMAGE_CACHE_PATH or
+    <project_root>/output/image_results.sqlite.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            db_path = os.getenv("IMAGE_CACHE_PATH") or os.path.join(
+                find_project_root(__file__), "output", DEFAULT_IMAGE_CACHE_FILE
+            )
+            _default_cache = ImageResultCache(db_path)
+        return _default_cache
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from src.tools.find_project_root import find_project_root
+
+load_dotenv()
+
+DEFAULT_CACHE_FILE = "llm_cache.sqlite"
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 10_000,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Persistent cache of LLM responses stored in SQLite.
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            max_entries: Maximum number of responses kept, least recently used are evicted first
+            ttl_seconds: Optional time after which an entry is considered stale
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_last_accessed ON responses(last_accessed)"
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def build_key(
+        model: str,
+        temperature: Optional[float],
+        messages: List[Dict[str, Any]],
+        response_format: Optional[Any] = None,
+    ) -> str:
+        """Hash of everything that determines the response."""
+        request = {"model": model, "temperature": temperature, "messages": messages}
+        if response_format is not None:
+            # Only added when set, so keys of plain requests stay the same
+            request["response_format"] = response_format
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key)
+            )
+            self._connection.commit()
+            return response
+
+    def set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, response, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self._evict()
+            self._connection.commit()
+
+    def get_response(
+        self,
+        model: str,
+        temperature: Optional[float],
+        messages: List[Dict[str, Any]],
+        response_format: Optional[Any] = None,
+    ) -> Optional[str]:
+        response = self.get(
+            self.build_key(model, temperature, messages, response_format)
+        )
+        if response is not None:
+            logger.debug(f"Response cache hit for {model}")
+        return response
+
+    def set_response(
+        self,
+        model: str,
+        temperature: Optional[float],
+        messages: List[Dict[str, Any]],
+        response: str,
+        response_format: Optional[Any] = None,
+    ) -> None:
+        key = self.build_key(model, temperature, messages, response_format)
+        self.set(key, model, response)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries above max_entries. Caller holds the lock."""
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug(f"Evicted {overflow} entries from response cache")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+        logger.info("Response cache cleared")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+        return count
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> ResponseCache:
+    """
+    Process-wide cache stored in LLM_CACHE_PATH or <project_root>/output/llm_cache.sqlite.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            db_path = os.getenv("LLM_CACHE_PATH") or os.path.join(
+                find_project_root(__file__), "output", DEFAULT_CACHE_FILE
+            )
+            _default_cache = ResponseCache(db_path)
+        return _default_cache
+
+
+def main():
+    cache = ResponseCache(os.path.join(os.getcwd(), "sample_cache.sqlite"), 2)
+    messages = [{"role": "user", "content": "What is Python?"}]
+    cache.set_response("gpt-4o-mini", 0.7, messages, "A programming language.")
+    print(cache.get_response("gpt-4o-mini", 0.7, messages))
+    print(cache.get_response("gpt-4o-mini", 0.0, messages))  # None - other temperature
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.common_llm.factory.client_pool import get_openai_client
+
+EmbeddingFunction = Callable[[str], List[float]]
+
+EMBEDDING_MEMO_SIZE = 256
+
+
+def openai_get_embedding(text: str, model: str = "text-embedding-3-small"):
+    text = text.replace("\n", " ")
+    client = get_openai_client()
+    return client.embeddings.create(input=[text], model=model).data[0].embedding
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        similarity_threshold: float = 0.95,
+        max_entries_per_namespace: int = 5_000,
+        path: Optional[str] = None,
+    ):
+        """
+        In-process cache returning a previous answer for a near-identical prompt.
+
+        Prompts are grouped in namespaces (model + system prompt), so an answer is
+        only reused for the same model and instructions. Lookup is a cosine
+        similarity search over normalised embeddings held in NumPy arrays.
+
+        Args:
+            embedding_function: Turns text into a vector (default: OpenAI text-embedding-3-small)
+            similarity_threshold: Minimal cosine similarity for a hit
+            max_entries_per_namespace: Oldest entries are dropped above this size
+            path: Optional .npz file to load the index from and save it to
+        """
+        self.embedding_function = embedding_function or openai_get_embedding
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_namespace = max_entries_per_namespace
+        self.path = path
+        self._lock = threading.Lock()
+        # namespace -> (normalised vectors [n, dim], responses)
+        self._index: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        # Recent prompt embeddings, so lookup() followed by add() embeds only once
+        self._embedding_memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def build_namespace(model: str, system_prompt: Optional[str]) -> str:
+        return hashlib.sha256(f"{model}\n{system_prompt or ''}".encode()).hexdigest()
+
+    def _embed(self, text: str) -> np.ndarray:
+        with self._lock:
+            if text in self._embedding_memo:
+                self._embedding_memo.move_to_end(text)
+                return self._embedding_memo[text]
+
+        vector = np.asarray(self.embedding_function(text), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+
+        with self._lock:
+            self._embedding_memo[text] = vector
+            if len(self._embedding_memo) > EMBEDDING_MEMO_SIZE:
+                self._embedding_memo.popitem(last=False)
+        return vector
+
+    def lookup(
+        self, model: str, system_prompt: Optional[str], prompt: str
+    ) -> Optional[str]:
+        """Return the cached answer of the most similar prompt, if similar enough."""
+        embedding = self._embed(prompt)
+        namespace = self.build_namespace(model, system_prompt)
+        with self._lock:
+            entry = self._index.get(namespace)
+            if entry is None or entry[0].shape[1] != embedding.shape[0]:
+                return None
+            vectors, responses = entry
+            similarities = vectors @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                logger.debug(
+                    f"Semantic cache hit for {model} (similarity {similarities[best]:.3f})"
+                )
+                return responses[best]
+        return None
+
+    def add(
+        self, model: str, system_prompt: Optional[str], prompt: str, response: str
+    ) -> None:
+        embedding = self._embed(prompt)
+        namespace = self.build_namespace(model, system_prompt)
+        with self._lock:
+            entry = self._index.get(namespace)
+            if entry is None or entry[0].shape[1] != embedding.shape[0]:
+                vectors, responses = embedding[np.newaxis, :], [response]
+            else:
+                vectors = np.vstack([entry[0], embedding])
+                responses = entry[1] + [response]
+            overflow = len(responses) - self.max_entries_per_namespace
+            if overflow > 0:
+                vectors, responses = vectors[overflow:], responses[overflow:]
+            self._index[namespace] = (vectors, responses)
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the semantic cache")
+        arrays = {}
+        with self._lock:
+            for namespace, (vectors, responses) in self._index.items():
+                arrays[f"{namespace}__vectors"] = vectors
+                arrays[f"{namespace}__responses"] = np.array(responses, dtype=np.str_)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        logger.info(f"Semantic cache saved to {path}")
+
+    def load(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        with np.load(path, allow_pickle=False) as data:
+            index = {}
+            for key in data.files:
+                namespace, kind = key.rsplit("__", 1)
+                if kind == "vectors":
+                    index[namespace] = (
+                        data[key],
+                        data[f"{namespace}__responses"].tolist(),
+                    )
+        with self._lock:
+            self._index = index
+        logger.info(f"Semantic cache loaded from {path}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(responses) for _, responses in self._index.values())
+
+
+def main():
+    cache = SemanticCache(similarity_threshold=0.9)
+    system_prompt = "Categorize the document as people, hardware or other."
+    cache.add("gpt-4o", system_prompt, "document: entry deleted", '{"other": "True"}')
+    response = cache.lookup("gpt-4o", system_prompt, "document: Entry deleted.")
+    print(f"Cached response: {response}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.common_llm.cache.response_cache import ResponseCache
+
+
+def request_key(
+    handler: Any,
+    messages: List[Dict[str, Any]],
+    json_schema: Optional[Dict[str, Any]] = None,
+    **options: Any,
+) -> str:
+    """Hash identifying a request - same inputs as the response cache key."""
+    extra = {"json_schema": json_schema, **options}
+    extra = {name: value for name, value in extra.items() if value is not None}
+    return ResponseCache.build_key(
+        handler.model,
+        getattr(handler, "temperature", None),
+        messages,
+        extra or None,
+    )
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces identical requests made from several threads at the same time.
+
+        The first caller of a key runs the request, callers arriving while it is
+        in flight wait for and share its result (or exception). Nothing is kept
+        once the request finishes - that is what the response cache is for.
+        """
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.debug(f"Sharing in-flight request {key[:12]}")
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """
+        Coalesces identical requests made from asyncio tasks at the same time.
+
+        The request runs as its own task, so a cancelled waiter does not cancel
+        it for the others. Requests are only shared within one event loop.
+        """
+        self._calls: Dict[Tuple[int, str], asyncio.Task] = {}
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop_key = (id(asyncio.get_running_loop()), key)
+        task = self._calls.get(loop_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[loop_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(loop_key, None))
+        else:
+            self.shared += 1
+            logger.debug(f"Sharing in-flight request {key[:12]}")
+        return await asyncio.shield(task)
+
+
+_single_flight = SingleFlight()
+_async_single_flight = AsyncSingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    return _async_single_flight
+
+
+def single_flight(make_request: Callable) -> Callable:
+    """
+    Decorator for a handler's _make_request(messages, json_schema=None) sharing
+    one upstream call between identical concurrent requests.
+
+    Handlers with bypass_cache set always make their own call, e.g. when
+    sampling several answers for self-consistency.
+    """
+
+    @functools.wraps(make_request)
+    def wrapper(self, messages, json_schema=None):
+        if getattr(self, "bypass_cache", False):
+            return make_request(self, messages, json_schema)
+        return get_single_flight().do(
+            request_key(self, messages, json_schema),
+            lambda: make_request(self, messages, json_schema),
+        )
+
+    return wrapper
+
+
+def async_single_flight(make_request: Callable) -> Callable:
+    """Async counterpart of single_flight."""
+
+    @functools.wraps(make_request)
+    async def wrapper(self, messages, json_schema=None):
+        if getattr(self, "bypass_cache", False):
+            return await make_request(self, messages, json_schema)
+        return await get_async_single_flight().do(
+            request_key(self, messages, json_schema),
+            lambda: make_request(self, messages, json_schema),
+        )
+
+    return wrapper
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import ollama
+import requests
+from dotenv import load_dotenv
+from loguru import logger
+from openai import AsyncOpenAI, OpenAI
+
+load_dotenv()
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+
+# Clients keep their HTTP connection pools alive, so they are shared process-wide
+# and handlers only hold a reference to one of them.
+_lock = threading.Lock()
+_openai_clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+_ollama_clients: Dict[str, ollama.Client] = {}
+_http_sessions: Dict[str, requests.Session] = {}
+
+# Async clients are tied to the event loop their connections were opened on
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _resolve_openai_api_key(api_key: Optional[str]) -> str:
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    return api_key
+
+
+def get_openai_client(
+    api_key: Optional[str] = None, base_url: Optional[str] = None
+) -> OpenAI:
+    """Return the shared OpenAI client for the given credentials and endpoint."""
+    api_key = _resolve_openai_api_key(api_key)
+    key = (api_key, base_url)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url)
+            _openai_clients[key] = client
+            logger.debug(f"Created OpenAI client for {base_url or 'default endpoint'}")
+        return client
+
+
+def get_ollama_client(host: Optional[str] = None) -> ollama.Client:
+    """Return the shared Ollama client for the given host."""
+    host = host or os.getenv("OLLAMA_HOST") or DEFAULT_OLLAMA_HOST
+    with _lock:
+        client = _ollama_clients.get(host)
+        if client is None:
+            client = ollama.Client(host=host)
+            _ollama_clients[host] = client
+            logger.debug(f"Created Ollama client for {host}")
+        return client
+
+
+def get_http_session(base_url: str) -> requests.Session:
+    """Return a shared keep-alive requests session for raw HTTP APIs."""
+    with _lock:
+        session = _http_sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            _http_sessions[base_url] = session
+            logger.debug(f"Created HTTP session for {base_url}")
+        return session
+
+
+def _loop_clients() -> Dict[Tuple, object]:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        return _async_clients.setdefault(loop, {})
+
+
+def get_async_openai_client(
+    api_key: Optional[str] = None, base_url: Optional[str] = None
+) -> AsyncOpenAI:
+    """Return the AsyncOpenAI client shared on the running event loop."""
+    api_key = _resolve_openai_api_key(api_key)
+    clients = _loop_clients()
+    key = ("openai", api_key, base_url)
+    if key not in clients:
+        clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+    return clients[key]
+
+
+def get_async_ollama_client(host: Optional[str] = None) -> ollama.AsyncClient:
+    """Return the Ollama AsyncClient shared on the running event loop."""
+    host = host or os.getenv("OLLAMA_HOST") or DEFAULT_OLLAMA_HOST
+    clients = _loop_clients()
+    key = ("ollama", host)
+    if key not in clients:
+        clients[key] = ollama.AsyncClient(host=host)
+    return clients[key]
+
+
+def get_aiohttp_session(
+    base_url: str, max_connections: int = 32
+) -> aiohttp.ClientSession:
+    """Return a keep-alive aiohttp session shared on the running event loop."""
+    clients = _loop_clients()
+    key = ("aiohttp", base_url)
+    session = clients.get(key)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max_connections)
+        )
+        clients[key] = session
+        logger.debug(f"Created aiohttp session for {base_url}")
+    return session
+
+
+async def close_async_clients() -> None:
+    """Close the async clients of the running event loop before it ends."""
+    clients = _loop_clients()
+    for client in clients.values():
+        if isinstance(client, (aiohttp.ClientSession, AsyncOpenAI)):
+            await client.close()
+    clients.clear()
+
+
+def close_all_clients() -> None:
+    """Close pooled sync clients, e.g. at the end of a pipeline."""
+    with _lock:
+        for client in _openai_clients.values():
+            client.close()
+        for session in _http_sessions.values():
+            session.close()
+        _openai_clients.clear()
+        _ollama_clients.clear()
+        _http_sessions.clear()
+    logger.info("Pooled LLM clients closed")
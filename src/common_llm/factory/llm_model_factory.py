@@ -1,9 +1,18 @@
-from typing import Optional
+from typing import Callable, List, Optional
 
+from src.common_llm.cache.response_cache import ResponseCache
+from src.common_llm.cache.semantic_cache import SemanticCache
+from src.common_llm.handlers.async_base_model_handler import AsyncBaseModelHandler
 from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.cascade_handler import CascadeHandler
+from src.common_llm.handlers.history_budget import HistoryBudget
+from src.common_llm.handlers.llm_llama_async_handler import AsyncLlamaHandler
 from src.common_llm.handlers.llm_llama_handler import LlamaHandler
+from src.common_llm.handlers.llm_openAI_async_handler import AsyncOpenAIHandler
 from src.common_llm.handlers.llm_openAI_handler import OpenAIHandler
+from src.common_llm.handlers.routed_handler import RoutedHandler
 from src.common_llm.llm_enums import OpenAIModels, LlamaModels
+from src.common_llm.llm_ollama_profiles import warm_up_ollama_models
 
 
 class ModelHandlerFactory:
@@ -14,9 +23,18 @@ class ModelHandlerFactory:
         max_retries: int = 3,
         initial_retry_delay: float = 1.0,
         temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
     ) -> BaseModelHandler:
         """
         Factory method to create appropriate model handler based on model name.
+
+        Pass cache (e.g. get_default_response_cache()) to reuse responses across runs,
+        semantic_cache to reuse answers of near-identical single-turn prompts,
+        bypass_cache=True to refresh cached responses instead of reading them,
+        history_budget to keep long conversations within a token limit.
         """
 
         try:
@@ -27,6 +45,10 @@ class ModelHandlerFactory:
                     max_retries=max_retries,
                     initial_retry_delay=initial_retry_delay,
                     temperature=temperature,
+                    cache=cache,
+                    semantic_cache=semantic_cache,
+                    bypass_cache=bypass_cache,
+                    history_budget=history_budget,
                 )
             elif any(model_name == model.value for model in LlamaModels):
                 return LlamaHandler(
@@ -35,12 +57,168 @@ class ModelHandlerFactory:
                     max_retries=max_retries,
                     initial_retry_delay=initial_retry_delay,
                     temperature=temperature,
+                    cache=cache,
+                    semantic_cache=semantic_cache,
+                    bypass_cache=bypass_cache,
+                    history_budget=history_budget,
                 )
             else:
                 raise ValueError(f"Unsupported model: {model_name}")
         except ValueError as e:
             raise ValueError(f"Invalid model name: {str(e)}")
 
+    @staticmethod
+    def create_async_handler(
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncBaseModelHandler:
+        """
+        Factory method to create appropriate async model handler based on model name.
+
+        max_concurrency limits the number of requests in flight for the model,
+        shared by all async handlers of that model.
+        """
+
+        try:
+            if any(model_name == model.value for model in OpenAIModels):
+                return AsyncOpenAIHandler(
+                    model_name=model_name,
+                    system_prompt=system_prompt,
+                    max_retries=max_retries,
+                    initial_retry_delay=initial_retry_delay,
+                    temperature=temperature,
+                    cache=cache,
+                    semantic_cache=semantic_cache,
+                    bypass_cache=bypass_cache,
+                    history_budget=history_budget,
+                    max_concurrency=max_concurrency,
+                )
+            elif any(model_name == model.value for model in LlamaModels):
+                return AsyncLlamaHandler(
+                    model_name=model_name,
+                    system_prompt=system_prompt,
+                    max_retries=max_retries,
+                    initial_retry_delay=initial_retry_delay,
+                    temperature=temperature,
+                    cache=cache,
+                    semantic_cache=semantic_cache,
+                    bypass_cache=bypass_cache,
+                    history_budget=history_budget,
+                    max_concurrency=max_concurrency,
+                )
+            else:
+                raise ValueError(f"Unsupported model: {model_name}")
+        except ValueError as e:
+            raise ValueError(f"Invalid model name: {str(e)}")
+
+    @staticmethod
+    def create_routed_handler(
+        model_names: List[str],
+        system_prompt: Optional[str] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        hedge: bool = True,
+    ) -> RoutedHandler:
+        """
+        Factory method to create a handler routing between several models,
+        e.g. a local model first with a hosted one as backup.
+
+        Requests go to the fastest healthy backend; with hedge enabled a request
+        slower than the primary's p95 latency is also sent to the backup.
+        """
+        handlers = [
+            ModelHandlerFactory.create_handler(
+                model_name=model_name,
+                system_prompt=system_prompt,
+                max_retries=max_retries,
+                initial_retry_delay=initial_retry_delay,
+                temperature=temperature,
+                cache=cache,
+                semantic_cache=semantic_cache,
+                bypass_cache=bypass_cache,
+            )
+            for model_name in model_names
+        ]
+        return RoutedHandler(
+            handlers=handlers,
+            system_prompt=system_prompt,
+            hedge=hedge,
+            history_budget=history_budget,
+        )
+
+    @staticmethod
+    def create_cascade_handler(
+        model_names: List[str],
+        system_prompt: Optional[str] = None,
+        validator: Optional[Callable[[str], bool]] = None,
+        consistency_samples: int = 1,
+        consistency_threshold: float = 0.6,
+        answer_key: Optional[Callable[[str], Optional[str]]] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+    ) -> CascadeHandler:
+        """
+        Factory method to create a handler escalating from small to large models,
+        e.g. LLAMA3_2_1b first, then a larger local model, then a hosted one.
+
+        A model's answer is only used when it passes the validator, the JSON
+        schema of ask_json and - with consistency_samples > 1 - enough samples
+        agree on answer_key.
+        Sampling uses no cache on the cheaper models, so they actually differ.
+        """
+        handlers = [
+            ModelHandlerFactory.create_handler(
+                model_name=model_name,
+                system_prompt=system_prompt,
+                max_retries=max_retries,
+                initial_retry_delay=initial_retry_delay,
+                temperature=temperature,
+                cache=cache,
+                bypass_cache=bypass_cache
+                or (consistency_samples > 1 and index < len(model_names) - 1),
+            )
+            for index, model_name in enumerate(model_names)
+        ]
+        return CascadeHandler(
+            handlers=handlers,
+            system_prompt=system_prompt,
+            validator=validator,
+            consistency_samples=consistency_samples,
+            consistency_threshold=consistency_threshold,
+            answer_key=answer_key,
+            history_budget=history_budget,
+        )
+
+    @staticmethod
+    def warm_up(model_names: List[str]) -> None:
+        """
+        Preload local models at pipeline start. Hosted models need no warm-up
+        and are skipped.
+        """
+        local_models = [
+            model_name
+            for model_name in model_names
+            if any(model_name == model.value for model in LlamaModels)
+        ]
+        warm_up_ollama_models(local_models)
+
 
 def main():
     # Example usage
@@ -0,0 +1,207 @@
+import asyncio
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.common_llm.handlers.base_model_handler import AskResult
+from src.common_llm.handlers.context_fan_in import (
+    build_context_prefix,
+    build_questions_message,
+    pack_questions,
+    parse_keyed_answers,
+)
+from src.common_llm.handlers.structured_output import (
+    REPAIR_PROMPT,
+    check_json_response,
+    parse_json_response,
+    schema_prompt,
+)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Per-model limit of requests in flight, shared by every async handler of that model
+_model_concurrency_limits: Dict[str, int] = {}
+
+# Semaphores are bound to an event loop, so they are kept per loop and per model
+# loop -> {model_name: (limit, semaphore)}
+_model_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def set_model_concurrency(model_name: str, max_concurrency: int) -> None:
+    """Set how many requests to a model may be in flight at the same time."""
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be >= 1, got {max_concurrency}")
+    _model_concurrency_limits[model_name] = max_concurrency
+
+
+def get_model_concurrency(model_name: str) -> int:
+    return _model_concurrency_limits.get(model_name, DEFAULT_MAX_CONCURRENCY)
+
+
+def get_model_semaphore(model_name: str) -> asyncio.Semaphore:
+    """Return the semaphore guarding requests to a model on the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphores = _model_semaphores.setdefault(loop, {})
+    limit = get_model_concurrency(model_name)
+
+    current = semaphores.get(model_name)
+    if current is None or current[0] != limit:
+        current = (limit, asyncio.Semaphore(limit))
+        semaphores[model_name] = current
+    return current[1]
+
+
+class AsyncBaseModelHandler(ABC):
+    # Whether _make_request enforces json_schema itself (otherwise it goes in the prompt)
+    native_json_schema = False
+
+    @abstractmethod
+    async def ask(self, question: str, clear_history: bool = False) -> str:
+        pass
+
+    @abstractmethod
+    def clear_conversation(self) -> None:
+        pass
+
+    @abstractmethod
+    def set_system_prompt(self, system_prompt: str) -> None:
+        pass
+
+    @abstractmethod
+    async def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        pass
+
+    async def _fit_messages(
+        self, messages: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        """Trim messages to the handler's history_budget, if any."""
+        history_budget = getattr(self, "history_budget", None)
+        if not history_budget:
+            return messages
+        return await history_budget.fit_async(
+            messages,
+            summarise=lambda prompt: self._make_request(
+                [{"role": "user", "content": prompt}]
+            ),
+        )
+
+    def _system_message(self) -> Optional[Dict[str, str]]:
+        history = getattr(self, "conversation_history", [])
+        return history[0] if history and history[0]["role"] == "system" else None
+
+    def _single_turn_messages(self, question: str) -> List[Dict[str, str]]:
+        """Messages for a standalone question: system prompt (if any) plus the question."""
+        system_message = self._system_message()
+        messages = [system_message] if system_message else []
+        return messages + [{"role": "user", "content": question}]
+
+    async def ask_json(
+        self, question: str, schema: Dict[str, Any], max_attempts: int = 2
+    ) -> Any:
+        """
+        Ask a standalone question and get a response matching a JSON schema.
+
+        Works like BaseModelHandler.ask_json.
+        """
+        if not self.native_json_schema:
+            question = schema_prompt(question, schema)
+        messages = self._single_turn_messages(question)
+
+        errors = []
+        for attempt in range(max_attempts):
+            response = await self._make_request(messages, json_schema=schema)
+            errors = check_json_response(response, schema)
+            if not errors:
+                return parse_json_response(response)
+            logger.warning(
+                f"Attempt {attempt + 1}/{max_attempts} returned invalid JSON: {errors}"
+            )
+            messages = messages + [
+                {"role": "assistant", "content": response},
+                {
+                    "role": "user",
+                    "content": REPAIR_PROMPT.format(errors="; ".join(errors)),
+                },
+            ]
+        raise RuntimeError(
+            f"Failed to get valid JSON after {max_attempts} attempts: {errors}"
+        )
+
+    async def ask_many(
+        self, questions: List[str], concurrency: int = 4
+    ) -> List[AskResult]:
+        """
+        Ask independent single-turn questions concurrently.
+
+        Works like BaseModelHandler.ask_many; the per-model concurrency limit
+        still applies on top of the concurrency given here.
+        """
+        batch_semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def ask_one(question: str) -> AskResult:
+            async with batch_semaphore:
+                try:
+                    response = await self._make_request(
+                        self._single_turn_messages(question)
+                    )
+                    return AskResult(question=question, response=response)
+                except Exception as e:
+                    logger.error(f"Question failed: {question[:80]} - {str(e)}")
+                    return AskResult(question=question, error=str(e))
+
+        logger.info(
+            f"Querying {getattr(self, 'model', '')} for {len(questions)} questions "
+            f"with concurrency {concurrency}"
+        )
+        return list(await asyncio.gather(*(ask_one(q) for q in questions)))
+
+    async def ask_with_context(
+        self,
+        context: str,
+        questions: Dict[str, str],
+        answer_tokens: int = 300,
+        concurrency: int = 4,
+    ) -> Dict[str, str]:
+        """
+        Answer keyed questions about one shared context in as few calls as possible.
+
+        Works like BaseModelHandler.ask_with_context.
+        """
+        prefix = build_context_prefix(self._system_message(), context)
+        packs = pack_questions(self, prefix, questions, answer_tokens)
+        batch_semaphore = asyncio.Semaphore(max(1, concurrency))
+        logger.info(
+            f"Querying {getattr(self, 'model', '')} for {len(questions)} questions "
+            f"over shared context in {len(packs)} calls"
+        )
+
+        async def ask_pack(pack: Dict[str, str]) -> Dict[str, str]:
+            async with batch_semaphore:
+                try:
+                    response = await self._make_request(
+                        prefix + [build_questions_message(pack)]
+                    )
+                except Exception as e:
+                    logger.error(f"Questions {list(pack)} failed: {str(e)}")
+                    return {}
+            return parse_keyed_answers(response, list(pack))
+
+        # The first call goes alone, so the rest can hit the cached prefix
+        answers = await ask_pack(packs[0]) if packs else {}
+        for pack_answers in await asyncio.gather(*(ask_pack(p) for p in packs[1:])):
+            answers.update(pack_answers)
+
+        missing = [key for key in questions if key not in answers]
+        if missing:
+            logger.warning(f"No answer for {missing}, asking again one by one")
+            singles = [{key: questions[key]} for key in missing]
+            for pack_answers in await asyncio.gather(*(ask_pack(p) for p in singles)):
+                answers.update(pack_answers)
+
+        return {key: answers.get(key, "") for key in questions}
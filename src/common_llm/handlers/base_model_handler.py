@@ -1,7 +1,39 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.common_llm.handlers.context_fan_in import (
+    build_context_prefix,
+    build_questions_message,
+    pack_questions,
+    parse_keyed_answers,
+)
+from src.common_llm.handlers.structured_output import (
+    REPAIR_PROMPT,
+    check_json_response,
+    parse_json_response,
+    schema_prompt,
+)
+
+
+@dataclass
+class AskResult:
+    question: str
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class BaseModelHandler(ABC):
+    # Whether _make_request enforces json_schema itself (otherwise it goes in the prompt)
+    native_json_schema = False
+
     @abstractmethod
     def ask(self, question: str, clear_history: bool = False) -> str:
         pass
@@ -13,3 +45,159 @@ class BaseModelHandler(ABC):
     @abstractmethod
     def set_system_prompt(self, system_prompt: str) -> None:
         pass
+
+    @abstractmethod
+    def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        pass
+
+    def _fit_history(self) -> None:
+        """Trim conversation_history to the handler's history_budget, if any."""
+        history_budget = getattr(self, "history_budget", None)
+        if history_budget:
+            self.conversation_history = history_budget.fit(
+                self.conversation_history,
+                summarise=lambda prompt: self._make_request(
+                    [{"role": "user", "content": prompt}]
+                ),
+            )
+
+    def _system_message(self) -> Optional[Dict[str, str]]:
+        history = getattr(self, "conversation_history", [])
+        return history[0] if history and history[0]["role"] == "system" else None
+
+    def _single_turn_messages(self, question: str) -> List[Dict[str, str]]:
+        """Messages for a standalone question: system prompt (if any) plus the question."""
+        system_message = self._system_message()
+        messages = [system_message] if system_message else []
+        return messages + [{"role": "user", "content": question}]
+
+    def ask_json(
+        self, question: str, schema: Dict[str, Any], max_attempts: int = 2
+    ) -> Any:
+        """
+        Ask a standalone question and get a response matching a JSON schema.
+
+        Uses the backend's structured output mode. The response is validated and
+        the model is asked to correct it only when validation fails.
+        Conversation history is neither used (apart from the system prompt) nor
+        updated.
+
+        Args:
+            question: The question to ask
+            schema: JSON schema of the expected response
+            max_attempts: Maximum number of requests including corrections
+        Returns:
+            The parsed JSON response
+        """
+        if not self.native_json_schema:
+            question = schema_prompt(question, schema)
+        messages = self._single_turn_messages(question)
+
+        errors = []
+        for attempt in range(max_attempts):
+            response = self._make_request(messages, json_schema=schema)
+            errors = check_json_response(response, schema)
+            if not errors:
+                return parse_json_response(response)
+            logger.warning(
+                f"Attempt {attempt + 1}/{max_attempts} returned invalid JSON: {errors}"
+            )
+            messages = messages + [
+                {"role": "assistant", "content": response},
+                {
+                    "role": "user",
+                    "content": REPAIR_PROMPT.format(errors="; ".join(errors)),
+                },
+            ]
+        raise RuntimeError(
+            f"Failed to get valid JSON after {max_attempts} attempts: {errors}"
+        )
+
+    def ask_many(self, questions: List[str], concurrency: int = 4) -> List[AskResult]:
+        """
+        Ask independent single-turn questions in parallel.
+
+        Conversation history is neither used (apart from the system prompt) nor
+        updated. A failing question does not abort the batch - its error is
+        reported on the corresponding result instead.
+
+        Args:
+            questions: Questions to ask
+            concurrency: Maximum number of requests in flight
+        Returns:
+            List of AskResult in the same order as questions
+        """
+
+        def ask_one(question: str) -> AskResult:
+            try:
+                response = self._make_request(self._single_turn_messages(question))
+                return AskResult(question=question, response=response)
+            except Exception as e:
+                logger.error(f"Question failed: {question[:80]} - {str(e)}")
+                return AskResult(question=question, error=str(e))
+
+        logger.info(
+            f"Querying {getattr(self, 'model', '')} for {len(questions)} questions "
+            f"with concurrency {concurrency}"
+        )
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            return list(executor.map(ask_one, questions))
+
+    def ask_with_context(
+        self,
+        context: str,
+        questions: Dict[str, str],
+        answer_tokens: int = 300,
+        concurrency: int = 4,
+    ) -> Dict[str, str]:
+        """
+        Answer keyed questions about one shared context in as few calls as possible.
+
+        Questions are packed into groups that fit the model's context window and
+        each group is answered with a keyed JSON object. Every call starts with
+        the same system prompt and context message, so providers can reuse the
+        cached prefix - the first group is sent alone to warm that cache.
+        Questions missing from a response are asked once more on their own.
+        Conversation history is neither used (apart from the system prompt) nor
+        updated.
+
+        Args:
+            context: Document the questions are about
+            questions: Question id -> question text
+            answer_tokens: Room reserved for each answer
+            concurrency: Maximum number of requests in flight after the first
+        Returns:
+            Question id -> answer, "" for questions that could not be answered
+        """
+        prefix = build_context_prefix(self._system_message(), context)
+        packs = pack_questions(self, prefix, questions, answer_tokens)
+        logger.info(
+            f"Querying {getattr(self, 'model', '')} for {len(questions)} questions "
+            f"over shared context in {len(packs)} calls"
+        )
+
+        def ask_pack(pack: Dict[str, str]) -> Dict[str, str]:
+            try:
+                response = self._make_request(prefix + [build_questions_message(pack)])
+            except Exception as e:
+                logger.error(f"Questions {list(pack)} failed: {str(e)}")
+                return {}
+            return parse_keyed_answers(response, list(pack))
+
+        answers = ask_pack(packs[0]) if packs else {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for pack_answers in executor.map(ask_pack, packs[1:]):
+                answers.update(pack_answers)
+
+            missing = [key for key in questions if key not in answers]
+            if missing:
+                logger.warning(f"No answer for {missing}, asking again one by one")
+                singles = [{key: questions[key]} for key in missing]
+                for pack_answers in executor.map(ask_pack, singles):
+                    answers.update(pack_answers)
+
+        return {key: answers.get(key, "") for key in questions}
@@ -0,0 +1,224 @@
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.history_budget import HistoryBudget
+from src.common_llm.handlers.structured_output import check_json_response
+
+Validator = Callable[[str], bool]
+# Extracts what self-consistency votes on, e.g. the label in a reasoned answer
+AnswerKey = Callable[[str], Optional[str]]
+
+
+def pattern_validator(pattern: str, flags: int = re.IGNORECASE) -> Validator:
+    """Accept answers containing the pattern, e.g. r"<action>(DARKEN|NONE)</action>"."""
+    compiled = re.compile(pattern, flags)
+    return lambda answer: compiled.search(answer) is not None
+
+
+def choice_validator(choices: List[str]) -> Validator:
+    """Accept answers that mention exactly one of the choices."""
+    return lambda answer: (
+        sum(choice.lower() in answer.lower() for choice in choices) == 1
+    )
+
+
+def _normalise(answer: str) -> str:
+    return " ".join(answer.lower().split())
+
+
+def pattern_key(pattern: str, flags: int = re.IGNORECASE) -> AnswerKey:
+    """Vote on the pattern's first group (or whole match), e.g. the action name."""
+    compiled = re.compile(pattern, flags)
+
+    def key(answer: str) -> Optional[str]:
+        match = compiled.search(answer)
+        if match is None:
+            return None
+        return _normalise(match.group(1) if compiled.groups else match.group(0))
+
+    return key
+
+
+def choice_key(choices: List[str]) -> AnswerKey:
+    """Vote on the one choice the answer mentions."""
+
+    def key(answer: str) -> Optional[str]:
+        mentioned = [c for c in choices if c.lower() in answer.lower()]
+        return _normalise(mentioned[0]) if len(mentioned) == 1 else None
+
+    return key
+
+
+class CascadeHandler(BaseModelHandler):
+    def __init__(
+        self,
+        handlers: List[BaseModelHandler],
+        system_prompt: Optional[str] = None,
+        validator: Optional[Validator] = None,
+        consistency_samples: int = 1,
+        consistency_threshold: float = 0.6,
+        answer_key: Optional[AnswerKey] = None,
+        history_budget: Optional[HistoryBudget] = None,
+    ):
+        """
+        Tries the cheapest model first and escalates only when its answer is rejected.
+
+        An answer is rejected when the validator returns False, when it doesn't
+        match the requested JSON schema, or - with consistency_samples > 1 -
+        when too few of the sampled answers of a tier agree. Samples are
+        compared by answer_key - e.g. the label extracted from a reasoned
+        answer - since free text rarely repeats word for word. The last tier's
+        answer is always returned.
+
+        Self-consistency needs temperature > 0 and no response cache on the
+        cheaper tiers, otherwise all samples are identical.
+
+        Args:
+            handlers: Tiers from the smallest to the largest model
+            system_prompt: System prompt used for every tier
+            validator: Returns True for acceptable answers
+            consistency_samples: Answers sampled per tier (except the last)
+            consistency_threshold: Share of samples that must agree, by default
+                a majority of them
+            answer_key: Extracts what samples must agree on, the whole
+                normalised answer by default
+            history_budget: Token budget of the history sent with each request
+        """
+        if not handlers:
+            raise ValueError("CascadeHandler needs at least one model")
+        self.handlers = handlers
+        self.validator = validator
+        self.consistency_samples = max(1, consistency_samples)
+        self.consistency_threshold = consistency_threshold
+        self.answer_key = answer_key or _normalise
+        self.history_budget = history_budget
+        # How many requests each tier answered
+        self.answered_by: Dict[str, int] = {handler.model: 0 for handler in handlers}
+        self.model = "cascade:" + ",".join(handler.model for handler in handlers)
+        self.conversation_history = []
+        if system_prompt:
+            self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Set or update the system prompt for the conversation."""
+        self.conversation_history = [{"role": "system", "content": system_prompt}]
+        logger.info("System prompt set successfully")
+
+    def _sample(
+        self,
+        handler: BaseModelHandler,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]],
+    ) -> List[str]:
+        if self.consistency_samples == 1:
+            return [handler._make_request(messages, json_schema=json_schema)]
+        with ThreadPoolExecutor(max_workers=self.consistency_samples) as executor:
+            futures = [
+                executor.submit(handler._make_request, messages, json_schema)
+                for _ in range(self.consistency_samples)
+            ]
+            return [future.result() for future in futures]
+
+    def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Ask each tier in turn until one gives an acceptable answer."""
+        for handler in self.handlers[:-1]:
+            try:
+                answers = self._sample(handler, messages, json_schema)
+            except Exception as e:
+                logger.warning(f"{handler.model} failed, escalating: {str(e)}")
+                continue
+
+            answer, reason = self._check(answers, json_schema)
+            if answer is not None:
+                self.answered_by[handler.model] += 1
+                return answer
+            logger.info(f"Escalating from {handler.model}: {reason}")
+
+        last = self.handlers[-1]
+        answer = last._make_request(messages, json_schema=json_schema)
+        self.answered_by[last.model] += 1
+        return answer
+
+    def _check(
+        self, answers: List[str], json_schema: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return (answer, None) if the tier's answers pass, else (None, reason)."""
+        valid = answers
+        if json_schema:
+            valid = [a for a in valid if not check_json_response(a, json_schema)]
+        if self.validator:
+            valid = [a for a in valid if self.validator(a)]
+        if not valid:
+            return None, "answer rejected by validation"
+
+        if len(answers) > 1:
+            votes = Counter(
+                key for key in map(self.answer_key, valid) if key is not None
+            )
+            if not votes:
+                return None, "no answer to vote on"
+            top, count = votes.most_common(1)[0]
+            if count / len(answers) < self.consistency_threshold:
+                return None, f"only {count}/{len(answers)} samples agree"
+            return next(a for a in valid if self.answer_key(a) == top), None
+        return valid[0], None
+
+    def ask(self, question: str, clear_history: bool = False) -> str:
+        """
+        Ask a question, escalating to larger models only when needed.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Querying {self.model} for question: {question}")
+
+        self.conversation_history.append({"role": "user", "content": question})
+        self._fit_history()
+        response = self._make_request(self.conversation_history)
+        self.conversation_history.append({"role": "assistant", "content": response})
+
+        if clear_history:
+            self.clear_conversation()
+
+        return response
+
+    def clear_conversation(self) -> None:
+        """Clear the conversation history while preserving system prompt."""
+        system_prompt = (
+            self.conversation_history[0] if self.conversation_history else None
+        )
+        self.conversation_history = [system_prompt] if system_prompt else []
+        logger.info("Conversation history cleared")
+
+
+def main():
+    from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
+    from src.common_llm.llm_enums import LlamaModels, OpenAIModels
+
+    handler = ModelHandlerFactory.create_cascade_handler(
+        model_names=[
+            LlamaModels.LLAMA3_2_1b.value,
+            LlamaModels.GEMMA2_9B_INSTRUCT.value,
+            OpenAIModels.GPT_4o_MINI.value,
+        ],
+        system_prompt="Answer with one word: POSITIVE, NEGATIVE or NEUTRAL.",
+        validator=choice_validator(["POSITIVE", "NEGATIVE", "NEUTRAL"]),
+        consistency_samples=3,
+        answer_key=choice_key(["POSITIVE", "NEGATIVE", "NEUTRAL"]),
+    )
+    print(handler.ask("I loved the movie!", clear_history=True))
+    print(handler.answered_by)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.common_llm.handlers.history_budget import _get_encoding, count_messages_tokens
+from src.common_llm.llm_enums import OpenAIModels
+from src.tools.json_extractor_from_llm_response import (
+    extract_json_from_wrapped_response,
+)
+
+# Context is sent first and unchanged in every call, so the provider can cache the prefix
+CONTEXT_TEMPLATE = """Context:
+<context>
+{context}
+</context>"""
+
+QUESTIONS_TEMPLATE = """Answer each question below using the context above.
+Respond with a single JSON object that maps every question id to its answer, e.g.:
+{example}
+
+Questions:
+{questions}"""
+
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    OpenAIModels.GPT_35_TURBO.value: 16_385,
+    OpenAIModels.GPT_4o.value: 128_000,
+    OpenAIModels.GPT_4o_MINI.value: 128_000,
+    OpenAIModels.GPT_4o_MINI_FT_s04e02.value: 128_000,
+}
+
+# Ollama's num_ctx when the model profile doesn't set one
+DEFAULT_OLLAMA_CONTEXT_WINDOW = 2048
+
+
+def get_context_window(handler: Any) -> int:
+    """Context window of the handler's model in tokens."""
+    if handler.model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[handler.model]
+    profile = getattr(handler, "profile", None)
+    if profile and profile.num_ctx:
+        return profile.num_ctx
+    return DEFAULT_OLLAMA_CONTEXT_WINDOW
+
+
+def build_context_prefix(
+    system_message: Optional[Dict[str, Any]], context: str
+) -> List[Dict[str, Any]]:
+    prefix = [system_message] if system_message else []
+    return prefix + [
+        {"role": "user", "content": CONTEXT_TEMPLATE.format(context=context)}
+    ]
+
+
+def build_questions_message(questions: Dict[str, str]) -> Dict[str, str]:
+    example = json.dumps({key: "..." for key in questions}, ensure_ascii=False)
+    listed = "\n".join(f"{key}: {question}" for key, question in questions.items())
+    return {
+        "role": "user",
+        "content": QUESTIONS_TEMPLATE.format(example=example, questions=listed),
+    }
+
+
+def pack_questions(
+    handler: Any,
+    prefix: List[Dict[str, Any]],
+    questions: Dict[str, str],
+    answer_tokens: int,
+) -> List[Dict[str, str]]:
+    """
+    Split questions into as few groups as fit the model's context window.
+
+    Each group must fit next to the shared prefix together with answer_tokens
+    of room for every answer in it. Raises ValueError when a question doesn't
+    fit even on its own.
+    """
+    available = get_context_window(handler) - count_messages_tokens(
+        prefix, handler.model
+    )
+    encoding = _get_encoding(handler.model)
+
+    def fits(pack: Dict[str, str]) -> bool:
+        tokens = len(encoding.encode(build_questions_message(pack)["content"]))
+        return tokens + answer_tokens * len(pack) <= available
+
+    packs: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    for key, question in questions.items():
+        if not fits({key: question}):
+            raise ValueError(
+                f"Context is too large for {handler.model} to answer question {key}"
+            )
+        candidate = {**current, key: question}
+        if fits(candidate):
+            current = candidate
+            continue
+        packs.append(current)
+        current = {key: question}
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_keyed_answers(response: str, keys: List[str]) -> Dict[str, str]:
+    """Pick the answers to the given question ids out of a JSON response."""
+    try:
+        answers = extract_json_from_wrapped_response(response)
+    except ValueError as e:
+        logger.warning(f"Response is not a JSON object: {str(e)}")
+        return {}
+    return {key: str(answers[key]) for key in keys if key in answers}
@@ -0,0 +1,171 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import tiktoken
+from loguru import logger
+
+from src.common_llm.llm_enums import OpenAIModels
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+SUMMARY_PROMPT = """Summarise the conversation below in a few sentences.
+Keep every fact, decision, name and number the assistant may need later.
+Respond with the summary only.
+
+{conversation}"""
+
+Message = Dict[str, Any]
+
+_encodings: Dict[str, tiktoken.Encoding] = {}
+
+
+def _get_encoding(model_name: str) -> tiktoken.Encoding:
+    if model_name not in _encodings:
+        try:
+            _encodings[model_name] = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            # Local models have their own tokenizers, cl100k is a close enough estimate
+            _encodings[model_name] = tiktoken.get_encoding("cl100k_base")
+    return _encodings[model_name]
+
+
+def count_message_tokens(message: Message, encoding: tiktoken.Encoding) -> int:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        # Vision content - only the text parts are counted
+        content = " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    formatted = f"<|im_start|>{message['role']}\n{content}<|im_end|>"
+    return len(
+        encoding.encode(formatted, allowed_special={"<|im_start|>", "<|im_end|>"})
+    )
+
+
+def count_messages_tokens(messages: List[Message], model_name: str) -> int:
+    """Estimate prompt tokens of a message list for the given model."""
+    encoding = _get_encoding(model_name)
+    return sum(count_message_tokens(message, encoding) for message in messages)
+
+
+class HistoryBudget:
+    def __init__(
+        self,
+        max_tokens: int,
+        strategy: str = "drop",
+        tokenizer_model: str = OpenAIModels.GPT_4o.value,
+    ):
+        """
+        Token budget for the conversation history sent with each request.
+
+        When the history exceeds max_tokens the oldest turns are dropped
+        ("drop") or replaced by a summary ("summarise"). The system prompt and
+        the latest user message are always kept.
+
+        Args:
+            max_tokens: Maximum number of tokens of the whole message list
+            strategy: "drop" or "summarise"
+            tokenizer_model: Model whose tokenizer is used for counting
+        """
+        if strategy not in ("drop", "summarise"):
+            raise ValueError(f"Unsupported history strategy: {strategy}")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.encoding = _get_encoding(tokenizer_model)
+
+    def count_message_tokens(self, message: Message) -> int:
+        return count_message_tokens(message, self.encoding)
+
+    def count_tokens(self, messages: List[Message]) -> int:
+        return sum(self.count_message_tokens(message) for message in messages)
+
+    def _split(
+        self, messages: List[Message]
+    ) -> Tuple[List[Message], List[Message], List[Message]]:
+        """Split history into (pinned, overflow, kept) so pinned + kept fits the budget."""
+        pinned = []
+        rest = list(messages)
+        if rest and rest[0]["role"] == "system" and not self._is_summary(rest[0]):
+            pinned.append(rest.pop(0))
+
+        budget = self.max_tokens - self.count_tokens(pinned)
+        tokens = [self.count_message_tokens(message) for message in rest]
+        total = sum(tokens)
+
+        cut = 0
+        while total > budget and cut < len(rest) - 1:
+            total -= tokens[cut]
+            cut += 1
+        # Don't start the kept part with an answer to a question that was cut
+        while cut < len(rest) - 1 and rest[cut]["role"] == "assistant":
+            cut += 1
+
+        return pinned, rest[:cut], rest[cut:]
+
+    @staticmethod
+    def _is_summary(message: Message) -> bool:
+        return message["role"] == "system" and str(message["content"]).startswith(
+            SUMMARY_PREFIX
+        )
+
+    @staticmethod
+    def _summary_request(overflow: List[Message]) -> str:
+        conversation = "\n".join(
+            f"{message['role']}: {message['content']}" for message in overflow
+        )
+        return SUMMARY_PROMPT.format(conversation=conversation)
+
+    def _merge(
+        self, pinned: List[Message], summary: Optional[str], kept: List[Message]
+    ) -> List[Message]:
+        summary_message = (
+            [{"role": "system", "content": f"{SUMMARY_PREFIX} {summary}"}]
+            if summary
+            else []
+        )
+        fitted = pinned + summary_message + kept
+        if summary and self.count_tokens(fitted) > self.max_tokens:
+            # Summary itself doesn't fit - fall back to dropping
+            fitted = pinned + kept
+        return fitted
+
+    def fit(
+        self,
+        messages: List[Message],
+        summarise: Optional[Callable[[str], str]] = None,
+    ) -> List[Message]:
+        """
+        Return the history trimmed to the budget.
+
+        Args:
+            messages: Conversation history, system prompt first
+            summarise: Sends a single prompt to the model, required for "summarise"
+        """
+        pinned, overflow, kept = self._split(messages)
+        if not overflow:
+            return messages
+
+        summary = None
+        if self.strategy == "summarise" and summarise:
+            summary = summarise(self._summary_request(overflow))
+        logger.info(
+            f"History over {self.max_tokens} tokens, trimmed {len(overflow)} messages"
+        )
+        return self._merge(pinned, summary, kept)
+
+    async def fit_async(
+        self,
+        messages: List[Message],
+        summarise: Optional[Callable[[str], Awaitable[str]]] = None,
+    ) -> List[Message]:
+        """Same as fit, for handlers whose requests are coroutines."""
+        pinned, overflow, kept = self._split(messages)
+        if not overflow:
+            return messages
+
+        summary = None
+        if self.strategy == "summarise" and summarise:
+            summary = await summarise(self._summary_request(overflow))
+        logger.info(
+            f"History over {self.max_tokens} tokens, trimmed {len(overflow)} messages"
+        )
+        return self._merge(pinned, summary, kept)
@@ -0,0 +1,185 @@
+import asyncio
+from typing import Any, List, Dict, Optional
+
+import ollama
+from loguru import logger
+
+from src.common_llm.cache.handler_cache import get_cached_response, store_response
+from src.common_llm.cache.response_cache import ResponseCache
+from src.common_llm.cache.semantic_cache import SemanticCache
+from src.common_llm.cache.single_flight import async_single_flight
+from src.common_llm.factory.client_pool import get_async_ollama_client
+from src.common_llm.handlers.async_base_model_handler import (
+    AsyncBaseModelHandler,
+    get_model_semaphore,
+    set_model_concurrency,
+)
+from src.common_llm.handlers.history_budget import HistoryBudget
+from src.common_llm.metrics import track_call
+from src.common_llm.llm_enums import LlamaModels
+from src.common_llm.llm_ollama_profiles import OllamaProfile, get_ollama_profile
+
+
+class AsyncLlamaHandler(AsyncBaseModelHandler):
+    def __init__(
+        self,
+        model_name: str = LlamaModels.LLAMA3_1.value,
+        system_prompt: Optional[str] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        max_concurrency: Optional[int] = None,
+        host: Optional[str] = None,
+        client: Optional[ollama.AsyncClient] = None,
+        profile: Optional[OllamaProfile] = None,
+    ):
+        # Without an explicit client, the pooled one of the running loop is used
+        self.client = client
+        self.host = host
+        self.model = model_name
+        self.profile = profile or get_ollama_profile(model_name)
+        self.max_retries = max_retries
+        self.initial_retry_delay = initial_retry_delay
+        self.conversation_history = []
+        self.temperature = temperature
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.bypass_cache = bypass_cache
+        self.history_budget = history_budget
+        if max_concurrency:
+            set_model_concurrency(model_name, max_concurrency)
+        if system_prompt:
+            self.set_system_prompt(system_prompt)
+
+    async def warm_up(self) -> None:
+        """Load the model now, so the first question doesn't wait for it."""
+        client = self.client or get_async_ollama_client(self.host)
+        await client.generate(
+            model=self.model,
+            prompt="",
+            options=self.profile.to_options(),
+            keep_alive=self.profile.keep_alive,
+        )
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Set or update the system prompt for the conversation."""
+        self.conversation_history = [{"role": "system", "content": system_prompt}]
+        logger.info("System prompt set successfully")
+
+    @async_single_flight
+    async def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Make request to LLM with exponential backoff retry logic.
+
+        Served from the response caches when configured and not bypassed;
+        identical requests already in flight share their upstream call.
+        With json_schema Ollama's JSON mode is used - the schema itself has to
+        be described in the prompt.
+        """
+        response_format = "json" if json_schema else None
+        with track_call("ollama", self.model) as call:
+            cached = get_cached_response(self, messages, response_format)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            retry_delay = self.initial_retry_delay
+
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                try:
+                    async with get_model_semaphore(self.model):
+                        client = self.client or get_async_ollama_client(self.host)
+                        response = await client.chat(
+                            model=self.model,
+                            messages=messages,
+                            options=self.profile.to_options(self.temperature),
+                            keep_alive=self.profile.keep_alive,
+                            format=response_format or "",
+                        )
+                    result = response["message"]["content"].strip()
+                    call.prompt_tokens = response.get("prompt_eval_count")
+                    call.completion_tokens = response.get("eval_count")
+                    break
+                except (ollama.ResponseError, ollama.RequestError) as e:
+                    logger.error(
+                        f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
+                    )
+                    if attempt < self.max_retries - 1:
+                        await asyncio.sleep(retry_delay)
+                        retry_delay *= 2
+                    else:
+                        raise RuntimeError(
+                            f"Failed to get LLM response after {self.max_retries} attempts: {e}"
+                        )
+
+            store_response(self, messages, result, response_format)
+            return result
+
+    async def ask(self, question: str, clear_history: bool = False) -> str:
+        """
+        Ask a question and get a response from the LLM.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Querying {self.model} for question: {question}")
+
+        user_message = {"role": "user", "content": question}
+        request_messages = self.conversation_history + [user_message]
+        messages = await self._fit_messages(request_messages)
+        if messages is not request_messages:
+            # History was trimmed, keep the trimmed version for the next turns
+            self.conversation_history = messages[:-1]
+        response = await self._make_request(messages)
+
+        # Add question and response to conversation history
+        self.conversation_history.append(user_message)
+        self.conversation_history.append({"role": "assistant", "content": response})
+
+        # Clear history if requested
+        if clear_history:
+            self.clear_conversation()
+
+        return response
+
+    def clear_conversation(self) -> None:
+        """Clear the conversation history while preserving system prompt."""
+        system_prompt = (
+            self.conversation_history[0]
+            if self.conversation_history
+            and self.conversation_history[0]["role"] == "system"
+            else None
+        )
+        self.conversation_history = [system_prompt] if system_prompt else []
+        logger.info("Conversation history cleared")
+
+
+async def run_sample():
+    handler = AsyncLlamaHandler(
+        model_name=LlamaModels.LLAMA3_2_3b.value,
+        system_prompt="You are a helpful AI assistant. Answer in one sentence.",
+        max_concurrency=2,
+    )
+    questions = ["What is Python?", "What is Java?", "What is Rust?", "What is Go?"]
+    responses = await asyncio.gather(
+        *(handler.ask(question, clear_history=True) for question in questions)
+    )
+    for question, response in zip(questions, responses):
+        print(f"{question} -> {response}")
+
+
+def main():
+    asyncio.run(run_sample())
+
+
+if __name__ == "__main__":
+    main()
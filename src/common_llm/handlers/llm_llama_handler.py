@@ -1,10 +1,24 @@
+import itertools
 from time import sleep
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional
 import ollama
 from loguru import logger
 
+from src.common_llm.cache.handler_cache import get_cached_response, store_response
+from src.common_llm.cache.response_cache import ResponseCache
+from src.common_llm.cache.semantic_cache import SemanticCache
+from src.common_llm.cache.single_flight import single_flight
+from src.common_llm.factory.client_pool import get_ollama_client
 from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.history_budget import HistoryBudget
+from src.common_llm.handlers.stream_stats import StreamStats
+from src.common_llm.metrics import track_call
 from src.common_llm.llm_enums import LlamaModels
+from src.common_llm.llm_ollama_profiles import (
+    OllamaProfile,
+    get_ollama_profile,
+    warm_up_ollama_model,
+)
 
 
 class LlamaHandler(BaseModelHandler):
@@ -15,32 +29,134 @@ class LlamaHandler(BaseModelHandler):
         max_retries: int = 3,
         initial_retry_delay: float = 1.0,
         temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        client: Optional[ollama.Client] = None,
+        host: Optional[str] = None,
+        profile: Optional[OllamaProfile] = None,
     ):
+        # Reuse the pooled client (and its connections) unless one is given
+        self.client = client or get_ollama_client(host)
         self.model = model_name
+        self.profile = profile or get_ollama_profile(model_name)
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
         self.conversation_history = []
         self.temperature = temperature
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.bypass_cache = bypass_cache
+        self.history_budget = history_budget
+        self.last_stream_stats: Optional[StreamStats] = None
         if system_prompt:
             self.set_system_prompt(system_prompt)
 
+    def warm_up(self) -> None:
+        """Load the model now, so the first question doesn't wait for it."""
+        warm_up_ollama_model(self.client, self.model, self.profile)
+
     def set_system_prompt(self, system_prompt: str) -> None:
         """Set or update the system prompt for the conversation."""
         self.conversation_history = [{"role": "system", "content": system_prompt}]
         logger.info("System prompt set successfully")
 
-    def _make_request(self, messages: List[Dict[str, str]]) -> str:
-        """Make request to LLM with exponential backoff retry logic."""
+    @single_flight
+    def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Make request to LLM with exponential backoff retry logic.
+
+        Served from the response caches when configured and not bypassed;
+        identical requests already in flight share their upstream call.
+        With json_schema Ollama's JSON mode is used - the schema itself has to
+        be described in the prompt.
+        """
+        response_format = "json" if json_schema else None
+        with track_call("ollama", self.model) as call:
+            cached = get_cached_response(self, messages, response_format)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            retry_delay = self.initial_retry_delay
+
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                try:
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        options=self.profile.to_options(self.temperature),
+                        keep_alive=self.profile.keep_alive,
+                        format=response_format or "",
+                    )
+                    result = response["message"]["content"].strip()
+                    call.prompt_tokens = response.get("prompt_eval_count")
+                    call.completion_tokens = response.get("eval_count")
+                    break
+                except ollama.ResponseError as e:
+                    logger.error(
+                        f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
+                    )
+                    if attempt < self.max_retries - 1:
+                        sleep(retry_delay)
+                        retry_delay *= 2
+                    else:
+                        raise RuntimeError(
+                            f"Failed to get LLM response after {self.max_retries} attempts: {e}"
+                        )
+
+            store_response(self, messages, result, response_format)
+            return result
+
+    def ask(self, question: str, clear_history: bool = False) -> str:
+        """
+        Ask a question and get a response from the LLM.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Querying {self.model} for question: {question}")
+
+        # Add user question to conversation history
+        self.conversation_history.append({"role": "user", "content": question})
+        self._fit_history()
+
+        # Get response
+        response = self._make_request(self.conversation_history)
+
+        # Add assistant's response to conversation history
+        self.conversation_history.append({"role": "assistant", "content": response})
+
+        # Clear history if requested
+        if clear_history:
+            self.conversation_history = self.conversation_history[
+                :1
+            ]  # Keep system prompt
+
+        return response
+
+    def _open_stream(self, messages: List[Dict[str, str]]):
+        """Start a streamed chat, retrying only until the first chunk arrives."""
         retry_delay = self.initial_retry_delay
 
         for attempt in range(self.max_retries):
             try:
-                response = ollama.chat(
+                stream = self.client.chat(
                     model=self.model,
                     messages=messages,
-                    options={"temperature": self.temperature},
+                    options=self.profile.to_options(self.temperature),
+                    keep_alive=self.profile.keep_alive,
+                    stream=True,
                 )
-                return response["message"]["content"].strip()
+                # The request is only sent once the generator is advanced
+                first_chunk = next(stream)
+                return first_chunk, stream
             except ollama.ResponseError as e:
                 logger.error(
                     f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
@@ -53,32 +169,50 @@ class LlamaHandler(BaseModelHandler):
                         f"Failed to get LLM response after {self.max_retries} attempts: {e}"
                     )
 
-    def ask(self, question: str, clear_history: bool = False) -> str:
+    def ask_stream(self, question: str, clear_history: bool = False) -> Iterator[str]:
         """
-        Ask a question and get a response from the LLM.
+        Ask a question and yield the response as it is generated.
+
+        The full response is added to the conversation history once the stream
+        ends. Timing of the call is available in last_stream_stats afterwards.
 
         Args:
             question: The question to ask
             clear_history: Whether to clear conversation history after this question
         """
-        logger.info(f"Querying {self.model} for question: {question}")
+        logger.info(f"Streaming {self.model} for question: {question}")
 
-        # Add user question to conversation history
-        self.conversation_history.append({"role": "user", "content": question})
+        user_message = {"role": "user", "content": question}
+        self.conversation_history.append(user_message)
+        self._fit_history()
+        messages = list(self.conversation_history)
+        stats = StreamStats(model=self.model, backend="ollama")
 
-        # Get response
-        response = self._make_request(self.conversation_history)
+        response = get_cached_response(self, messages)
+        if response is not None:
+            stats.mark_chunk()
+            yield response
+        else:
+            parts = []
+            first_chunk, stream = self._open_stream(messages)
+            for chunk in itertools.chain([first_chunk], stream):
+                delta = chunk["message"]["content"]
+                if delta:
+                    stats.mark_chunk()
+                    parts.append(delta)
+                    yield delta
+                if chunk.get("done"):
+                    stats.prompt_tokens = chunk.get("prompt_eval_count")
+                    stats.completion_tokens = chunk.get("eval_count")
+            response = "".join(parts).strip()
+            store_response(self, messages, response)
 
-        # Add assistant's response to conversation history
-        self.conversation_history.append({"role": "assistant", "content": response})
+        stats.finish()
+        self.last_stream_stats = stats
 
-        # Clear history if requested
+        self.conversation_history.append({"role": "assistant", "content": response})
         if clear_history:
-            self.conversation_history = self.conversation_history[
-                :1
-            ]  # Keep system prompt
-
-        return response
+            self.clear_conversation()
 
     def clear_conversation(self) -> None:
         """Clear the conversation history while preserving system prompt."""
@@ -104,6 +238,11 @@ def main():
     response2 = llm.ask("Can you show an example?")
     print(response2)
 
+    # Stream the answer as it is generated
+    for delta in llm.ask_stream("Summarize it in one sentence"):
+        print(delta, end="", flush=True)
+    print(f"\nTokens per second: {llm.last_stream_stats.tokens_per_second:.1f}")
+
     # Clear conversation history
     llm.clear_conversation()
 
@@ -0,0 +1,207 @@
+import asyncio
+import os
+from typing import Any, List, Dict, Optional
+
+from dotenv import load_dotenv
+import openai
+from openai import AsyncOpenAI
+from loguru import logger
+
+from src.common_llm.cache.handler_cache import get_cached_response, store_response
+from src.common_llm.cache.response_cache import ResponseCache
+from src.common_llm.cache.semantic_cache import SemanticCache
+from src.common_llm.cache.single_flight import async_single_flight
+from src.common_llm.factory.client_pool import get_async_openai_client
+from src.common_llm.handlers.async_base_model_handler import (
+    AsyncBaseModelHandler,
+    get_model_semaphore,
+    set_model_concurrency,
+)
+from src.common_llm.handlers.history_budget import HistoryBudget, count_messages_tokens
+from src.common_llm.handlers.llm_openAI_handler import RETRYABLE_ERRORS
+from src.common_llm.handlers.structured_output import openai_response_format
+from src.common_llm.metrics import track_call
+from src.common_llm.llm_enums import OpenAIModels
+from src.common_llm.rate_limiter import get_rate_limiter, retry_delay_after_error
+
+load_dotenv()
+
+
+class AsyncOpenAIHandler(AsyncBaseModelHandler):
+    native_json_schema = True
+
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        system_prompt: Optional[str] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        max_concurrency: Optional[int] = None,
+        client: Optional[AsyncOpenAI] = None,
+        base_url: Optional[str] = None,
+    ):
+        # Get API key from environment variable
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key and client is None:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+        # Without an explicit client, the pooled one of the running loop is used
+        self.client = client
+        self.base_url = base_url
+        self.model = model_name
+        self.max_retries = max_retries
+        self.initial_retry_delay = initial_retry_delay
+        self.conversation_history = []
+        self.temperature = temperature
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.bypass_cache = bypass_cache
+        self.history_budget = history_budget
+        if max_concurrency:
+            set_model_concurrency(model_name, max_concurrency)
+        if system_prompt:
+            self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Set or update the system prompt for the conversation."""
+        self.conversation_history = [{"role": "system", "content": system_prompt}]
+        logger.info("System prompt set successfully")
+
+    @async_single_flight
+    async def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Make request to OpenAI, paced by the model's shared rate limiter.
+
+        Served from the response caches when configured and not bypassed;
+        identical requests already in flight share their upstream call.
+        With json_schema the response is constrained to that schema.
+        """
+        response_format = openai_response_format(json_schema) if json_schema else None
+        format_options = {"response_format": response_format} if json_schema else {}
+        with track_call("openai", self.model) as call:
+            cached = get_cached_response(self, messages, response_format)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            limiter = get_rate_limiter(self.model)
+            estimated_tokens = count_messages_tokens(messages, self.model)
+
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                await limiter.acquire_async(estimated_tokens)
+                try:
+                    async with get_model_semaphore(self.model):
+                        client = self.client or get_async_openai_client(
+                            self.api_key, self.base_url
+                        )
+                        # Retries are done here, paced by the shared limiter
+                        raw_response = await client.with_options(
+                            max_retries=0
+                        ).chat.completions.with_raw_response.create(
+                            model=self.model,
+                            messages=messages,
+                            temperature=self.temperature,
+                            **format_options,
+                        )
+                    limiter.update_from_headers(raw_response.headers)
+                    response = raw_response.parse()
+                    if response.usage:
+                        limiter.record_usage(
+                            estimated_tokens, response.usage.total_tokens
+                        )
+                        call.prompt_tokens = response.usage.prompt_tokens
+                        call.completion_tokens = response.usage.completion_tokens
+                    result = response.choices[0].message.content.strip()
+                    break
+                except RETRYABLE_ERRORS as e:
+                    logger.error(
+                        f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
+                    )
+                    if attempt < self.max_retries - 1:
+                        await asyncio.sleep(
+                            retry_delay_after_error(
+                                limiter, e, attempt, self.initial_retry_delay
+                            )
+                        )
+                    else:
+                        raise RuntimeError(
+                            f"Failed to get OpenAI response after {self.max_retries} attempts: {e}"
+                        )
+                except openai.APIError as e:
+                    raise RuntimeError(f"OpenAI request failed: {e}")
+
+            store_response(self, messages, result, response_format)
+            return result
+
+    async def ask(self, question: str, clear_history: bool = False) -> str:
+        """
+        Ask a question and get a response from OpenAI.
+
+        The request is built from a snapshot of the history, so several asks may
+        run concurrently on one handler without corrupting each other's prompt.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Querying {self.model} for question: {question}")
+
+        user_message = {"role": "user", "content": question}
+        request_messages = self.conversation_history + [user_message]
+        messages = await self._fit_messages(request_messages)
+        if messages is not request_messages:
+            # History was trimmed, keep the trimmed version for the next turns
+            self.conversation_history = messages[:-1]
+        response = await self._make_request(messages)
+
+        # Add question and response to conversation history
+        self.conversation_history.append(user_message)
+        self.conversation_history.append({"role": "assistant", "content": response})
+
+        # Clear history if requested
+        if clear_history:
+            self.clear_conversation()
+
+        return response
+
+    def clear_conversation(self) -> None:
+        """Clear the conversation history while preserving system prompt."""
+        system_prompt = (
+            self.conversation_history[0]
+            if self.conversation_history
+            and self.conversation_history[0]["role"] == "system"
+            else None
+        )
+        self.conversation_history = [system_prompt] if system_prompt else []
+        logger.info("Conversation history cleared")
+
+
+async def run_sample():
+    handler = AsyncOpenAIHandler(
+        model_name=OpenAIModels.GPT_4o_MINI.value,
+        system_prompt="You are a helpful AI assistant. Answer in one sentence.",
+        max_concurrency=2,
+    )
+    questions = ["What is Python?", "What is Java?", "What is Rust?", "What is Go?"]
+    responses = await asyncio.gather(
+        *(handler.ask(question, clear_history=True) for question in questions)
+    )
+    for question, response in zip(questions, responses):
+        print(f"{question} -> {response}")
+
+
+def main():
+    asyncio.run(run_sample())
+
+
+if __name__ == "__main__":
+    main()
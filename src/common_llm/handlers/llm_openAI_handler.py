@@ -1,18 +1,37 @@
-import os
 from time import sleep
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional
 
 from dotenv import load_dotenv
+import openai
 from openai import OpenAI
 from loguru import logger
 
+from src.common_llm.cache.handler_cache import get_cached_response, store_response
+from src.common_llm.cache.response_cache import ResponseCache
+from src.common_llm.cache.semantic_cache import SemanticCache
+from src.common_llm.cache.single_flight import single_flight
+from src.common_llm.factory.client_pool import get_openai_client
 from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.history_budget import HistoryBudget, count_messages_tokens
+from src.common_llm.handlers.stream_stats import StreamStats
+from src.common_llm.handlers.structured_output import openai_response_format
+from src.common_llm.metrics import track_call
 from src.common_llm.llm_enums import OpenAIModels
+from src.common_llm.rate_limiter import get_rate_limiter, retry_delay_after_error
 
 load_dotenv()
 
+# Transient failures worth retrying - anything else is raised immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
 
 class OpenAIHandler(BaseModelHandler):
+    native_json_schema = True
+
     def __init__(
         self,
         model_name: str = "gpt-3.5-turbo",
@@ -20,18 +39,25 @@ class OpenAIHandler(BaseModelHandler):
         max_retries: int = 3,
         initial_retry_delay: float = 1.0,
         temperature: float = 0.7,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        bypass_cache: bool = False,
+        history_budget: Optional[HistoryBudget] = None,
+        client: Optional[OpenAI] = None,
+        base_url: Optional[str] = None,
     ):
-        # Get API key from environment variable
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-        self.client = OpenAI(api_key=api_key)
+        # Reuse the pooled client (and its connections) unless one is given
+        self.client = client or get_openai_client(base_url=base_url)
         self.model = model_name
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
         self.conversation_history = []
         self.temperature = temperature
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.bypass_cache = bypass_cache
+        self.history_budget = history_budget
+        self.last_stream_stats: Optional[StreamStats] = None
         if system_prompt:
             self.set_system_prompt(system_prompt)
 
@@ -40,27 +66,71 @@ class OpenAIHandler(BaseModelHandler):
         self.conversation_history = [{"role": "system", "content": system_prompt}]
         logger.info("System prompt set successfully")
 
-    def _make_request(self, messages: List[Dict[str, str]]) -> str:
-        """Make request to OpenAI with exponential backoff retry logic."""
-        retry_delay = self.initial_retry_delay
+    @single_flight
+    def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Make request to OpenAI, paced by the model's shared rate limiter.
 
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model, messages=messages, temperature=self.temperature
-                )
-                return response.choices[0].message.content.strip()
-            except Exception as e:
-                logger.error(
-                    f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
-                )
-                if attempt < self.max_retries - 1:
-                    sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    raise RuntimeError(
-                        f"Failed to get OpenAI response after {self.max_retries} attempts: {e}"
+        Served from the response caches when configured and not bypassed;
+        identical requests already in flight share their upstream call.
+        With json_schema the response is constrained to that schema.
+        """
+        response_format = openai_response_format(json_schema) if json_schema else None
+        format_options = {"response_format": response_format} if json_schema else {}
+        with track_call("openai", self.model) as call:
+            cached = get_cached_response(self, messages, response_format)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            limiter = get_rate_limiter(self.model)
+            estimated_tokens = count_messages_tokens(messages, self.model)
+
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                limiter.acquire(estimated_tokens)
+                try:
+                    # Retries are done here, paced by the shared limiter
+                    raw_response = self.client.with_options(
+                        max_retries=0
+                    ).chat.completions.with_raw_response.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        **format_options,
+                    )
+                    limiter.update_from_headers(raw_response.headers)
+                    response = raw_response.parse()
+                    if response.usage:
+                        limiter.record_usage(
+                            estimated_tokens, response.usage.total_tokens
+                        )
+                        call.prompt_tokens = response.usage.prompt_tokens
+                        call.completion_tokens = response.usage.completion_tokens
+                    result = response.choices[0].message.content.strip()
+                    break
+                except RETRYABLE_ERRORS as e:
+                    logger.error(
+                        f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
                     )
+                    if attempt < self.max_retries - 1:
+                        sleep(
+                            retry_delay_after_error(
+                                limiter, e, attempt, self.initial_retry_delay
+                            )
+                        )
+                    else:
+                        raise RuntimeError(
+                            f"Failed to get OpenAI response after {self.max_retries} attempts: {e}"
+                        )
+                except openai.APIError as e:
+                    raise RuntimeError(f"OpenAI request failed: {e}")
+
+            store_response(self, messages, result, response_format)
+            return result
 
     def ask(self, question: str, clear_history: bool = False) -> str:
         """
@@ -74,6 +144,7 @@ class OpenAIHandler(BaseModelHandler):
 
         # Add user question to conversation history
         self.conversation_history.append({"role": "user", "content": question})
+        self._fit_history()
 
         # Get response
         response = self._make_request(self.conversation_history)
@@ -89,6 +160,84 @@ class OpenAIHandler(BaseModelHandler):
 
         return response
 
+    def _open_stream(self, messages: List[Dict[str, str]]):
+        """Start a streamed completion, retrying only until the stream is open."""
+        limiter = get_rate_limiter(self.model)
+        estimated_tokens = count_messages_tokens(messages, self.model)
+
+        for attempt in range(self.max_retries):
+            limiter.acquire(estimated_tokens)
+            try:
+                return self.client.with_options(max_retries=0).chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+            except RETRYABLE_ERRORS as e:
+                logger.error(
+                    f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}"
+                )
+                if attempt < self.max_retries - 1:
+                    sleep(
+                        retry_delay_after_error(
+                            limiter, e, attempt, self.initial_retry_delay
+                        )
+                    )
+                else:
+                    raise RuntimeError(
+                        f"Failed to get OpenAI response after {self.max_retries} attempts: {e}"
+                    )
+            except openai.APIError as e:
+                raise RuntimeError(f"OpenAI request failed: {e}")
+
+    def ask_stream(self, question: str, clear_history: bool = False) -> Iterator[str]:
+        """
+        Ask a question and yield the response as it is generated.
+
+        The full response is added to the conversation history once the stream
+        ends. Timing of the call is available in last_stream_stats afterwards.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Streaming {self.model} for question: {question}")
+
+        user_message = {"role": "user", "content": question}
+        self.conversation_history.append(user_message)
+        self._fit_history()
+        messages = list(self.conversation_history)
+        stats = StreamStats(model=self.model, backend="openai")
+
+        response = get_cached_response(self, messages)
+        if response is not None:
+            stats.mark_chunk()
+            yield response
+        else:
+            parts = []
+            for chunk in self._open_stream(messages):
+                if chunk.usage:
+                    stats.prompt_tokens = chunk.usage.prompt_tokens
+                    stats.completion_tokens = chunk.usage.completion_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    stats.mark_chunk()
+                    parts.append(delta)
+                    yield delta
+            response = "".join(parts).strip()
+            store_response(self, messages, response)
+
+        stats.finish()
+        self.last_stream_stats = stats
+
+        self.conversation_history.append({"role": "assistant", "content": response})
+        if clear_history:
+            self.clear_conversation()
+
     def clear_conversation(self) -> None:
         """Clear the conversation history while preserving system prompt."""
         system_prompt = (
@@ -115,6 +264,11 @@ def main():
         response = handler.ask("Can you show an example?")
         print(f"Follow-up response: {response}")
 
+        # Stream the answer as it is generated
+        for delta in handler.ask_stream("Summarize it in one sentence"):
+            print(delta, end="", flush=True)
+        print(f"\nTokens per second: {handler.last_stream_stats.tokens_per_second:.1f}")
+
         # Clear conversation and ask new question
         handler.clear_conversation()
         response = handler.ask("Explain Python generators", clear_history=True)
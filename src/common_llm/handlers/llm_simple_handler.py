@@ -3,12 +3,20 @@ from time import sleep
 import ollama
 from loguru import logger
 
+from src.common_llm.factory.client_pool import get_ollama_client
 from src.common_llm.llm_enums import LlamaModels
+from src.common_llm.llm_ollama_profiles import get_ollama_profile, warm_up_ollama_model
 
 
 class SimpleLLMHandler:
     def __init__(self, model_name: str = LlamaModels.LLAMA3_1.value):
         self.model = model_name
+        self.client = get_ollama_client()
+        self.profile = get_ollama_profile(model_name)
+
+    def warm_up(self) -> None:
+        """Load the model now, so the first question doesn't wait for it."""
+        warm_up_ollama_model(self.client, self.model, self.profile)
 
     def ask(self, question: str) -> str:
         logger.info(f"Querying {self.model} for question: {question}")
@@ -17,8 +25,11 @@ class SimpleLLMHandler:
 
         for attempt in range(max_retries):
             try:
-                response = ollama.chat(
-                    model=self.model, messages=[{"role": "user", "content": question}]
+                response = self.client.chat(
+                    model=self.model,
+                    messages=[{"role": "user", "content": question}],
+                    options=self.profile.to_options(),
+                    keep_alive=self.profile.keep_alive,
                 )
                 return response["message"]["content"].strip()
             except ollama.ResponseError as e:
@@ -0,0 +1,294 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.history_budget import HistoryBudget
+
+
+class BackendStats:
+    def __init__(self, window: int = 50, max_age: Optional[float] = None):
+        """
+        Rolling latency and error statistics of one backend.
+
+        Samples older than max_age seconds are forgotten, so a backend that was
+        demoted - and is no longer called - gets tried again once its bad record
+        expires.
+        """
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        # (recorded at, latency, ok)
+        self._samples = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self) -> List[tuple]:
+        """Samples not older than max_age. Caller holds the lock."""
+        if self.max_age is not None:
+            cutoff = time.monotonic() - self.max_age
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+        return list(self._samples)
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._recent())
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = [ok for _, _, ok in self._recent()]
+        if not outcomes:
+            return 0.0
+        return 1 - sum(outcomes) / len(outcomes)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        latencies = self._latencies()
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+    def _latencies(self) -> List[float]:
+        with self._lock:
+            return [latency for _, latency, ok in self._recent() if ok]
+
+    def percentile(self, percent: float) -> Optional[float]:
+        ordered = sorted(self._latencies())
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class RoutedHandler(BaseModelHandler):
+    def __init__(
+        self,
+        handlers: List[BaseModelHandler],
+        system_prompt: Optional[str] = None,
+        hedge: bool = True,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        window: int = 50,
+        stats_max_age: Optional[float] = 300.0,
+        probe_every: Optional[int] = 20,
+        history_budget: Optional[HistoryBudget] = None,
+    ):
+        """
+        Routes each request to the fastest healthy backend.
+
+        Backends are ranked by rolling mean latency, skipping those whose error
+        rate exceeds max_error_rate. Backends without enough recent requests
+        follow the healthy ones in configured order and get a probe request
+        every probe_every requests. With hedge enabled, a request still running
+        after the primary's p95 latency is also sent to the next backend and the
+        first answer wins. Failed requests fall through to the next backend.
+
+        Args:
+            handlers: Backends in order of preference, e.g. local model first
+            system_prompt: System prompt used for every backend
+            hedge: Whether to send hedged requests to the backup backend
+            max_error_rate: Error rate above which a backend is considered unhealthy
+            min_samples: Requests needed before latency and health are trusted
+            window: Number of recent requests the statistics are based on
+            stats_max_age: Seconds after which a request no longer counts, so a
+                demoted backend is retried once its failures or slow answers
+                expire; None keeps them until pushed out of the window
+            probe_every: Every how many requests a backend with too few recent
+                samples is tried first, None to only use it as a fallback
+            history_budget: Token budget of the history sent with each request
+        """
+        if not handlers:
+            raise ValueError("RoutedHandler needs at least one backend")
+        self.handlers = handlers
+        self.hedge = hedge
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self._requests = 0
+        self._lock = threading.Lock()
+        self.history_budget = history_budget
+        self.stats: Dict[int, BackendStats] = {
+            index: BackendStats(window, stats_max_age) for index in range(len(handlers))
+        }
+        # Hedged requests that lost the race keep running here in the background
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(handlers))
+        self.model = "routed:" + ",".join(handler.model for handler in handlers)
+        self.conversation_history = []
+        if system_prompt:
+            self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Set or update the system prompt for the conversation."""
+        self.conversation_history = [{"role": "system", "content": system_prompt}]
+        logger.info("System prompt set successfully")
+
+    def _ranked_backends(self) -> List[int]:
+        """
+        Healthy backends by latency, then those with too few recent samples in
+        the configured order, then unhealthy ones. Every probe_every-th request
+        goes to the first under-sampled backend instead, so a demoted backend
+        whose record has expired is measured again.
+        """
+
+        def rank(index: int):
+            stats = self.stats[index]
+            if stats.samples < self.min_samples:
+                return (1, index, 0.0)
+            unhealthy = stats.error_rate > self.max_error_rate
+            return (2 if unhealthy else 0, stats.mean_latency or 0.0, index)
+
+        ranked = sorted(self.stats, key=rank)
+        with self._lock:
+            self._requests += 1
+            probe = self.probe_every and self._requests % self.probe_every == 0
+        if probe:
+            under_sampled = [i for i in ranked if rank(i)[0] == 1]
+            if under_sampled and ranked[0] != under_sampled[0]:
+                logger.debug(f"Probing {self.handlers[under_sampled[0]].model}")
+                ranked.remove(under_sampled[0])
+                ranked.insert(0, under_sampled[0])
+        return ranked
+
+    def _hedge_delay(self, index: int) -> Optional[float]:
+        stats = self.stats[index]
+        if not self.hedge or stats.samples < self.min_samples:
+            return None
+        return stats.percentile(95)
+
+    def _call_backend(
+        self,
+        index: int,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]],
+    ) -> str:
+        handler = self.handlers[index]
+        start_time = time.perf_counter()
+        try:
+            response = handler._make_request(messages, json_schema=json_schema)
+        except Exception:
+            self.stats[index].record(time.perf_counter() - start_time, ok=False)
+            raise
+        self.stats[index].record(time.perf_counter() - start_time, ok=True)
+        return response
+
+    def _make_request(
+        self,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Send the request to the best backend, hedging and falling back as needed."""
+        # Hedged requests outlive this call - don't let them see later changes
+        messages = list(messages)
+        pending: Dict[Future, int] = {}
+        queue = self._ranked_backends()
+        last_error: Optional[Exception] = None
+
+        def launch_next() -> bool:
+            if not queue:
+                return False
+            index = queue.pop(0)
+            logger.debug(f"Routing request to {self.handlers[index].model}")
+            future = self._executor.submit(
+                self._call_backend, index, messages, json_schema
+            )
+            pending[future] = index
+            return True
+
+        launch_next()
+        while pending:
+            primary = next(iter(pending.values()))
+            timeout = self._hedge_delay(primary) if len(pending) == 1 else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slower than its p95 - hedge on the next backend
+                if launch_next():
+                    logger.info(
+                        f"{self.handlers[primary].model} exceeded p95 latency, "
+                        f"hedging request"
+                    )
+                else:
+                    # Nothing to hedge with, just wait for the primary
+                    wait(list(pending), return_when=FIRST_COMPLETED)
+                continue
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Backend {self.handlers[index].model} failed: {e}")
+            if not pending:
+                launch_next()
+
+        raise RuntimeError(f"All backends failed, last error: {last_error}")
+
+    def ask(self, question: str, clear_history: bool = False) -> str:
+        """
+        Ask a question and get a response from the best available backend.
+
+        Args:
+            question: The question to ask
+            clear_history: Whether to clear conversation history after this question
+        """
+        logger.info(f"Querying {self.model} for question: {question}")
+
+        self.conversation_history.append({"role": "user", "content": question})
+        self._fit_history()
+        response = self._make_request(self.conversation_history)
+        self.conversation_history.append({"role": "assistant", "content": response})
+
+        if clear_history:
+            self.clear_conversation()
+
+        return response
+
+    def clear_conversation(self) -> None:
+        """Clear the conversation history while preserving system prompt."""
+        system_prompt = (
+            self.conversation_history[0] if self.conversation_history else None
+        )
+        self.conversation_history = [system_prompt] if system_prompt else []
+        logger.info("Conversation history cleared")
+
+    def backend_summary(self) -> List[Dict]:
+        return [
+            {
+                "model": handler.model,
+                "samples": self.stats[index].samples,
+                "error_rate": round(self.stats[index].error_rate, 3),
+                "mean_latency": self.stats[index].mean_latency,
+                "p95_latency": self.stats[index].percentile(95),
+            }
+            for index, handler in enumerate(self.handlers)
+        ]
+
+
+def main():
+    from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
+    from src.common_llm.llm_enums import LlamaModels, OpenAIModels
+
+    handler = ModelHandlerFactory.create_routed_handler(
+        model_names=[
+            LlamaModels.GEMMA2_9B_INSTRUCT.value,
+            OpenAIModels.GPT_4o_MINI.value,
+        ],
+        system_prompt="You are a helpful AI assistant.",
+    )
+    for question in ["What is Python? 1 sentence", "What is Java? 1 sentence"]:
+        print(handler.ask(question, clear_history=True))
+    for backend in handler.backend_summary():
+        print(backend)
+
+
+if __name__ == "__main__":
+    main()
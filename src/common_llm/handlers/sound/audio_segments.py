@@ -0,0 +1,126 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import torch
+from loguru import logger
+from whisper.audio import SAMPLE_RATE, load_audio
+
+from src.common_llm.handlers.sound.whisper_model_registry import (
+    DEFAULT_MODEL_BYTES,
+    WHISPER_MODEL_BYTES,
+    get_whisper_model,
+    get_whisper_registry,
+)
+
+# Torch threads per worker process - a few threads each beats one process
+# per core, which would also multiply the model's memory
+DEFAULT_THREADS_PER_WORKER = 4
+
+# (start, end) sample indices of a segment, and the part of it that it owns
+SegmentBounds = Tuple[int, int, int, int]
+
+
+def decode_audio(audio_path: str) -> np.ndarray:
+    """Decode an audio file once to 16 kHz mono float32 samples."""
+    return load_audio(audio_path, sr=SAMPLE_RATE)
+
+
+def segment_bounds(
+    num_samples: int, segment_seconds: float, overlap_seconds: float
+) -> List[SegmentBounds]:
+    """
+    Split num_samples into segments overlapping by overlap_seconds.
+
+    Each segment owns the samples up to the middle of its overlaps with its
+    neighbours, so every moment of the recording belongs to one segment.
+    """
+    length = int(segment_seconds * SAMPLE_RATE)
+    if length <= 0:
+        raise ValueError(f"Segment length must be positive, got {segment_seconds}s")
+    overlap = min(int(overlap_seconds * SAMPLE_RATE), length // 2)
+    step = length - overlap
+
+    bounds = []
+    start = 0
+    while True:
+        end = min(start + length, num_samples)
+        own_start = 0 if start == 0 else start + overlap // 2
+        own_end = num_samples if end == num_samples else end - overlap // 2
+        bounds.append((start, end, own_start, own_end))
+        if end == num_samples:
+            return bounds
+        start += step
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) // DEFAULT_THREADS_PER_WORKER)
+
+
+def memory_capped_workers(model_size: str, workers: int) -> int:
+    """
+    Worker processes whose model copies fit the Whisper memory budget.
+
+    Every worker loads its own model and the parent keeps its copy, so the
+    budget is shared by all of them - the per-process registry can't see that.
+    """
+    model_size_bytes = WHISPER_MODEL_BYTES.get(model_size, DEFAULT_MODEL_BYTES)
+    budget = get_whisper_registry().memory_budget_bytes
+    capped = max(1, min(workers, (budget - model_size_bytes) // model_size_bytes))
+    if capped < workers:
+        logger.info(
+            f"Using {capped} instead of {workers} workers to keep {model_size} "
+            f"model copies within the Whisper memory budget"
+        )
+    return capped
+
+
+def init_worker(model_size: str, threads: int) -> None:
+    """Process pool initializer - loads the worker's model once."""
+    torch.set_num_threads(threads)
+    get_whisper_model(model_size, "cpu")
+
+
+def transcribe_samples(
+    samples: np.ndarray, model_size: str, language: str
+) -> Dict[str, Any]:
+    """Process pool task - transcribe samples with the worker's CPU model."""
+    model = get_whisper_model(model_size, "cpu")
+    return model.transcribe(audio=samples, language=language, fp16=False, verbose=None)
+
+
+def stitch_segments(
+    results: List[Dict[str, Any]], bounds: List[SegmentBounds]
+) -> List[Dict[str, Any]]:
+    """
+    Whisper segments of all parts on the global timeline.
+
+    Timestamps are shifted by the part's offset; in overlaps only the segments
+    whose middle falls in the part's own range are kept, so nothing is
+    transcribed twice.
+    """
+    stitched: List[Dict[str, Any]] = []
+    for result, (start, _, own_start, own_end) in zip(results, bounds):
+        offset = start / SAMPLE_RATE
+        for segment in result["segments"]:
+            middle = (segment["start"] + segment["end"]) / 2 + offset
+            if not own_start / SAMPLE_RATE <= middle < own_end / SAMPLE_RATE:
+                continue
+            shifted = {
+                **segment,
+                "id": len(stitched),
+                "start": segment["start"] + offset,
+                "end": segment["end"] + offset,
+            }
+            if "words" in segment:
+                shifted["words"] = [
+                    {
+                        **word,
+                        "start": word["start"] + offset,
+                        "end": word["end"] + offset,
+                    }
+                    for word in segment["words"]
+                ]
+            stitched.append(shifted)
+    logger.debug(f"Stitched {len(stitched)} segments from {len(results)} parts")
+    return stitched
@@ -1,13 +1,25 @@
 from __future__ import annotations
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional, Dict, Any
 from dataclasses import dataclass, field
 
-import whisper
+from loguru import logger
 from whisper.utils import get_writer
 from whisper import Whisper
-from pydub import AudioSegment
 
+from src.common_llm.handlers.sound.audio_segments import (
+    DEFAULT_THREADS_PER_WORKER,
+    decode_audio,
+    default_workers,
+    init_worker,
+    memory_capped_workers,
+    segment_bounds,
+    stitch_segments,
+    transcribe_samples,
+)
+from src.common_llm.handlers.sound.whisper_model_registry import get_whisper_model
 from src.tools.find_project_root import find_project_root
 
 
@@ -26,15 +38,21 @@ class AudioTranscriber:
         self,
         model_size: str = "base",
         language: str = "en",
+        device: Optional[str] = None,
     ) -> None:
         """
         Initialize the AudioTranscriber with model and language settings.
 
+        The model comes from the process-wide Whisper registry, so transcribers
+        of the same size and device share one loaded model.
+
         Args:
             model_size: Size of the Whisper model to use (e.g., "base", "small", "medium")
             language: Language code for transcription (e.g., "en" for English)
+            device: Device to run the model on, CUDA when available by default
         """
-        self.model: Whisper = whisper.load_model(model_size)
+        self.model_size = model_size
+        self.model: Whisper = get_whisper_model(model_size, device)
         self.language = language
 
     def transcribe_audio(
@@ -102,52 +120,99 @@ class AudioTranscriber:
     def process_long_audio(
         self,
         audio_path: str,
-        segment_length_minutes: int = 10,
-        save_temp_files: bool = False,
+        segment_length_minutes: float = 10,
+        overlap_seconds: float = 5.0,
+        workers: Optional[int] = None,
+        output_dir: Optional[str] = None,
+        output_filename: Optional[str] = None,
+        save_formats: Optional[List[str]] = None,
     ) -> Optional[TranscriptionResult]:
         """
         Process long audio files by splitting them into segments.
 
+        The file is decoded once to 16 kHz samples and cut into overlapping
+        segments in memory. On CPU the segments are transcribed in parallel by
+        a pool of worker processes, each with its own copy of the model - as
+        many as fit WHISPER_MEMORY_BUDGET_GB next to this process's copy; on
+        GPU, or when only one fits, they are transcribed one after another. Segment timestamps are shifted
+        back to the time in the whole recording.
+
         Args:
             audio_path: Path to the audio file
             segment_length_minutes: Length of each segment in minutes
-            save_temp_files: Whether to save temporary segment files
+            overlap_seconds: Audio shared by neighbouring segments, so words on
+                a cut are heard whole by one of them
+            workers: Worker processes on CPU, one per 4 cores by default,
+                capped by the Whisper memory budget
+            output_dir: Directory where transcription files will be saved
+            output_filename: Name for the output files (without extension)
+            save_formats: List of format types to save (e.g., ["txt", "srt", "vtt"])
         Returns:
             TranscriptionResult object or None if processing fails
         """
         try:
-            temp_dir = self.output_dir if save_temp_files else None
-            temp_file = (
-                os.path.join(temp_dir, "temp_segment.mp3")
-                if temp_dir
-                else os.path.join(os.getcwd(), "temp_segment.mp3")
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+            samples = decode_audio(audio_path)
+            bounds = segment_bounds(
+                len(samples), segment_length_minutes * 60, overlap_seconds
             )
+            parts = [samples[start:end] for start, end, _, _ in bounds]
 
-            audio = AudioSegment.from_mp3(audio_path)
-            segment_length = (
-                segment_length_minutes * 60 * 1000
-            )  # Convert to milliseconds
-            segments: List[str] = []
-            all_segment_data: List[Dict[str, Any]] = []
-
-            for start in range(0, len(audio), segment_length):
-                segment = audio[start : start + segment_length]
-                segment.export(temp_file, format="mp3")
-
-                result = self.transcribe_audio(temp_file)
-                if result:
-                    segments.append(result.text)
-                    all_segment_data.extend(result.segments)
-
-            # Clean up temporary file if not saving
-            if not save_temp_files and os.path.exists(temp_file):
-                os.remove(temp_file)
-
-            if segments:
-                return TranscriptionResult(
-                    text=" ".join(segments), segments=all_segment_data
+            workers = memory_capped_workers(
+                self.model_size, min(len(parts), workers or default_workers())
+            )
+            if self.model.device.type == "cuda" or workers == 1:
+                logger.info(f"Transcribing {len(parts)} segments sequentially")
+                results = [
+                    self.model.transcribe(
+                        audio=part,
+                        language=self.language,
+                        fp16=self.model.device.type == "cuda",
+                        verbose=None,
+                    )
+                    for part in parts
+                ]
+            else:
+                logger.info(
+                    f"Transcribing {len(parts)} segments with {workers} processes"
                 )
-            return None
+                # Spawn, as forking a process that has started torch threads can hang
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker,
+                    initargs=(self.model_size, DEFAULT_THREADS_PER_WORKER),
+                ) as pool:
+                    results = list(
+                        pool.map(
+                            transcribe_samples,
+                            parts,
+                            [self.model_size] * len(parts),
+                            [self.language] * len(parts),
+                        )
+                    )
+
+            segments = stitch_segments(results, bounds)
+            if not segments:
+                return None
+            result = {
+                "text": " ".join(segment["text"].strip() for segment in segments),
+                "segments": segments,
+                "language": self.language,
+            }
+            transcription_result = TranscriptionResult(
+                result["text"], result["segments"]
+            )
+
+            if save_formats and output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                transcription_result.output_files = self._save_transcription(
+                    result, output_dir, save_formats, output_filename or "transcription"
+                )
+
+            return transcription_result
 
         except Exception as e:
             print(f"An error occurred during long audio processing: {str(e)}")
@@ -0,0 +1,135 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import torch
+import whisper
+from dotenv import load_dotenv
+from loguru import logger
+from whisper import Whisper
+
+load_dotenv()
+
+GB = 1024**3
+
+# Approximate memory of the loaded weights, to make room before a load
+WHISPER_MODEL_BYTES = {
+    "tiny": int(0.2 * GB),
+    "base": int(0.3 * GB),
+    "small": int(1.0 * GB),
+    "medium": int(3.0 * GB),
+    "large": int(6.0 * GB),
+    "turbo": int(3.2 * GB),
+}
+DEFAULT_MODEL_BYTES = int(6.0 * GB)
+
+# Enough for one large model, or several smaller ones
+DEFAULT_MEMORY_BUDGET_GB = 8.0
+
+ModelKey = Tuple[str, str]
+
+
+def default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def model_bytes(model: Whisper) -> int:
+    return sum(p.numel() * p.element_size() for p in model.parameters())
+
+
+class WhisperModelRegistry:
+    def __init__(self, memory_budget_bytes: int):
+        """
+        Process-wide Whisper models, loaded once per (size, device) and shared.
+
+        Models stay loaded until the memory budget is needed for another one;
+        the least recently used are evicted first. A model larger than the
+        budget is still loaded, on its own.
+
+        Args:
+            memory_budget_bytes: Total size of the loaded models
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[ModelKey, Tuple[Whisper, int]]" = OrderedDict()
+        # One lock per model, so a model is loaded once however many threads ask
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def get(self, model_size: str, device: Optional[str] = None) -> Whisper:
+        """Return the shared model, loading it on first use."""
+        key = (model_size, device or default_device())
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+                self._evict_for(
+                    WHISPER_MODEL_BYTES.get(model_size, DEFAULT_MODEL_BYTES)
+                )
+
+            logger.info(f"Loading Whisper model {model_size} on {key[1]}")
+            model = whisper.load_model(model_size, device=key[1])
+            size = model_bytes(model)
+            with self._lock:
+                self._models[key] = (model, size)
+                self._evict_for(0, keep=key)
+            logger.info(f"Whisper model {model_size} loaded ({size / GB:.1f} GB)")
+            return model
+
+    def _evict_for(self, needed: int, keep: Optional[ModelKey] = None) -> None:
+        """Evict least recently used models until needed bytes fit the budget."""
+        used = sum(size for _, size in self._models.values())
+        evicted = False
+        for key in list(self._models):
+            if used + needed <= self.memory_budget_bytes:
+                break
+            if key == keep:
+                continue
+            _, size = self._models.pop(key)
+            used -= size
+            evicted = True
+            logger.info(f"Evicted Whisper model {key[0]} on {key[1]}")
+        # Memory is freed once transcribers holding the model are gone too
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def evict(self, model_size: str, device: Optional[str] = None) -> None:
+        with self._lock:
+            self._models.pop((model_size, device or default_device()), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+        logger.info("Whisper models unloaded")
+
+    def loaded(self) -> Dict[ModelKey, int]:
+        """Loaded models and their sizes in bytes, least recently used first."""
+        with self._lock:
+            return {key: size for key, (_, size) in self._models.items()}
+
+
+_default_registry: Optional[WhisperModelRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_whisper_registry() -> WhisperModelRegistry:
+    """Process-wide registry with a budget of WHISPER_MEMORY_BUDGET_GB."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            budget = float(
+                os.getenv("WHISPER_MEMORY_BUDGET_GB", DEFAULT_MEMORY_BUDGET_GB)
+            )
+            _default_registry = WhisperModelRegistry(int(budget * GB))
+        return _default_registry
+
+
+def get_whisper_model(
+    model_size: str = "base", device: Optional[str] = None
+) -> Whisper:
+    """Shared Whisper model of the given size on device (CUDA when available)."""
+    return get_whisper_registry().get(model_size, device)
@@ -0,0 +1,54 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from loguru import logger
+
+from src.common_llm.metrics import CallMetrics, get_metrics_registry
+
+
+@dataclass
+class StreamStats:
+    model: str
+    started_at: float = field(default_factory=time.perf_counter)
+    time_to_first_token: Optional[float] = None
+    total_time: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    chunks: int = 0
+    backend: str = "stream"
+
+    def mark_chunk(self) -> None:
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.started_at
+        self.chunks += 1
+
+    def finish(self) -> None:
+        self.total_time = time.perf_counter() - self.started_at
+        # Backends that don't report usage send roughly one token per chunk
+        if self.completion_tokens is None:
+            self.completion_tokens = self.chunks
+        logger.info(
+            f"Stream from {self.model}: first token after "
+            f"{self.time_to_first_token or 0:.3f}s, {self.completion_tokens} tokens "
+            f"in {self.total_time:.3f}s ({self.tokens_per_second:.1f} tokens/s)"
+        )
+        get_metrics_registry().record(
+            CallMetrics(
+                backend=self.backend,
+                model=self.model,
+                latency=self.total_time,
+                prompt_tokens=self.prompt_tokens,
+                completion_tokens=self.completion_tokens,
+            )
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generation speed, measured from the first token on."""
+        if not self.total_time or not self.completion_tokens:
+            return 0.0
+        generation_time = self.total_time - (self.time_to_first_token or 0)
+        if generation_time <= 0:
+            return 0.0
+        return self.completion_tokens / generation_time
@@ -0,0 +1,92 @@
+import json
+from typing import Any, Dict, List
+
+from src.tools.json_extractor_from_llm_response import (
+    extract_json_from_wrapped_response,
+)
+
+# Used by backends that only support a plain JSON mode, not a schema
+SCHEMA_PROMPT = """{question}
+
+Respond with JSON only, matching this JSON schema:
+{schema}"""
+
+REPAIR_PROMPT = """Your response is not valid: {errors}
+Respond again with corrected JSON only."""
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _has_type(instance: Any, type_name: str) -> bool:
+    if type_name in ("integer", "number") and isinstance(instance, bool):
+        return False
+    return isinstance(instance, _JSON_TYPES.get(type_name, object))
+
+
+def validate_json(instance: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check instance against the JSON schema subset used for structured output.
+
+    Supports type, enum, properties, required, additionalProperties and items.
+    Returns a list of problems, empty when the instance is valid.
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_has_type(instance, type_name) for type_name in types):
+            return [f"{path} should be {' or '.join(types)}"]
+
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path} should be one of {schema['enum']}")
+
+    if isinstance(instance, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in instance:
+                errors.append(f"{path}.{name} is missing")
+        for name, value in instance.items():
+            if name in properties:
+                errors += validate_json(value, properties[name], f"{path}.{name}")
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{name} is not allowed")
+
+    if isinstance(instance, list) and "items" in schema:
+        for index, item in enumerate(instance):
+            errors += validate_json(item, schema["items"], f"{path}[{index}]")
+
+    return errors
+
+
+def parse_json_response(response: str) -> Any:
+    """Parse a JSON response, tolerating text or code fences around the object."""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        return extract_json_from_wrapped_response(response)
+
+
+def openai_response_format(schema: Dict[str, Any], name: str = "response") -> Dict:
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema}}
+
+
+def schema_prompt(question: str, schema: Dict[str, Any]) -> str:
+    return SCHEMA_PROMPT.format(
+        question=question, schema=json.dumps(schema, ensure_ascii=False)
+    )
+
+
+def check_json_response(response: str, schema: Dict[str, Any]) -> List[str]:
+    """Parse and validate a response, returning problems to report back to the model."""
+    try:
+        return validate_json(parse_json_response(response), schema)
+    except ValueError as e:
+        return [f"response is not JSON ({str(e)})"]
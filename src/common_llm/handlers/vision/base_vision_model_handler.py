@@ -1,8 +1,47 @@
+import os
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from enum import Enum
+from typing import Dict, Optional, List
+
+from loguru import logger
+
+from src.common_llm.cache.single_flight import get_single_flight, request_key
+from src.common_llm.handlers.base_model_handler import AskResult
+from src.common_llm.handlers.vision.image_packing import (
+    PackingBudget,
+    Validator,
+    build_packed_question,
+    image_labels,
+    non_empty_answer,
+    pack_images,
+    split_packed_answers,
+)
+from src.common_llm.handlers.vision.image_preprocessing import (
+    OPENAI_IMAGE_OPTIONS,
+    ImageOptions,
+)
+
+# Key under which history messages reference their images (paths or URLs)
+IMAGE_REFS = "image_refs"
+
+
+class ImageHistoryPolicy(Enum):
+    # Every request carries all images of the conversation
+    RESEND = "resend"
+    # Only the latest question's images are sent, earlier ones are replaced by
+    # a note - the answers about them stay in the history as text
+    REPLACE = "replace"
+
+
+def image_placeholder(images: List[str]) -> str:
+    names = ", ".join(os.path.basename(image) for image in images)
+    return f"[Image(s) shown earlier: {names}]"
 
 
 class VisionModelHandler(ABC):
+    image_history: ImageHistoryPolicy = ImageHistoryPolicy.RESEND
+    image_options: ImageOptions = OPENAI_IMAGE_OPTIONS
+
     @abstractmethod
     def ask(
         self,
@@ -20,3 +59,137 @@ class VisionModelHandler(ABC):
     @abstractmethod
     def set_system_prompt(self, system_prompt: str) -> None:
         pass
+
+    @abstractmethod
+    def _render_user_message(self, question: str, images: List[str]) -> Dict:
+        """User message with its images encoded the way the API expects."""
+        pass
+
+    def _image_message(self, question: str, images: Optional[List[str]]) -> Dict:
+        """User message as kept in the history - images only by reference."""
+        message = {"role": "user", "content": question}
+        if images:
+            message[IMAGE_REFS] = list(images)
+        return message
+
+    def _render_messages(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Messages as sent to the model. Images are encoded only now; those of
+        earlier questions are resent or replaced according to image_history.
+        """
+        rendered = []
+        for index, message in enumerate(messages):
+            images = message.get(IMAGE_REFS)
+            if not images:
+                rendered.append(message)
+            elif (
+                index == len(messages) - 1
+                or self.image_history == ImageHistoryPolicy.RESEND
+            ):
+                rendered.append(self._render_user_message(message["content"], images))
+            else:
+                rendered.append(
+                    {
+                        "role": "user",
+                        "content": f"{message['content']}\n{image_placeholder(images)}",
+                    }
+                )
+        return rendered
+
+    def _render_packed_message(
+        self, question: str, labels: List[str], images: List[str]
+    ) -> Dict:
+        """User message of a packed request - the images follow in label order."""
+        return self._render_user_message(question, images)
+
+    def _system_messages(self) -> List[Dict]:
+        return [
+            message
+            for message in self.conversation_history[:1]
+            if message["role"] == "system"
+        ]
+
+    def _send(self, messages: List[Dict], max_response_tokens: Optional[int]) -> str:
+        # Identical requests in flight (e.g. the same image from two workers)
+        # share one call
+        return get_single_flight().do(
+            request_key(self, messages, max_tokens=max_response_tokens),
+            lambda: self._make_request(messages, max_response_tokens),
+        )
+
+    def _ask_single(self, question: str, image: str, answer_tokens: int) -> AskResult:
+        try:
+            user_message = self._image_message(question, [image])
+            response = self._send(
+                self._render_messages(self._system_messages() + [user_message]),
+                answer_tokens,
+            )
+            return AskResult(question=question, response=response)
+        except Exception as e:
+            logger.error(f"Question about {image} failed: {str(e)}")
+            return AskResult(question=question, error=str(e))
+
+    def _ask_pack(
+        self,
+        question: str,
+        pack: List[str],
+        validator: Validator,
+        answer_tokens: int,
+    ) -> Dict[str, str]:
+        """Valid answers of one packed request by image, empty if it failed."""
+        labels = image_labels(len(pack))
+        try:
+            message = self._render_packed_message(
+                build_packed_question(question, labels), labels, pack
+            )
+            response = self._send(
+                self._system_messages() + [message], answer_tokens * len(pack)
+            )
+            return split_packed_answers(response, pack, labels, validator)
+        except Exception as e:
+            logger.error(f"Packed request failed, asking one by one: {str(e)}")
+            return {}
+
+    def ask_packed(
+        self,
+        question: str,
+        images: List[str],
+        budget: PackingBudget = PackingBudget(),
+        validator: Validator = non_empty_answer,
+        answer_tokens: int = 300,
+    ) -> List[AskResult]:
+        """
+        Ask the same question about many images, several images per request.
+
+        Images are packed into requests within the budget and the model answers
+        with a JSON object keyed by image label. Images whose answer is missing
+        or fails the validator are asked about on their own. Each request has
+        just the system prompt; the history is not changed.
+
+        Args:
+            question: Question asked about every image
+            images: Image paths or URLs
+            budget: Images, pixels and image tokens allowed in one request
+            validator: Accepts a packed answer, by default any non-empty one
+            answer_tokens: Response tokens allowed per image
+
+        Returns:
+            One AskResult per image, in the order of images
+        """
+        packs = pack_images(images, self.image_options, budget)
+        logger.info(f"Asking about {len(images)} images in {len(packs)} requests")
+
+        results: Dict[str, AskResult] = {}
+        for pack in packs:
+            answers = (
+                self._ask_pack(question, pack, validator, answer_tokens)
+                if len(pack) > 1
+                else {}
+            )
+            for image in pack:
+                results[image] = (
+                    AskResult(question=question, response=answers[image])
+                    if image in answers
+                    else self._ask_single(question, image, answer_tokens)
+                )
+        return [results[image] for image in images]
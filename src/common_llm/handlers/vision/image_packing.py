@@ -0,0 +1,112 @@
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.common_llm.handlers.context_fan_in import parse_keyed_answers
+from src.common_llm.handlers.vision.image_preprocessing import (
+    ImageOptions,
+    prepare_image,
+)
+
+Validator = Callable[[str], bool]
+
+PACKED_QUESTION_TEMPLATE = """You are shown {count} images, labelled {labels} in the order they appear.
+Answer the question below for every image on its own.
+Respond with a single JSON object that maps every image label to its answer, e.g.:
+{example}
+
+Question:
+{question}"""
+
+
+@dataclass(frozen=True)
+class PackingBudget:
+    """
+    How many images may share one request.
+
+    max_images: Images per request
+    max_pixels: Total pixels per request after preprocessing, None for no limit
+    max_tokens: Total estimated image tokens per request, None for no limit
+    """
+
+    max_images: int = 4
+    max_pixels: Optional[int] = None
+    max_tokens: Optional[int] = None
+
+
+def non_empty_answer(answer: str) -> bool:
+    return bool(answer.strip())
+
+
+def image_cost(image: str, options: ImageOptions) -> Tuple[int, int]:
+    """Pixels and estimated tokens of an image as it will be uploaded."""
+    if image.startswith(("http://", "https://")):
+        # Remote images aren't downloaded - only max_images limits them
+        return 0, 0
+    prepared = prepare_image(image, options)
+    return prepared.width * prepared.height, prepared.tokens
+
+
+def pack_images(
+    images: List[str], options: ImageOptions, budget: PackingBudget
+) -> List[List[str]]:
+    """
+    Split images, in order, into groups that fit the budget. An image over the
+    budget on its own gets a group of its own.
+    """
+    packs: List[List[str]] = []
+    current: List[str] = []
+    pixels = tokens = 0
+    for image in images:
+        image_pixels, image_tokens = image_cost(image, options)
+        fits = len(current) < budget.max_images
+        if budget.max_pixels is not None:
+            fits = fits and pixels + image_pixels <= budget.max_pixels
+        if budget.max_tokens is not None:
+            fits = fits and tokens + image_tokens <= budget.max_tokens
+        if current and not fits:
+            packs.append(current)
+            current, pixels, tokens = [], 0, 0
+        current.append(image)
+        pixels += image_pixels
+        tokens += image_tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def image_labels(count: int) -> List[str]:
+    return [f"image_{index + 1}" for index in range(count)]
+
+
+def build_packed_question(question: str, labels: List[str]) -> str:
+    example = json.dumps({label: "..." for label in labels})
+    return PACKED_QUESTION_TEMPLATE.format(
+        count=len(labels),
+        labels=", ".join(labels),
+        example=example,
+        question=question,
+    )
+
+
+def split_packed_answers(
+    response: str,
+    images: List[str],
+    labels: List[str],
+    validator: Validator = non_empty_answer,
+) -> Dict[str, str]:
+    """
+    Answers of a packed request by image. Images whose answer is missing or
+    fails the validator are left out, to be asked about on their own.
+    """
+    answers = parse_keyed_answers(response, labels)
+    accepted = {}
+    for image, label in zip(images, labels):
+        answer = answers.get(label)
+        if answer is not None and validator(answer):
+            accepted[image] = answer
+        else:
+            logger.warning(f"No valid packed answer for {image}, asking on its own")
+    return accepted
@@ -0,0 +1,209 @@
+import base64
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from loguru import logger
+from PIL import Image, ImageOps
+
+from src.common_llm.llm_enums import LlamaVisionModels
+
+# OpenAI image tokens: "low" is a fixed 512px image, "high" is billed per 512px tile
+LOW_DETAIL_SIDE = 512
+LOW_DETAIL_TOKENS = 85
+TILE_SIDE = 512
+TILE_TOKENS = 170
+
+# Longest side the Ollama vision models look at - anything larger is scaled down
+# by the model anyway
+OLLAMA_MAX_SIDE = {
+    LlamaVisionModels.LLAVA.value: 672,
+    LlamaVisionModels.BAKLLAVA.value: 336,
+    LlamaVisionModels.MINICPM.value: 1344,
+    LlamaVisionModels.LLAVA_13B.value: 672,
+    LlamaVisionModels.LLAVA_34B.value: 672,
+    LlamaVisionModels.LLAMA3_2_VISION_11B.value: 1120,
+    LlamaVisionModels.LLAMA3_2_VISION_11B_INSTRUCT_Q8_0.value: 1120,
+}
+DEFAULT_OLLAMA_MAX_SIDE = 1344
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """
+    How images are prepared before upload.
+
+    max_side: Longest side after resizing, None keeps it
+    max_short_side: Shortest side after resizing, None keeps it
+    format: JPEG or WEBP - images are re-encoded to it when that saves bytes
+    quality: Encoder quality, 1-95
+    detail: OpenAI detail level - "low", "high", "auto" to pick per image,
+        None for models without one
+    """
+
+    max_side: Optional[int] = 2048
+    max_short_side: Optional[int] = 768
+    format: str = "JPEG"
+    quality: int = 85
+    detail: Optional[str] = "auto"
+
+
+# Matches how OpenAI scales "high" detail images: fit in 2048x2048, then the
+# shortest side to 768
+OPENAI_IMAGE_OPTIONS = ImageOptions()
+
+
+def ollama_image_options(model_name: str) -> ImageOptions:
+    """Options for an Ollama model - llama.cpp decodes JPEG but not WebP."""
+    return ImageOptions(
+        max_side=OLLAMA_MAX_SIDE.get(model_name, DEFAULT_OLLAMA_MAX_SIDE),
+        max_short_side=None,
+        format="JPEG",
+        detail=None,
+    )
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    detail: Optional[str] = None
+
+    @property
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode("utf-8")
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+    @property
+    def tokens(self) -> int:
+        return estimate_image_tokens(self.width, self.height, self.detail or "high")
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """OpenAI image token cost of an image already scaled to width x height."""
+    if detail == "low":
+        return LOW_DETAIL_TOKENS
+    tiles = math.ceil(width / TILE_SIDE) * math.ceil(height / TILE_SIDE)
+    return LOW_DETAIL_TOKENS + TILE_TOKENS * tiles
+
+
+def choose_detail(width: int, height: int, options: ImageOptions) -> Optional[str]:
+    if options.detail != "auto":
+        return options.detail
+    # Small images lose nothing at "low" and cost a fraction of the tokens
+    return "low" if max(width, height) <= LOW_DETAIL_SIDE else "high"
+
+
+def target_size(
+    width: int, height: int, options: ImageOptions, detail: Optional[str]
+) -> Tuple[int, int]:
+    """Size the image is scaled to - never larger than the original."""
+    scale = 1.0
+    if detail == "low":
+        scale = min(scale, LOW_DETAIL_SIDE / max(width, height))
+    else:
+        if options.max_side:
+            scale = min(scale, options.max_side / max(width, height))
+        if options.max_short_side:
+            scale = min(scale, options.max_short_side / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode(image: Image.Image, options: ImageOptions) -> bytes:
+    if image.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha channel - flatten transparency onto white
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=options.format, quality=options.quality, optimize=True)
+    return buffer.getvalue()
+
+
+def preprocess_image(data: bytes, options: ImageOptions) -> PreparedImage:
+    """Downsize and re-encode image bytes for upload."""
+    with Image.open(io.BytesIO(data)) as original:
+        original_format = original.format
+        image = ImageOps.exif_transpose(original)
+        detail = choose_detail(image.width, image.height, options)
+        size = target_size(image.width, image.height, options, detail)
+
+        resized = size != (image.width, image.height)
+        if resized:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        encoded = _encode(image, options)
+
+    # Keep the original when it's already small and in a format the model takes
+    accepted = original_format in ("JPEG", "PNG", options.format)
+    if not resized and accepted and len(data) <= len(encoded):
+        return PreparedImage(data, MIME_TYPES[original_format], *size, detail)
+    return PreparedImage(encoded, MIME_TYPES[options.format], *size, detail)
+
+
+class PreparedImageCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        In-memory LRU cache of prepared images keyed by file content hash and
+        options, so an image sent repeatedly is only decoded and encoded once.
+
+        Args:
+            max_bytes: Total size of the cached encoded images
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, ImageOptions], PreparedImage]" = (
+            OrderedDict()
+        )
+        self._size = 0
+
+    def get(self, key: Tuple[str, ImageOptions]) -> Optional[PreparedImage]:
+        with self._lock:
+            prepared = self._entries.get(key)
+            if prepared is not None:
+                self._entries.move_to_end(key)
+            return prepared
+
+    def put(self, key: Tuple[str, ImageOptions], prepared: PreparedImage) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = prepared
+            self._size += len(prepared.data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+
+
+_prepared_images = PreparedImageCache()
+
+
+def prepare_image(image_path: str, options: ImageOptions) -> PreparedImage:
+    """Read, downsize and re-encode an image file, cached by content hash."""
+    with open(image_path, "rb") as image_file:
+        data = image_file.read()
+
+    key = (hashlib.sha256(data).hexdigest(), options)
+    prepared = _prepared_images.get(key)
+    if prepared is None:
+        prepared = preprocess_image(data, options)
+        _prepared_images.put(key, prepared)
+        logger.debug(
+            f"Prepared {image_path}: {len(data)} -> {len(prepared.data)} bytes, "
+            f"{prepared.width}x{prepared.height}, detail {prepared.detail}"
+        )
+    return prepared
@@ -0,0 +1,381 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from loguru import logger
+
+from src.common_llm.cache.single_flight import get_async_single_flight, request_key
+from src.common_llm.factory.client_pool import close_async_clients, get_aiohttp_session
+from src.common_llm.handlers.async_base_model_handler import (
+    DEFAULT_MAX_CONCURRENCY,
+    get_model_concurrency,
+    get_model_semaphore,
+    set_model_concurrency,
+)
+from src.common_llm.handlers.base_model_handler import AskResult
+from src.common_llm.handlers.vision.base_vision_model_handler import (
+    ImageHistoryPolicy,
+    VisionModelHandler,
+)
+from src.common_llm.handlers.vision.image_packing import (
+    PackingBudget,
+    Validator,
+    build_packed_question,
+    image_labels,
+    non_empty_answer,
+    pack_images,
+    split_packed_answers,
+)
+from src.common_llm.handlers.vision.image_preprocessing import (
+    ImageOptions,
+    ollama_image_options,
+    prepare_image,
+)
+from src.common_llm.handlers.vision.llm_vision_ollama_handler import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    RETRYABLE_STATUS_CODES,
+)
+from src.common_llm.llm_enums import LlamaVisionModels
+from src.common_llm.metrics import track_call
+from src.common_llm.rate_limiter import backoff_with_jitter
+from src.tools.find_project_root import find_project_root
+
+# A question with the images it is about
+VisionQuestion = Tuple[str, List[str]]
+
+
+def ollama_parallel_slots() -> int:
+    """Requests the Ollama server runs in parallel per model (OLLAMA_NUM_PARALLEL)."""
+    return int(os.getenv("OLLAMA_NUM_PARALLEL", DEFAULT_MAX_CONCURRENCY))
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int, text: str):
+        super().__init__(f"HTTP {status}: {text}")
+
+
+class AsyncVisionOllamaHandler(VisionModelHandler):
+    def __init__(
+        self,
+        model_name: str = LlamaVisionModels.MINICPM.value,
+        system_prompt: Optional[str] = None,
+        max_retries: int = 3,
+        initial_retry_delay: float = 1.0,
+        host: str = "http://localhost:11434",
+        image_options: Optional[ImageOptions] = None,
+        image_history: ImageHistoryPolicy = ImageHistoryPolicy.RESEND,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Async Ollama vision handler on a pooled keep-alive connection.
+
+        Requests time out after timeout seconds and are retried with backoff on
+        connection errors, timeouts and 429/5xx answers. Images are prepared
+        in a worker thread, so encoding does not block the event loop.
+
+        Args:
+            model_name: Ollama vision model
+            system_prompt: Optional system prompt
+            max_retries: Attempts per request
+            initial_retry_delay: Delay before the first retry, doubled on each one
+            host: Ollama server URL
+            image_options: How images are resized and encoded before upload
+            image_history: Whether earlier images are resent or replaced by a note
+            timeout: Seconds to wait for a complete response
+            connect_timeout: Seconds to wait for the connection
+            max_concurrency: Requests to the model in flight at once, shared by
+                all async handlers of the model - the server's parallel slots
+                (OLLAMA_NUM_PARALLEL) by default
+        """
+        self.model = model_name
+        self.image_options = image_options or ollama_image_options(model_name)
+        self.image_history = image_history
+        self.host = host
+        self.max_retries = max_retries
+        self.initial_retry_delay = initial_retry_delay
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout, sock_connect=connect_timeout
+        )
+        self.conversation_history = []
+        if max_concurrency or "OLLAMA_NUM_PARALLEL" in os.environ:
+            set_model_concurrency(
+                model_name, max_concurrency or ollama_parallel_slots()
+            )
+
+        if system_prompt:
+            self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Set or update the system prompt for the conversation."""
+        self.conversation_history = [{"role": "system", "content": system_prompt}]
+        logger.info("System prompt set successfully")
+
+    def clear_conversation(self) -> None:
+        """Clear the conversation history while preserving system prompt."""
+        system_prompt = (
+            self.conversation_history[0] if self.conversation_history else None
+        )
+        self.conversation_history = [system_prompt] if system_prompt else []
+        logger.info("Conversation history cleared")
+
+    def _image_message(self, question: str, images: Optional[List[str]]) -> Dict:
+        if not images:
+            raise ValueError("At least one image is required for vision analysis")
+        return super()._image_message(question, images)
+
+    def _render_user_message(self, question: str, images: List[str]) -> Dict:
+        return {
+            "role": "user",
+            "content": f"{question}",
+            "images": [
+                prepare_image(image_path, self.image_options).base64
+                for image_path in images
+            ],
+        }
+
+    async def _post_chat(self, payload: Dict) -> Dict:
+        session = get_aiohttp_session(self.host)
+        async with get_model_semaphore(self.model):
+            async with session.post(
+                f"{self.host}/api/chat", json=payload, timeout=self.timeout
+            ) as response:
+                if response.status in RETRYABLE_STATUS_CODES:
+                    raise _RetryableStatus(response.status, await response.text())
+                if response.status != 200:
+                    raise Exception(f"Ollama API error: {await response.text()}")
+                return await response.json()
+
+    async def _make_request(
+        self, messages: List[Dict], max_response_tokens: Optional[int]
+    ) -> str:
+        """Make request to Ollama API, retrying timeouts and transient errors."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            **({"max_tokens": max_response_tokens} if max_response_tokens else {}),
+        }
+        with track_call("ollama_vision", self.model) as call:
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                try:
+                    data = await self._post_chat(payload)
+                    break
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    _RetryableStatus,
+                ) as e:
+                    error = str(e) or type(e).__name__
+                    logger.error(
+                        f"Attempt {attempt + 1}/{self.max_retries} failed: {error}"
+                    )
+                    if attempt < self.max_retries - 1:
+                        await asyncio.sleep(
+                            backoff_with_jitter(self.initial_retry_delay, attempt)
+                        )
+                    else:
+                        raise RuntimeError(
+                            f"Failed to get Ollama response after {self.max_retries} attempts: {error}"
+                        )
+
+            call.prompt_tokens = data.get("prompt_eval_count")
+            call.completion_tokens = data.get("eval_count")
+        return data["message"]["content"]
+
+    async def _request(
+        self, messages: List[Dict], max_response_tokens: Optional[int]
+    ) -> str:
+        # Encoding images is CPU work - keep it off the event loop
+        rendered = await asyncio.to_thread(self._render_messages, messages)
+        return await self._send(rendered, max_response_tokens)
+
+    async def _send(
+        self, messages: List[Dict], max_response_tokens: Optional[int]
+    ) -> str:
+        # Identical requests in flight share one call
+        return await get_async_single_flight().do(
+            request_key(self, messages, max_tokens=max_response_tokens),
+            lambda: self._make_request(messages, max_response_tokens),
+        )
+
+    async def ask(
+        self,
+        question: str,
+        clear_history: bool = False,
+        images: Optional[List[str]] = None,
+        max_response_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Ask a question with image analysis using Ollama API.
+        """
+        try:
+            user_message = self._image_message(question, images)
+            result = await self._request(
+                self.conversation_history + [user_message], max_response_tokens
+            )
+
+            # Update conversation history - images are kept by reference only
+            self.conversation_history.append(user_message)
+            self.conversation_history.append({"role": "assistant", "content": result})
+
+            if clear_history:
+                self.clear_conversation()
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in processing query: {str(e)}")
+            raise
+
+    async def ask_many(
+        self,
+        questions: List[VisionQuestion],
+        concurrency: Optional[int] = None,
+        max_response_tokens: Optional[int] = None,
+    ) -> List[AskResult]:
+        """
+        Ask independent (question, images) pairs concurrently, e.g. to describe a
+        directory of images.
+
+        Each pair is asked on its own with just the system prompt; the history
+        is not changed. Results keep the order of the questions, failures are
+        reported in AskResult.error instead of raising.
+
+        Args:
+            questions: Questions with the images they are about
+            concurrency: Requests in flight, the model's limit by default
+            max_response_tokens: Optional maximum number of tokens in each response
+        """
+        concurrency = max(1, concurrency or get_model_concurrency(self.model))
+        batch_semaphore = asyncio.Semaphore(concurrency)
+        system_messages = self._system_messages()
+
+        async def ask_one(question: str, images: List[str]) -> AskResult:
+            async with batch_semaphore:
+                try:
+                    user_message = self._image_message(question, images)
+                    response = await self._request(
+                        system_messages + [user_message], max_response_tokens
+                    )
+                    return AskResult(question=question, response=response)
+                except Exception as e:
+                    logger.error(f"Question failed: {question[:80]} - {str(e)}")
+                    return AskResult(question=question, error=str(e))
+
+        logger.info(
+            f"Querying {self.model} for {len(questions)} image questions "
+            f"with concurrency {concurrency}"
+        )
+        return list(
+            await asyncio.gather(
+                *(ask_one(question, images) for question, images in questions)
+            )
+        )
+
+    async def _ask_single(
+        self, question: str, image: str, answer_tokens: int
+    ) -> AskResult:
+        try:
+            user_message = self._image_message(question, [image])
+            response = await self._request(
+                self._system_messages() + [user_message], answer_tokens
+            )
+            return AskResult(question=question, response=response)
+        except Exception as e:
+            logger.error(f"Question about {image} failed: {str(e)}")
+            return AskResult(question=question, error=str(e))
+
+    async def _ask_pack(
+        self,
+        question: str,
+        pack: List[str],
+        validator: Validator,
+        answer_tokens: int,
+    ) -> Dict[str, str]:
+        labels = image_labels(len(pack))
+        try:
+            message = await asyncio.to_thread(
+                self._render_packed_message,
+                build_packed_question(question, labels),
+                labels,
+                pack,
+            )
+            response = await self._send(
+                self._system_messages() + [message], answer_tokens * len(pack)
+            )
+            return split_packed_answers(response, pack, labels, validator)
+        except Exception as e:
+            logger.error(f"Packed request failed, asking one by one: {str(e)}")
+            return {}
+
+    async def ask_packed(
+        self,
+        question: str,
+        images: List[str],
+        budget: PackingBudget = PackingBudget(),
+        validator: Validator = non_empty_answer,
+        answer_tokens: int = 300,
+    ) -> List[AskResult]:
+        """
+        Async VisionModelHandler.ask_packed - the packed requests, and the
+        single-image fallbacks of each, run concurrently within the model's
+        concurrency limit.
+        """
+        packs = await asyncio.to_thread(pack_images, images, self.image_options, budget)
+        logger.info(f"Asking about {len(images)} images in {len(packs)} requests")
+
+        async def ask_pack(pack: List[str]) -> Dict[str, AskResult]:
+            answers = (
+                await self._ask_pack(question, pack, validator, answer_tokens)
+                if len(pack) > 1
+                else {}
+            )
+            retried = [image for image in pack if image not in answers]
+            singles = await asyncio.gather(
+                *(self._ask_single(question, image, answer_tokens) for image in retried)
+            )
+            results = {
+                image: AskResult(question=question, response=answer)
+                for image, answer in answers.items()
+            }
+            results.update(zip(retried, singles))
+            return results
+
+        results: Dict[str, AskResult] = {}
+        for pack_results in await asyncio.gather(*(ask_pack(pack) for pack in packs)):
+            results.update(pack_results)
+        return [results[image] for image in images]
+
+
+async def describe_samples():
+    handler = AsyncVisionOllamaHandler(
+        model_name=LlamaVisionModels.MINICPM.value,
+        system_prompt="You are an expert in image analysis.",
+    )
+    resources_path = os.path.join(find_project_root(__file__), "resources")
+    image_paths = [
+        os.path.join(resources_path, name)
+        for name in sorted(os.listdir(resources_path))
+        if name.lower().endswith((".png", ".jpg", ".jpeg"))
+    ]
+    try:
+        results = await handler.ask_many(
+            [("Describe this image in one sentence.", [path]) for path in image_paths]
+        )
+        for path, result in zip(image_paths, results):
+            print(f"{os.path.basename(path)}: {result.response or result.error}")
+    finally:
+        await close_async_clients()
+
+
+def main():
+    asyncio.run(describe_samples())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,36 @@
 # llm_vision_ollama_handler.py
 
-import base64
+import json
 import os
-from typing import Optional, List
-from loguru import logger
+from time import sleep
+from typing import Dict, Iterator, Optional, List
+
 import requests
+from loguru import logger
 
-from src.common_llm.handlers.vision.base_vision_model_handler import VisionModelHandler
+from src.common_llm.factory.client_pool import get_http_session
+from src.common_llm.handlers.stream_stats import StreamStats
+from src.common_llm.handlers.vision.image_preprocessing import (
+    ImageOptions,
+    ollama_image_options,
+    prepare_image,
+)
+from src.common_llm.handlers.vision.base_vision_model_handler import (
+    ImageHistoryPolicy,
+    VisionModelHandler,
+)
 from src.common_llm.llm_enums import LlamaVisionModels
+from src.common_llm.metrics import track_call
+from src.common_llm.rate_limiter import backoff_with_jitter
 from src.tools.find_project_root import find_project_root
 
+# Responses worth retrying - Ollama answers 503 while its request queue is full
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Seconds to wait for a response - large models on CPU can be slow
+DEFAULT_REQUEST_TIMEOUT = 300.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
 
 class VisionOllamaHandler(VisionModelHandler):
     def __init__(
@@ -19,12 +40,20 @@ class VisionOllamaHandler(VisionModelHandler):
         max_retries: int = 3,
         initial_retry_delay: float = 1.0,
         host: str = "http://localhost:11434",
+        image_options: Optional[ImageOptions] = None,
+        image_history: ImageHistoryPolicy = ImageHistoryPolicy.RESEND,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
     ):
         self.model = model_name
+        self.image_options = image_options or ollama_image_options(model_name)
+        self.image_history = image_history
         self.host = host
+        self.timeout = timeout
+        self.session = get_http_session(host)
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
         self.conversation_history = []
+        self.last_stream_stats: Optional[StreamStats] = None
 
         if system_prompt:
             self.set_system_prompt(system_prompt)
@@ -43,14 +72,77 @@ class VisionOllamaHandler(VisionModelHandler):
         logger.info("Conversation history cleared")
 
     def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64 string."""
+        """Downsize and re-encode the image, return it as base64 string."""
         try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode("utf-8")
+            return prepare_image(image_path, self.image_options).base64
         except Exception as e:
             logger.error(f"Error encoding image: {str(e)}")
             raise
 
+    def _image_message(self, question: str, images: Optional[List[str]]) -> Dict:
+        if not images:
+            raise ValueError("At least one image is required for vision analysis")
+        return super()._image_message(question, images)
+
+    def _render_user_message(self, question: str, images: List[str]) -> Dict:
+        # Add images and question
+        base64_images = []
+        for image_path in images:
+            base64_image = self._encode_image(image_path)
+            base64_images += [base64_image]
+
+        return {
+            "role": "user",
+            "content": f"{question}",
+            "images": base64_images,
+        }
+
+    def _make_request(
+        self, messages: List[Dict], max_response_tokens: Optional[int]
+    ) -> str:
+        """Make request to Ollama API, retrying timeouts and transient errors."""
+        with track_call("ollama_vision", self.model) as call:
+            for attempt in range(self.max_retries):
+                call.retries = attempt
+                try:
+                    response = self.session.post(
+                        f"{self.host}/api/chat",
+                        json={
+                            "model": self.model,
+                            "messages": messages,
+                            "stream": False,
+                            **(
+                                {"max_tokens": max_response_tokens}
+                                if max_response_tokens
+                                else {}
+                            ),
+                        },
+                        timeout=(DEFAULT_CONNECT_TIMEOUT, self.timeout),
+                    )
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        break
+                    error = f"HTTP {response.status_code}: {response.text}"
+                except requests.RequestException as e:
+                    error = str(e)
+
+                logger.error(
+                    f"Attempt {attempt + 1}/{self.max_retries} failed: {error}"
+                )
+                if attempt < self.max_retries - 1:
+                    sleep(backoff_with_jitter(self.initial_retry_delay, attempt))
+                else:
+                    raise RuntimeError(
+                        f"Failed to get Ollama response after {self.max_retries} attempts: {error}"
+                    )
+
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.text}")
+
+            data = response.json()
+            call.prompt_tokens = data.get("prompt_eval_count")
+            call.completion_tokens = data.get("eval_count")
+        return data["message"]["content"]
+
     def ask(
         self,
         question: str,
@@ -62,47 +154,14 @@ class VisionOllamaHandler(VisionModelHandler):
         Ask a question with image analysis using Ollama API.
         """
         try:
-            if not images:
-                raise ValueError("At least one image is required for vision analysis")
+            user_message = self._image_message(question, images)
 
             # Prepare messages with conversation history
-            messages = self.conversation_history.copy()
-
-            # Add images and question
-            base64_images = []
-            for image_path in images:
-                base64_image = self._encode_image(image_path)
-                base64_images += [base64_image]
-
-            user_message = {
-                "role": "user",
-                "content": f"{question}",
-                "images": base64_images,
-            }
-
-            messages.append(user_message)
-
-            # Make request to Ollama API
-            response = requests.post(
-                f"{self.host}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    **(
-                        {"max_tokens": max_response_tokens}
-                        if max_response_tokens
-                        else {}
-                    ),
-                },
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Ollama API error: {response.text}")
+            messages = self._render_messages(self.conversation_history + [user_message])
 
-            result = response.json()["message"]["content"]
+            result = self._send(messages, max_response_tokens)
 
-            # Update conversation history
+            # Update conversation history - images are kept by reference only
             self.conversation_history.append(user_message)
             self.conversation_history.append({"role": "assistant", "content": result})
 
@@ -115,6 +174,62 @@ class VisionOllamaHandler(VisionModelHandler):
             logger.error(f"Error in processing query: {str(e)}")
             raise
 
+    def ask_stream(
+        self,
+        question: str,
+        clear_history: bool = False,
+        images: Optional[List[str]] = None,
+        max_response_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Same as ask, but yields the response as it is generated.
+
+        The full response is added to the conversation history once the stream
+        ends. Timing of the call is available in last_stream_stats afterwards.
+        """
+        user_message = self._image_message(question, images)
+        messages = self._render_messages(self.conversation_history + [user_message])
+        stats = StreamStats(model=self.model, backend="ollama_vision")
+
+        parts = []
+        with self.session.post(
+            f"{self.host}/api/chat",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "stream": True,
+                **({"max_tokens": max_response_tokens} if max_response_tokens else {}),
+            },
+            stream=True,
+            timeout=(DEFAULT_CONNECT_TIMEOUT, self.timeout),
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.text}")
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                delta = chunk.get("message", {}).get("content", "")
+                if delta:
+                    stats.mark_chunk()
+                    parts.append(delta)
+                    yield delta
+                if chunk.get("done"):
+                    stats.prompt_tokens = chunk.get("prompt_eval_count")
+                    stats.completion_tokens = chunk.get("eval_count")
+
+        stats.finish()
+        self.last_stream_stats = stats
+
+        self.conversation_history.append(user_message)
+        self.conversation_history.append(
+            {"role": "assistant", "content": "".join(parts)}
+        )
+
+        if clear_history:
+            self.clear_conversation()
+
 
 def full_complicated_pictures():
     try:
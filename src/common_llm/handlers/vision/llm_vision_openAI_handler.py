@@ -1,13 +1,24 @@
 import os
-from typing import Optional, List, Dict
-import base64
+from typing import Iterator, Optional, List, Dict
 
 from dotenv import load_dotenv
 from openai import OpenAI
 from loguru import logger
 
-from src.common_llm.handlers.vision.base_vision_model_handler import VisionModelHandler
+from src.common_llm.factory.client_pool import get_openai_client
+from src.common_llm.handlers.stream_stats import StreamStats
+from src.common_llm.handlers.vision.image_preprocessing import (
+    OPENAI_IMAGE_OPTIONS,
+    ImageOptions,
+    PreparedImage,
+    prepare_image,
+)
+from src.common_llm.handlers.vision.base_vision_model_handler import (
+    ImageHistoryPolicy,
+    VisionModelHandler,
+)
 from src.common_llm.llm_enums import OpenAIVisionModels
+from src.common_llm.metrics import track_call
 from src.tools.find_project_root import find_project_root
 
 load_dotenv()
@@ -20,12 +31,18 @@ class VisionOpenAIHandler(VisionModelHandler):
         system_prompt: Optional[str] = None,
         max_retries: int = 3,
         initial_retry_delay: float = 1.0,
+        client: Optional[OpenAI] = None,
+        image_options: ImageOptions = OPENAI_IMAGE_OPTIONS,
+        image_history: ImageHistoryPolicy = ImageHistoryPolicy.RESEND,
     ):
-        self.client = OpenAI()
+        self.client = client or get_openai_client()
         self.model = model_name
+        self.image_options = image_options
+        self.image_history = image_history
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
         self.conversation_history = []
+        self.last_stream_stats: Optional[StreamStats] = None
 
         if system_prompt:
             self.set_system_prompt(system_prompt)
@@ -43,11 +60,10 @@ class VisionOpenAIHandler(VisionModelHandler):
         self.conversation_history = [system_prompt] if system_prompt else []
         logger.info("Conversation history cleared")
 
-    def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64 string."""
+    def _encode_image(self, image_path: str) -> PreparedImage:
+        """Downsize and re-encode the image for upload."""
         try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode("utf-8")
+            return prepare_image(image_path, self.image_options)
         except Exception as e:
             logger.error(f"Error encoding image: {str(e)}")
             raise
@@ -57,11 +73,47 @@ class VisionOpenAIHandler(VisionModelHandler):
         if image_source.startswith(("http://", "https://")):
             return {"type": "image_url", "image_url": {"url": image_source}}
         else:
-            base64_image = self._encode_image(image_source)
-            return {
-                "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
-            }
+            prepared = self._encode_image(image_source)
+            image_url = {"url": prepared.data_url}
+            if prepared.detail:
+                image_url["detail"] = prepared.detail
+            return {"type": "image_url", "image_url": image_url}
+
+    def _build_content(self, question: str, images: Optional[List[str]]):
+        if images:
+            # Prepare content with images
+            content = [{"type": "text", "text": question}]
+            for image_source in images:
+                content.append(self._prepare_image_content(image_source))
+            return content
+        # Regular text question
+        return question
+
+    def _render_user_message(self, question: str, images: List[str]) -> Dict:
+        return {"role": "user", "content": self._build_content(question, images)}
+
+    def _render_packed_message(
+        self, question: str, labels: List[str], images: List[str]
+    ) -> Dict:
+        # Each image is preceded by its label, so answers can't be misattributed
+        content = [{"type": "text", "text": question}]
+        for label, image_source in zip(labels, images):
+            content.append({"type": "text", "text": f"{label}:"})
+            content.append(self._prepare_image_content(image_source))
+        return {"role": "user", "content": content}
+
+    def _make_request(
+        self, messages: List[Dict], max_response_tokens: Optional[int]
+    ) -> str:
+        """Make request to OpenAI."""
+        with track_call("openai_vision", self.model) as call:
+            response = self.client.chat.completions.create(
+                model=self.model, messages=messages, max_tokens=max_response_tokens
+            )
+            if response.usage:
+                call.prompt_tokens = response.usage.prompt_tokens
+                call.completion_tokens = response.usage.completion_tokens
+        return response.choices[0].message.content
 
     def ask(
         self,
@@ -80,27 +132,13 @@ class VisionOpenAIHandler(VisionModelHandler):
             max_response_tokens: Optional maximum number of tokens in the response (default: 300)
         """
         try:
-            if images:
-                # Prepare content with images
-                content = [{"type": "text", "text": question}]
-                for image_source in images:
-                    content.append(self._prepare_image_content(image_source))
-            else:
-                # Regular text question
-                content = question
-
-            messages = self.conversation_history + [
-                {"role": "user", "content": content}
-            ]
-
-            response = self.client.chat.completions.create(
-                model=self.model, messages=messages, max_tokens=max_response_tokens
-            )
+            user_message = self._image_message(question, images)
+            messages = self._render_messages(self.conversation_history + [user_message])
 
-            result = response.choices[0].message.content
+            result = self._send(messages, max_response_tokens)
 
-            # Update conversation history
-            self.conversation_history.append({"role": "user", "content": content})
+            # Update conversation history - images are kept by reference only
+            self.conversation_history.append(user_message)
             self.conversation_history.append({"role": "assistant", "content": result})
 
             if clear_history:
@@ -112,6 +150,54 @@ class VisionOpenAIHandler(VisionModelHandler):
             logger.error(f"Error in processing query: {str(e)}")
             raise
 
+    def ask_stream(
+        self,
+        question: str,
+        clear_history: bool = False,
+        images: Optional[List[str]] = None,
+        max_response_tokens: Optional[int] = 300,
+    ) -> Iterator[str]:
+        """
+        Same as ask, but yields the response as it is generated.
+
+        The full response is added to the conversation history once the stream
+        ends. Timing of the call is available in last_stream_stats afterwards.
+        """
+        user_message = self._image_message(question, images)
+        messages = self._render_messages(self.conversation_history + [user_message])
+        stats = StreamStats(model=self.model, backend="openai_vision")
+
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_response_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts = []
+        for chunk in stream:
+            if chunk.usage:
+                stats.prompt_tokens = chunk.usage.prompt_tokens
+                stats.completion_tokens = chunk.usage.completion_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                stats.mark_chunk()
+                parts.append(delta)
+                yield delta
+
+        stats.finish()
+        self.last_stream_stats = stats
+
+        self.conversation_history.append(user_message)
+        self.conversation_history.append(
+            {"role": "assistant", "content": "".join(parts)}
+        )
+
+        if clear_history:
+            self.clear_conversation()
+
 
 def full_complicated_pictures():
     try:
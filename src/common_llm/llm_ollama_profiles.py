@@ -0,0 +1,86 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+
+from src.common_llm.factory.client_pool import get_ollama_client
+from src.common_llm.llm_enums import LlamaModels
+
+
+@dataclass(frozen=True)
+class OllamaProfile:
+    """
+    Runtime settings passed to Ollama with every request of a model.
+
+    keep_alive: How long the model stays loaded after a request (e.g. "30m", -1 = forever)
+    num_ctx: Context window size - changing it forces a model reload
+    num_thread: CPU threads used for generation
+    num_predict: Maximum number of generated tokens
+    num_batch: Prompt processing batch size
+    """
+
+    keep_alive: Optional[Union[str, int]] = "30m"
+    num_ctx: Optional[int] = None
+    num_thread: Optional[int] = None
+    num_predict: Optional[int] = None
+    num_batch: Optional[int] = None
+
+    def to_options(self, temperature: Optional[float] = None) -> Dict[str, Any]:
+        options = {
+            "temperature": temperature,
+            "num_ctx": self.num_ctx,
+            "num_thread": self.num_thread,
+            "num_predict": self.num_predict,
+            "num_batch": self.num_batch,
+        }
+        return {key: value for key, value in options.items() if value is not None}
+
+
+DEFAULT_OLLAMA_PROFILE = OllamaProfile()
+
+# Large models take many seconds to load, keep them in memory longer
+OLLAMA_MODEL_PROFILES: Dict[str, OllamaProfile] = {
+    LlamaModels.GEMMA2_27B.value: OllamaProfile(keep_alive="60m", num_ctx=8192),
+    LlamaModels.GEMMA2_27B_INSTRUCT_Q4.value: OllamaProfile(
+        keep_alive="60m", num_ctx=8192
+    ),
+    LlamaModels.CODESTRAL_22B.value: OllamaProfile(keep_alive="60m", num_ctx=8192),
+    LlamaModels.DEEPSEEK_CODER_V2.value: OllamaProfile(keep_alive="60m", num_ctx=8192),
+    LlamaModels.QWEN2_5_14B.value: OllamaProfile(keep_alive="60m", num_ctx=8192),
+    LlamaModels.BIELIK_11B.value: OllamaProfile(keep_alive="60m", num_ctx=8192),
+    LlamaModels.GEMMA2_9B_INSTRUCT.value: OllamaProfile(num_ctx=8192),
+    LlamaModels.LLAMA3_1.value: OllamaProfile(num_ctx=8192),
+}
+
+
+def get_ollama_profile(model_name: str) -> OllamaProfile:
+    return OLLAMA_MODEL_PROFILES.get(model_name, DEFAULT_OLLAMA_PROFILE)
+
+
+def set_ollama_profile(model_name: str, **settings: Any) -> OllamaProfile:
+    """Override settings of a model profile, e.g. set_ollama_profile(model, num_ctx=16384)."""
+    profile = replace(get_ollama_profile(model_name), **settings)
+    OLLAMA_MODEL_PROFILES[model_name] = profile
+    return profile
+
+
+def warm_up_ollama_model(client, model_name: str, profile: OllamaProfile) -> None:
+    """Load a model into memory with the options later requests will use."""
+    logger.info(f"Warming up {model_name} (keep_alive={profile.keep_alive})")
+    # An empty prompt only loads the model, nothing is generated
+    client.generate(
+        model=model_name,
+        prompt="",
+        options=profile.to_options(),
+        keep_alive=profile.keep_alive,
+    )
+
+
+def warm_up_ollama_models(model_names: List[str], host: Optional[str] = None) -> None:
+    """Preload models at pipeline start, so the first request doesn't pay the load time."""
+    client = get_ollama_client(host)
+    for model_name in model_names:
+        try:
+            warm_up_ollama_model(client, model_name, get_ollama_profile(model_name))
+        except Exception as e:
+            logger.error(f"Failed to warm up {model_name}: {str(e)}")
@@ -0,0 +1,202 @@
+import atexit
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Protocol, Tuple
+
+from loguru import logger
+from tabulate import tabulate
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+@dataclass
+class CallMetrics:
+    backend: str
+    model: str
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+    cache_hit: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class MetricsSink(Protocol):
+    def record(self, call: CallMetrics) -> None: ...
+
+
+class Histogram:
+    def __init__(
+        self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, window: int = 10_000
+    ):
+        """Bucket counts of all values plus a window of recent ones for percentiles."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def bucket_counts(self) -> Dict[str, int]:
+        labels = [f"<={bound}s" for bound in self.buckets] + [f">{self.buckets[-1]}s"]
+        return dict(zip(labels, self.counts))
+
+
+class _ModelStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.calls = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_time = 0.0
+        self.errors: Dict[str, int] = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        In-process store of per-call metrics, aggregated per (backend, model).
+
+        Additional sinks (e.g. an exporter) can be attached with add_sink and
+        receive every recorded call as well.
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+        self._sinks: List[MetricsSink] = []
+        self.started_at = time.perf_counter()
+
+    def add_sink(self, sink: MetricsSink) -> None:
+        self._sinks.append(sink)
+
+    def record(self, call: CallMetrics) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((call.backend, call.model), _ModelStats())
+            stats.calls += 1
+            stats.total_time += call.latency
+            stats.retries += call.retries
+            stats.prompt_tokens += call.prompt_tokens or 0
+            stats.completion_tokens += call.completion_tokens or 0
+            if call.cache_hit:
+                stats.cache_hits += 1
+            if call.error:
+                stats.errors[call.error] = stats.errors.get(call.error, 0) + 1
+            else:
+                stats.latency.observe(call.latency)
+        for sink in self._sinks:
+            try:
+                sink.record(call)
+            except Exception as e:
+                logger.warning(f"Metrics sink failed: {str(e)}")
+
+    def histogram(self, backend: str, model: str) -> Optional[Histogram]:
+        stats = self._stats.get((backend, model))
+        return stats.latency if stats else None
+
+    def summary(self) -> List[Dict]:
+        """One row per (backend, model), sorted by total time spent."""
+        with self._lock:
+            rows = [
+                {
+                    "backend": backend,
+                    "model": model,
+                    "calls": stats.calls,
+                    "cache_hits": stats.cache_hits,
+                    "errors": sum(stats.errors.values()),
+                    "retries": stats.retries,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "total_time": round(stats.total_time, 3),
+                    "p50": stats.latency.percentile(50),
+                    "p95": stats.latency.percentile(95),
+                    "p99": stats.latency.percentile(99),
+                    "failures": ", ".join(
+                        f"{name}={count}" for name, count in stats.errors.items()
+                    ),
+                }
+                for (backend, model), stats in self._stats.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_time"], reverse=True)
+
+    def summary_table(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "No model calls recorded"
+        wall_time = time.perf_counter() - self.started_at
+        table = tabulate(rows, headers="keys", floatfmt=".3f")
+        return f"{table}\nWall-clock time of the run: {wall_time:.1f}s"
+
+    def log_summary(self) -> None:
+        logger.info(f"Model call summary:\n{self.summary_table()}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.perf_counter()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+def set_metrics_registry(registry: MetricsRegistry) -> None:
+    """Replace the process-wide registry, e.g. with a subclass exporting elsewhere."""
+    global _registry
+    _registry = registry
+
+
+def failure_class(error: BaseException) -> str:
+    """Name of the original error - handlers wrap provider errors in RuntimeError."""
+    original = error.__cause__ or error.__context__ or error
+    return type(original).__name__
+
+
+@contextmanager
+def track_call(backend: str, model: str) -> Iterator[CallMetrics]:
+    """
+    Time one model request and record it in the registry.
+
+    The block fills in tokens, retries and cache_hit on the yielded CallMetrics;
+    latency and the failure class are set here.
+    """
+    call = CallMetrics(backend=backend, model=model)
+    start_time = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        call.error = failure_class(e)
+        raise
+    finally:
+        call.latency = time.perf_counter() - start_time
+        get_metrics_registry().record(call)
+
+
+def log_metrics_summary_at_exit() -> None:
+    """Print the run summary when the pipeline finishes."""
+    atexit.register(lambda: get_metrics_registry().log_summary())
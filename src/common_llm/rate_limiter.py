@@ -0,0 +1,209 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from loguru import logger
+
+from src.common_llm.llm_enums import OpenAIModels
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    requests_per_minute: int
+    tokens_per_minute: int
+
+
+# Defaults of a usage tier 1 account - override with set_rate_limits for higher tiers
+DEFAULT_RATE_LIMITS = RateLimits(requests_per_minute=500, tokens_per_minute=30_000)
+
+MODEL_RATE_LIMITS: Dict[str, RateLimits] = {
+    OpenAIModels.GPT_35_TURBO.value: RateLimits(3_500, 200_000),
+    OpenAIModels.GPT_4o_MINI.value: RateLimits(500, 200_000),
+    OpenAIModels.GPT_4o_MINI_FT_s04e02.value: RateLimits(500, 200_000),
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI reset durations like "20ms", "1s" or "6m0s" to seconds."""
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def retry_after_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said so."""
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, retry_at.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    resets = [
+        parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(name)
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def backoff_with_jitter(base_delay: float, attempt: int) -> float:
+    """Exponential backoff with up to 50% random jitter, so clients don't retry in sync."""
+    delay = base_delay * (2**attempt)
+    return delay + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take amount from the bucket and return how long to wait before using it.
+
+        The balance may go negative - later callers then queue behind this one.
+        """
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_per_second
+
+    def limit_remaining(self, remaining: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+
+
+class RateLimiter:
+    def __init__(self, limits: RateLimits):
+        """Paces requests of one model to stay under its RPM and TPM limits."""
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(
+            limits.requests_per_minute, limits.requests_per_minute / 60
+        )
+        self._tokens = TokenBucket(
+            limits.tokens_per_minute, limits.tokens_per_minute / 60
+        )
+        self._blocked_until = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._requests.reserve(1, now),
+                self._tokens.reserve(tokens, now),
+                self._blocked_until - now,
+            )
+
+    def acquire(self, tokens: int) -> None:
+        """Block until a request of the given prompt size may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Charge the difference between the estimate and the tokens really used."""
+        with self._lock:
+            self._tokens.reserve(actual_tokens - estimated_tokens, time.monotonic())
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Align the buckets with the x-ratelimit-* state reported by the provider."""
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for bucket, name in (
+                (self._requests, "x-ratelimit-remaining-requests"),
+                (self._tokens, "x-ratelimit-remaining-tokens"),
+            ):
+                try:
+                    bucket.limit_remaining(float(headers[name]), now)
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests of the model, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def set_rate_limits(
+    model_name: str, requests_per_minute: int, tokens_per_minute: int
+) -> None:
+    limits = RateLimits(requests_per_minute, tokens_per_minute)
+    with _limiters_lock:
+        MODEL_RATE_LIMITS[model_name] = limits
+        _limiters[model_name] = RateLimiter(limits)
+
+
+def get_rate_limiter(model_name: str) -> RateLimiter:
+    """Return the limiter shared by all handlers of a model."""
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limits = MODEL_RATE_LIMITS.get(model_name, DEFAULT_RATE_LIMITS)
+            limiter = RateLimiter(limits)
+            _limiters[model_name] = limiter
+        return limiter
+
+
+def retry_delay_after_error(
+    limiter: RateLimiter, error: Exception, attempt: int, initial_retry_delay: float
+) -> float:
+    """
+    Decide how long to wait before retrying a failed request.
+
+    A 429 pauses the model's shared limiter (honouring Retry-After), so every
+    caller backs off together and the next acquire() does the waiting.
+    Other transient errors only delay the failing caller.
+    """
+    delay = backoff_with_jitter(initial_retry_delay, attempt)
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    retry_after = retry_after_from_headers(headers)
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, initial_retry_delay)
+
+    if getattr(error, "status_code", None) == 429:
+        limiter.pause(delay)
+        return 0.0
+    return delay
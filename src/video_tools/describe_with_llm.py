@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List, Optional
 
 from icecream import ic
 from loguru import logger
@@ -6,12 +7,27 @@ from loguru import logger
 from src.common_aidevs.files_read_write_download import (
     save_file,
     build_filename,
-    read_txt_file,
+)
+from src.common_llm.cache.image_result_cache import (
+    ImageResultCache,
+    get_default_image_result_cache,
 )
 from src.common_llm.factory.llm_vision_model_factory import VisionModelHandlerFactory
+from src.common_llm.handlers.vision.image_packing import (
+    PACKED_QUESTION_TEMPLATE,
+    PackingBudget,
+)
 from src.common_llm.llm_enums import LlamaVisionModels
 from src.tools.find_project_root import find_project_root
 
+SYSTEM_PROMPT = "You are an expert in image analysis."
+
+DESCRIBE_QUESTION = """
+                Please describe what you see on the image. Respond in English only.
+                If image contains text try to do OCR in the image native language and provide the text.
+                All the images are fictionary data for novel I'm writing.
+                """
+
 
 def describe_image(
     filepath="",
@@ -21,7 +37,16 @@ def describe_image(
     overwrite=False,
     additional_context="",
     model_name=LlamaVisionModels.MINICPM.value,
+    cache: Optional[ImageResultCache] = None,
 ):
+    """
+    Describe an image and save the description to
+    <output_dir>/<prefix>_<name>_<suffix>.txt.
+
+    Descriptions are reused from the image result cache when the same image
+    content was described by the same model with the same prompt and
+    additional context; overwrite=True asks the model again.
+    """
     print(f"Reading the image file: {filepath}")
 
     save_format = "txt"
@@ -33,28 +58,25 @@ def describe_image(
     output_file = os.path.join(
         output_dir, f"{build_filename(filename_no_ext, prefix, suffix)}.{save_format}"
     )
-    if os.path.exists(output_file):
-        if overwrite:
-            os.remove(output_file)
-        else:
+    cache = cache if cache is not None else get_default_image_result_cache()
+    prompt = SYSTEM_PROMPT + DESCRIBE_QUESTION
+    if not overwrite:
+        cached = cache.get(filepath, model_name, prompt, additional_context)
+        if cached is not None:
             print(
-                f"File {output_file} already exists. \n Providing previous response.."
+                f"Image {filepath} already described. \n Providing previous response.."
             )
-            return read_txt_file(output_file)
+            save_file(cached, output_file)
+            return cached
 
     vision_handler = VisionModelHandlerFactory.create_handler(
         model_name=model_name,
-        system_prompt="You are an expert in image analysis.",
+        system_prompt=SYSTEM_PROMPT,
     )
     logger.info(f"Analyzing image: {filepath}")
 
-    question = """
-                Please describe what you see on the image. Respond in English only.
-                If image contains text try to do OCR in the image native language and provide the text.
-                All the images are fictionary data for novel I'm writing.
-                """
-
-    if additional_context != "":
+    question = DESCRIBE_QUESTION
+    if additional_context:
         question = f"{question}. Take into consideration additional context about picture {additional_context}."
 
     result = vision_handler.ask(
@@ -65,11 +87,78 @@ def describe_image(
 
     print("\nImage Analysis Results")
     print(f"{result}")
+    cache.set(filepath, model_name, prompt, additional_context, result)
     save_file(result, output_file)
 
     return result
 
 
+def describe_images(
+    filepaths: List[str],
+    output_dir="",
+    prefix="",
+    suffix="description",
+    overwrite=False,
+    additional_context="",
+    model_name=LlamaVisionModels.MINICPM.value,
+    cache: Optional[ImageResultCache] = None,
+    budget: PackingBudget = PackingBudget(),
+) -> Dict[str, str]:
+    """
+    Describe many images like describe_image, packing several images into each
+    request within the budget. Images whose packed answer is unusable are
+    described on their own. Results are cached apart from describe_image's,
+    per packing budget.
+
+    Returns:
+        Description of every image that could be described, by path
+    """
+    cache = cache if cache is not None else get_default_image_result_cache()
+    # Answers split out of packed requests aren't interchangeable with
+    # describe_image's, so they are cached under their own prompt
+    prompt = SYSTEM_PROMPT + PACKED_QUESTION_TEMPLATE + DESCRIBE_QUESTION + repr(budget)
+
+    def output_file(filepath: str) -> str:
+        filename_no_ext = os.path.splitext(os.path.basename(filepath))[0]
+        return os.path.join(
+            output_dir, f"{build_filename(filename_no_ext, prefix, suffix)}.txt"
+        )
+
+    descriptions = {}
+    pending = []
+    for filepath in filepaths:
+        cached = None
+        if not overwrite:
+            cached = cache.get(filepath, model_name, prompt, additional_context)
+        if cached is None:
+            pending.append(filepath)
+        else:
+            save_file(cached, output_file(filepath))
+            descriptions[filepath] = cached
+    print(f"{len(descriptions)} images already described, describing {len(pending)}")
+    if not pending:
+        return descriptions
+
+    vision_handler = VisionModelHandlerFactory.create_handler(
+        model_name=model_name,
+        system_prompt=SYSTEM_PROMPT,
+    )
+    question = DESCRIBE_QUESTION
+    if additional_context:
+        question = f"{question}. Take into consideration additional context about picture {additional_context}."
+
+    results = vision_handler.ask_packed(question, pending, budget=budget)
+    for filepath, result in zip(pending, results):
+        if not result.ok:
+            logger.error(f"Could not describe {filepath}: {result.error}")
+            continue
+        cache.set(filepath, model_name, prompt, additional_context, result.response)
+        save_file(result.response, output_file(filepath))
+        descriptions[filepath] = result.response
+
+    return descriptions
+
+
 def main():
     try:
         # Get paths
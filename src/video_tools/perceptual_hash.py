@@ -0,0 +1,153 @@
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp")
+
+HASH_SIZE = 8
+# pHash looks at the low frequencies of a 32x32 DCT
+HIGHFREQ_FACTOR = 4
+
+# Bits (out of 64) two hashes may differ in and still count as the same picture
+DEFAULT_MAX_DISTANCE = 6
+
+# Set bits of every byte value, for Hamming distances of packed hashes
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(1)
+
+
+def find_images(
+    root_folder: str, extensions: Sequence[str] = IMAGE_EXTENSIONS
+) -> List[str]:
+    """All image files below root_folder, in a stable order."""
+    paths = []
+    for root, dirs, files in os.walk(root_folder):
+        for filename in files:
+            if filename.lower().endswith(tuple(extensions)):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+def load_grayscale(
+    image_paths: Sequence[str], size: int = HASH_SIZE * HIGHFREQ_FACTOR
+) -> Tuple[np.ndarray, List[str], List[int]]:
+    """
+    Load images as an (N, size, size) float32 array of grayscale pixels.
+
+    Returns the pixels, the paths that could be read and their pixel counts;
+    unreadable files are skipped.
+    """
+    pixels, loaded, areas = [], [], []
+    for path in image_paths:
+        try:
+            with Image.open(path) as image:
+                areas.append(image.width * image.height)
+                small = image.convert("L").resize(
+                    (size, size), Image.Resampling.LANCZOS
+                )
+                pixels.append(np.asarray(small, dtype=np.float32))
+                loaded.append(path)
+        except Exception as e:
+            logger.warning(f"Skipping {path} for deduplication: {str(e)}")
+    if not pixels:
+        return np.zeros((0, size, size), dtype=np.float32), [], []
+    return np.stack(pixels), loaded, areas
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix, so D @ X @ D.T is the 2-D DCT of X."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+def average_hashes(pixels: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """aHash of every image: block means above the image mean, (N, bits) bool."""
+    n, size, _ = pixels.shape
+    block = size // hash_size
+    means = pixels.reshape(n, hash_size, block, hash_size, block).mean(axis=(2, 4))
+    return (means > means.mean(axis=(1, 2), keepdims=True)).reshape(n, -1)
+
+
+def perceptual_hashes(pixels: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """pHash of every image: low DCT frequencies above their median, (N, bits) bool."""
+    n, size, _ = pixels.shape
+    dct = _dct_matrix(size)
+    coefficients = np.einsum("ij,njk,lk->nil", dct, pixels, dct)
+    low = coefficients[:, :hash_size, :hash_size].reshape(n, -1)
+    return low > np.median(low, axis=1, keepdims=True)
+
+
+def hamming_distances(hashes: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances of (N, bits) bool hashes as an (N, N) matrix."""
+    packed = np.packbits(hashes, axis=1)
+    return _POPCOUNT[packed[:, None, :] ^ packed[None, :, :]].sum(axis=2)
+
+
+def group_near_duplicates(
+    image_paths: Sequence[str], max_distance: int = DEFAULT_MAX_DISTANCE
+) -> List[List[str]]:
+    """
+    Group images showing the same picture, e.g. at other sizes or encodings.
+
+    Two images are near-duplicates when both their aHash and pHash differ in at
+    most max_distance bits; groups are the connected components of that
+    relation. Each group lists its largest image first - the one worth sending
+    to a model. Images that could not be read are left out.
+    """
+    pixels, paths, areas = load_grayscale(image_paths)
+    if not paths:
+        return []
+
+    similar = (hamming_distances(average_hashes(pixels)) <= max_distance) & (
+        hamming_distances(perceptual_hashes(pixels)) <= max_distance
+    )
+
+    # Union-find over the similar pairs
+    parent = list(range(len(paths)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for first, second in zip(*np.nonzero(np.triu(similar, k=1))):
+        parent[find(first)] = find(second)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(paths)):
+        groups.setdefault(find(index), []).append(index)
+
+    return [
+        [paths[index] for index in sorted(members, key=lambda i: (-areas[i], paths[i]))]
+        for members in groups.values()
+    ]
+
+
+def map_to_representatives(groups: List[List[str]]) -> Dict[str, str]:
+    """Map every image to the image describing its group."""
+    return {path: group[0] for group in groups for path in group}
+
+
+def find_duplicate_representatives(
+    root_folder: str,
+    extensions: Sequence[str] = IMAGE_EXTENSIONS,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+) -> Dict[str, str]:
+    """
+    Find near-duplicate images below root_folder.
+
+    Returns a mapping of every image path to the representative of its group,
+    so work on a picture can be done once and reused for its copies.
+    """
+    groups = group_near_duplicates(find_images(root_folder, extensions), max_distance)
+    duplicates = sum(len(group) - 1 for group in groups)
+    logger.info(
+        f"Found {duplicates} near-duplicate images in {len(groups)} groups "
+        f"under {root_folder}"
+    )
+    return map_to_representatives(groups)
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from loguru import logger
 
@@ -7,10 +8,27 @@ from src.common_aidevs.files_read_write_download import (
     save_file,
     build_filename,
 )
+from src.common_llm.cache.image_result_cache import (
+    ImageResultCache,
+    get_default_image_result_cache,
+)
 from src.common_llm.factory.llm_vision_model_factory import VisionModelHandlerFactory
 from src.common_llm.llm_enums import LlamaVisionModels
 from src.tools.perform_ocr import ImageOCR
 
+OCR_LANGUAGE = "pl"
+# Cache entries of plain OCR are keyed by the engine instead of a model
+OCR_ENGINE = f"paddleocr:{OCR_LANGUAGE}"
+
+SYSTEM_PROMPT = "You are an expert in image analysis."
+
+OCR_CORRECTION_PROMPT = """Please do OCR on the image. 
+                    Image contains polish text. 
+                    I was able to read it partially please correct any mistakes. 
+                    Here is my text: {ocr_text}
+                    Return text ONLY
+                    """
+
 
 def ocr_image(
     filepath="",
@@ -20,7 +38,17 @@ def ocr_image(
     overwrite_ocr=False,
     use_llm=True,
     overwrite_llm=False,
+    model_name=LlamaVisionModels.MINICPM.value,
+    cache: Optional[ImageResultCache] = None,
 ):
+    """
+    OCR an image, optionally letting a vision model correct the OCR text.
+
+    Plain OCR is saved to <prefix>_<name>_pure_ocr.txt and the final text to
+    <prefix>_<name>_<suffix>.txt. Both steps are reused from the image result
+    cache when the image content, engine/model, prompt and OCR text are
+    unchanged; overwrite_ocr / overwrite_llm redo them.
+    """
     print(f"Reading the image file: {filepath}")
 
     save_format = "txt"
@@ -32,48 +60,42 @@ def ocr_image(
         output_dir,
         f"{build_filename(filename_no_ext, prefix, 'pure_ocr')}.{save_format}",
     )
-
-    if os.path.exists(pure_ocr):
-        if overwrite_ocr:
-            os.remove(pure_ocr)
-            ocr_processor = ImageOCR(filepath, language="pl", use_gpu=True)
-            ocr_processor.process_and_save_formatted(output_filename=pure_ocr)
-        else:
-            if not use_llm:
-                return read_txt_file(pure_ocr)
-
     output_file = os.path.join(
         output_dir, f"{build_filename(filename_no_ext, prefix, suffix)}.{save_format}"
     )
-    if use_llm:
-        if os.path.exists(output_file):
-            if overwrite_llm:
-                os.remove(output_file)
-            else:
-                return read_txt_file(output_file)
-        # Create handler for OpenAI model
+    cache = cache if cache is not None else get_default_image_result_cache()
+
+    ocr_text = None if overwrite_ocr else cache.get(filepath, OCR_ENGINE, "")
+    if ocr_text is None:
+        ocr_processor = ImageOCR(filepath, language=OCR_LANGUAGE, use_gpu=True)
+        ocr_processor.process_and_save_formatted(output_filename=pure_ocr)
         ocr_text = read_txt_file(pure_ocr)
-        vision_handler = VisionModelHandlerFactory.create_handler(
-            # model_name=LlamaVisionModels.LLAVA_13B.value, # don't use it
-            # model_name=LlamaVisionModels.LLAVA_34B.value, # same wasn't able to recognize text
-            model_name=LlamaVisionModels.MINICPM.value,
-            system_prompt="You are an expert in image analysis.",
-        )
-        logger.info(f"Analyzing image: {filepath}")
-        question = f"""Please do OCR on the image. 
-                    Image contains polish text. 
-                    I was able to read it partially please correct any mistakes. 
-                    Here is my text: {ocr_text}
-                    Return text ONLY
-                    """
+        cache.set(filepath, OCR_ENGINE, "", None, ocr_text)
+    else:
+        save_file(ocr_text, pure_ocr)
 
-        result = vision_handler.ask(
-            # question="Please do OCR of the image. It contains polish text, make sure you properly read it",
-            question=question,
-            images=[filepath],
-        )
+    if use_llm:
+        # The OCR text is the context the correction depends on
+        prompt = SYSTEM_PROMPT + OCR_CORRECTION_PROMPT
+        result = None
+        if not overwrite_llm:
+            result = cache.get(filepath, model_name, prompt, ocr_text)
+        if result is None:
+            vision_handler = VisionModelHandlerFactory.create_handler(
+                # model_name=LlamaVisionModels.LLAVA_13B.value, # don't use it
+                # model_name=LlamaVisionModels.LLAVA_34B.value, # same wasn't able to recognize text
+                model_name=model_name,
+                system_prompt=SYSTEM_PROMPT,
+            )
+            logger.info(f"Analyzing image: {filepath}")
+            result = vision_handler.ask(
+                # question="Please do OCR of the image. It contains polish text, make sure you properly read it",
+                question=OCR_CORRECTION_PROMPT.format(ocr_text=ocr_text),
+                images=[filepath],
+            )
+            cache.set(filepath, model_name, prompt, ocr_text, result)
     else:
-        result = read_txt_file(pure_ocr)
+        result = ocr_text
 
     print("\nImage Analysis Results:")
 
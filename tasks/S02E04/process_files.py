@@ -9,6 +9,7 @@ from src.common_aidevs.files_read_write_download import (
     read_txt_file,
     build_filename,
 )
+from src.common_llm.cache.semantic_cache import SemanticCache
 from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
 from src.common_llm.llm_enums import OpenAIModels
 from src.tools.json_extractor_from_llm_response import (
@@ -16,6 +17,9 @@ from src.tools.json_extractor_from_llm_response import (
 )
 from src.video_tools.use_ocr_with_llm import ocr_image
 
+# Many reports are near-identical (e.g. "entry deleted") - classify them once
+semantic_cache = SemanticCache(similarity_threshold=0.97)
+
 
 def process_files_in_folder(folder_path):
     output_path = os.path.join(folder_path, "")
@@ -160,6 +164,7 @@ def ask_question(filename, text):
             # model_name=OpenAIModels.GPT_4o_MINI.value,
             model_name=OpenAIModels.GPT_4o.value,
             system_prompt=categorization_system_prompt,
+            semantic_cache=semantic_cache,
         )
 
         llm_response = llm_handler.ask(
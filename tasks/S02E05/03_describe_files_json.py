@@ -3,10 +3,14 @@ import json
 from icecream import ic
 
 from src.audio_tools.convert_mp3_using_whisper import convert_mp3_to_txt
+from src.common_aidevs.files_read_write_download import save_file
 from src.markdown_tools.extract_context_around_embedded_file import (
     extract_file_paths_and_paragraphs,
 )
 from src.video_tools.describe_with_llm import describe_image
+from src.video_tools.perceptual_hash import find_duplicate_representatives
+
+IMAGE_EXTENSIONS = (".png",)
 
 
 def read_description_file(description_path):
@@ -18,8 +22,46 @@ def read_description_file(description_path):
         return None
 
 
+def relative_to(path, root_folder):
+    return os.path.relpath(path, root_folder).replace("\\", "/")
+
+
+def group_context(representative, representatives, root_folder, context):
+    """
+    Context of a near-duplicate group: the representative's own or, when the
+    document only mentions a copy, that of the first such copy by path.
+    """
+    copies = sorted(p for p, r in representatives.items() if r == representative)
+    for path in [representative] + copies:
+        found = context.get(relative_to(path, root_folder))
+        if found:
+            return found
+    return None
+
+
+def describe_representative(image_path, additional_context):
+    output_dir = os.path.dirname(image_path)
+    filename = os.path.basename(image_path)
+    extension = os.path.splitext(filename)[1].replace(".", "")
+    suffix = f"{extension}_description"
+
+    describe_image(
+        image_path,
+        output_dir=output_dir,
+        suffix=suffix,
+        additional_context=additional_context,
+        overwrite=False,
+    )
+    description_filename = f"{os.path.splitext(filename)[0]}_{suffix}.txt"
+    return read_description_file(os.path.join(output_dir, description_filename))
+
+
 def process_files_recursively(root_folder, context):
     results = {}
+    # The same picture often appears several times at other sizes or encodings
+    representatives = find_duplicate_representatives(root_folder, IMAGE_EXTENSIONS)
+    # Description of every representative, made once for its whole group
+    descriptions = {}
 
     # Walk through all subdirectories
     for root, dirs, files in os.walk(root_folder):
@@ -53,17 +95,21 @@ def process_files_recursively(root_folder, context):
                     description = read_description_file(description_path)
                     if description is not None:
                         results[relative_path] = description
-                elif filename.endswith(".png"):
-                    additional_context = context.get(relative_path)
-                    describe_image(
-                        file_path,
-                        output_dir=output_dir,
-                        suffix=suffix,
-                        additional_context=additional_context,
-                        overwrite=False,
-                    )
-                    description = read_description_file(description_path)
+                elif filename.endswith(IMAGE_EXTENSIONS):
+                    # Near-duplicates are described once, through the group's
+                    # largest image, and get a copy of its description
+                    representative = representatives.get(file_path, file_path)
+                    if representative not in descriptions:
+                        descriptions[representative] = describe_representative(
+                            representative,
+                            group_context(
+                                representative, representatives, root_folder, context
+                            ),
+                        )
+                    description = descriptions[representative]
                     if description is not None:
+                        if representative != file_path:
+                            save_file(description, description_path)
                         results[relative_path] = description
 
             except Exception as e:
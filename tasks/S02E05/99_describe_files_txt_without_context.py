@@ -3,7 +3,7 @@ import os
 from icecream import ic
 
 from src.audio_tools.convert_mp3_using_whisper import convert_mp3_to_txt
-from src.video_tools.describe_with_llm import describe_image
+from src.video_tools.describe_with_llm import describe_images
 
 # TODO: Convert all that to json that will describe all file
 # then search data in json instead of creating txt file
@@ -11,6 +11,8 @@ from src.video_tools.describe_with_llm import describe_image
 
 def process_files_in_folder(folder_path):
     output_path = os.path.join(folder_path, "")
+    # Images are described together at the end, several per request
+    images = []
 
     for filename in os.listdir(folder_path):
         # Skip files containing "transcribe" or "ocr"
@@ -34,7 +36,9 @@ def process_files_in_folder(folder_path):
                 file_path=file_path, output_dir=output_path, suffix=full_suffix
             )
         elif filename.endswith(".png"):
-            describe_image(file_path, output_dir=output_path, suffix=full_suffix)
+            images.append(file_path)
+
+    describe_images(images, output_dir=output_path, suffix="png_description")
 
 
 def main():
@@ -9,12 +9,16 @@ from src.common_aidevs.files_read_write_download import (
     read_txt_file,
     build_filename,
 )
+from src.common_llm.batch.batch_job import BatchJob
 from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
 from src.common_llm.llm_enums import OpenAIModels
 from src.tools.json_extractor_from_llm_response import (
     extract_json_from_wrapped_response,
 )
 
+# Batch API is cheaper for a full re-run, but results may take minutes to hours
+USE_BATCH_API = False
+
 
 def process_files_in_folder(folder_path, context):
     # output_path = os.path.join(folder_path, "")
@@ -41,14 +45,9 @@ def process_files_in_folder(folder_path, context):
     return json.dumps(result_data, indent=2)
 
 
-def ask_question(text: str = "", filename: str = "", data_context: str = ""):
-    print(f"Question about the text file: {filename}")
-    filename = os.path.basename(filename)
-    try:
-        print(f"\n\n-------------\nAnalysing text:\n\n {text}")
-
-        metadata_system_prompt = (
-            f"""
+def build_metadata_system_prompt(data_context: str) -> str:
+    return (
+        f"""
         1. Your task is to prepare metadata (tags) for provided data in json format. The **context*  is enclosed in `<context></context>` tags. 
         2. Think step-by-step about the content to make sure you have all the information.
         3. If the context mentions about technology or programming, include it as a keyword (e.g., "JavaScript", "Python")
@@ -67,14 +66,14 @@ def ask_question(text: str = "", filename: str = "", data_context: str = ""):
         Return JSON data ONLY!
         
         """
-            "Expected output:\n"
-            '{"filename processed" : "metadata sample one, metadata sample two, metadata sample three, ..."}\n'
-            "Sample input:\n"
-            "<document_name>grocery_list.txt</document_name>\n"
-            "<document_content>On drive to home please buy eggs, apples, oranges. Remember about it.</document_content>\n"
-            "Sample output:\n"
-            '{"grocery_list.txt" : "grocery, list, eggs, apples, oranges, memory, drive, home"}\n'
-            """\n### Example Input:
+        "Expected output:\n"
+        '{"filename processed" : "metadata sample one, metadata sample two, metadata sample three, ..."}\n'
+        "Sample input:\n"
+        "<document_name>grocery_list.txt</document_name>\n"
+        "<document_content>On drive to home please buy eggs, apples, oranges. Remember about it.</document_content>\n"
+        "Sample output:\n"
+        '{"grocery_list.txt" : "grocery, list, eggs, apples, oranges, memory, drive, home"}\n'
+        """\n### Example Input:
         <context>Jan Nowak pracował jako nauczyciel języka polskiego, przez wiele lat prowadząc zajęcia w Szkole Podstawowej nr 9 w Kielcach.
         Ma 50 lat.His hobby is Scala and JavaScript programming.</context>
         \n
@@ -84,11 +83,61 @@ def ask_question(text: str = "", filename: str = "", data_context: str = ""):
         \n### Example Output:
         {'report_01_09_2024.txt' : 'Jan Nowak, nauczyciel, Kielce, szkoła podstawowa, policja, zatrzymanie, Scala, JavaScript, sektor D'}
         """
-            f"""<context>
+        f"""<context>
         {data_context}
         </context>
         """
-        )
+    )
+
+
+def build_tags_question(filename: str, text: str) -> str:
+    return (
+        f"What should be document tags?, document: "
+        f"<document_name>{filename}</document_name> "
+        f"<document_content>{text}</document_content>"
+    )
+
+
+def process_files_with_batch(folder_path, context):
+    """Same as process_files_in_folder, but tags all reports in one Batch API job."""
+    job = BatchJob(
+        model_name=OpenAIModels.GPT_4o_MINI.value,
+        system_prompt=build_metadata_system_prompt(context),
+    )
+    for filename in os.listdir(folder_path):
+        if "transcribe" in filename or "ocr" in filename or "facts" in filename:
+            continue
+        if filename.endswith(".txt"):
+            text = read_txt_file(os.path.join(folder_path, filename))
+            job.add(build_tags_question(filename, text), custom_id=filename)
+
+    result_data = {}
+    # Results come back in the order the reports were added
+    for request, result in zip(job.requests, job.run()):
+        if not result.ok:
+            print(f"Tagging {request.custom_id} failed: {result.error}")
+            continue
+        # One malformed answer must not cost the tags of all other reports
+        try:
+            tags = extract_json_from_wrapped_response(result.response)
+        except ValueError as e:
+            print(f"Tagging {request.custom_id} returned no valid JSON: {str(e)}")
+            continue
+        if not isinstance(tags, dict):
+            print(f"Tagging {request.custom_id} returned {type(tags).__name__}")
+            continue
+        result_data.update(tags)
+
+    return json.dumps(result_data, indent=2)
+
+
+def ask_question(text: str = "", filename: str = "", data_context: str = ""):
+    print(f"Question about the text file: {filename}")
+    filename = os.path.basename(filename)
+    try:
+        print(f"\n\n-------------\nAnalysing text:\n\n {text}")
+
+        metadata_system_prompt = build_metadata_system_prompt(data_context)
         print(f"\n{metadata_system_prompt}\n\n")
         # Create handler for Llama model
         llm_handler = ModelHandlerFactory.create_handler(
@@ -98,11 +147,7 @@ def ask_question(text: str = "", filename: str = "", data_context: str = ""):
             system_prompt=metadata_system_prompt,
         )
 
-        question = (
-            f"What should be document tags?, document: "
-            f"<document_name>{filename}</document_name> "
-            f"<document_content>{text}</document_content>"
-        )
+        question = build_tags_question(filename, text)
 
         print(f"\n\nquestion: \n {question}")
 
@@ -126,7 +171,10 @@ def main():
                 content = infile.read()
 
         reports_folder = os.path.join(base_path, "pliki_z_fabryki")
-        final_result = process_files_in_folder(reports_folder, content)
+        if USE_BATCH_API:
+            final_result = process_files_with_batch(reports_folder, content)
+        else:
+            final_result = process_files_in_folder(reports_folder, content)
 
         final_result_file = os.path.join(
             base_path, f"{build_filename('final_result_file', '', 'llm')}.json"
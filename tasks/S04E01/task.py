@@ -12,6 +12,7 @@ from src.common_aidevs.files_read_write_download import (
     get_filename_from_url,
 )
 from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
+from src.common_llm.handlers.cascade_handler import pattern_key, pattern_validator
 from src.common_llm.llm_enums import LlamaModels, LlamaVisionModels, OpenAIVisionModels
 from src.video_tools.describe_with_llm import describe_image
 
@@ -167,6 +168,9 @@ def describe_barbara_images(images_path, img_file):
     return described
 
 
+ACTION_PATTERN = r"<action>(REPAIR|DARKEN|BRIGHTEN|NONE)</action>"
+
+
 def return_tool_based_on_description(described):
     question_system_prompt = (
         "Your task is to categorize tool that should be used to fix an image."
@@ -187,13 +191,18 @@ def return_tool_based_on_description(described):
         "Description: The image is showing ancient city with visible details of the landscape, no people are visible on the picture. No action is needed to improve picture."
         "<action>NONE</action>"
     )
-    llm_handler = ModelHandlerFactory.create_handler(
-        # model_name=OpenAIModels.GPT_35_TURBO.value,
-        # model_name=LlamaModels.LLAMA3_1.value,
-        model_name=LlamaModels.GEMMA2_9B_INSTRUCT.value,
-        # model_name=OpenAIModels.GPT_4o_MINI.value,
-        # model_name=OpenAIModels.GPT_4o.value,
+    # The small model answers most descriptions, unclear ones go to the larger one
+    llm_handler = ModelHandlerFactory.create_cascade_handler(
+        model_names=[
+            LlamaModels.LLAMA3_2_1b.value,
+            LlamaModels.GEMMA2_9B_INSTRUCT.value,
+            # OpenAIModels.GPT_4o_MINI.value,
+        ],
         system_prompt=question_system_prompt,
+        validator=pattern_validator(ACTION_PATTERN),
+        # Samples reason differently - they only need to agree on the action
+        consistency_samples=3,
+        answer_key=pattern_key(ACTION_PATTERN),
     )
     llm_response = llm_handler.ask(
         f"Based on context:{described} Answer what is on the picture"
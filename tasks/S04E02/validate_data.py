@@ -12,31 +12,36 @@ def read_file_lines(file_path):
         return [line.strip() for line in file.readlines()]
 
 
-def validate_data(data):
+def create_validation_handler():
     question_system_prompt = "Classify data"
-    llm_handler = ModelHandlerFactory.create_handler(
+    return ModelHandlerFactory.create_handler(
         model_name=OpenAIModels.GPT_4o_MINI_FT_s04e02.value,
         system_prompt=question_system_prompt,
     )
-    llm_response = llm_handler.ask(data)
-    return llm_response
 
 
 def process_dataset():
     # Read data from files
     correct_data = read_file_lines(verify)
     # Prepare verification data
-    valid_data = []
+    identifiers = []
+    samples = []
     for line in correct_data:
         split_result = line.split("=")
         # Access first part (before =)
-        left_side = split_result[0]  # returns '01'
+        identifiers.append(split_result[0])  # returns '01'
 
         # Access second part (after =)
-        right_side = split_result[1]
-        response = validate_data(right_side)
-        if response == "1":
-            valid_data.append(left_side)
+        samples.append(split_result[1])
+
+    results = create_validation_handler().ask_many(samples, concurrency=8)
+
+    valid_data = []
+    for identifier, result in zip(identifiers, results):
+        if not result.ok:
+            print(f"Validation of {identifier} failed: {result.error}")
+        elif result.response == "1":
+            valid_data.append(identifier)
 
     return valid_data
 
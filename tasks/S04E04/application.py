@@ -1,10 +1,7 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
 from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
 from src.common_llm.llm_enums import LlamaModels
-from src.tools.json_extractor_from_llm_response import (
-    extract_json_from_wrapped_response,
-)
 
 app = Flask(__name__)
 
@@ -74,9 +71,22 @@ Incorrect Response: {"thinking": "samochód",
 """
 
 
-def get_field_description(instruction):
-    llm_handler = ModelHandlerFactory.create_handler(
-        model_name=LlamaModels.GEMMA2_27B_INSTRUCT_Q4.value,
+MODEL_NAME = LlamaModels.GEMMA2_27B_INSTRUCT_Q4.value
+
+FIELD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "thinking": {"type": "string"},
+        "description": {"type": "string"},
+    },
+    "required": ["thinking", "description"],
+    "additionalProperties": False,
+}
+
+
+def create_field_handler():
+    return ModelHandlerFactory.create_handler(
+        model_name=MODEL_NAME,
         # model_name=LlamaModels.DEEPSEEK_CODER_V2.value,
         # model_name=LlamaModels.LLAMA3_1.value,
         # model_name=LlamaModels.LLAMA3_2_3b.value,
@@ -85,7 +95,10 @@ def get_field_description(instruction):
         system_prompt=SYSTEM_PROMPT,
         temperature=0.7,
     )
-    return llm_handler.ask(f"Bądź zwięzły: {instruction}")
+
+
+def get_field_description(instruction):
+    return create_field_handler().ask_json(f"Bądź zwięzły: {instruction}", FIELD_SCHEMA)
 
 
 @app.route("/", methods=["GET"])
@@ -117,13 +130,23 @@ def drone_location():
 
     instruction = data["instruction"]
     print(f"instruction {instruction}")
-    llm_response = get_field_description(instruction)
-    print(f"llm_response {llm_response}")
-    response_json = extract_json_from_wrapped_response(llm_response)
+    response_json = get_field_description(instruction)
     print(f"field_description {response_json}")
 
     return jsonify({"description": response_json["description"].strip()})
 
 
+@app.route("/drone_location_stream", methods=["POST"])
+def drone_location_stream():
+    data = request.get_json()
+    if not data or "instruction" not in data:
+        return jsonify({"error": "Missing instruction"}), 400
+
+    llm_handler = create_field_handler()
+    stream = llm_handler.ask_stream(f"Bądź zwięzły: {data['instruction']}")
+    return Response(stream_with_context(stream), mimetype="text/plain")
+
+
 if __name__ == "__main__":
+    ModelHandlerFactory.warm_up([MODEL_NAME])
     app.run(host="0.0.0.0", port=5123)
@@ -6,9 +6,7 @@ from src.common_aidevs.files_read_write_download import read_file
 # Create handler for Llama model
 from src.common_llm.factory.llm_model_factory import ModelHandlerFactory
 from src.common_llm.llm_enums import OpenAIModels
-from src.tools.json_extractor_from_llm_response import (
-    extract_json_from_wrapped_response,
-)
+from src.common_llm.metrics import get_metrics_registry
 
 
 question_system_prompt = """ 
@@ -47,15 +45,6 @@ question_system_prompt = """
                         """
 
 
-def process_single_question(question_number, question_text, context, llm_handler):
-    prompt = f"""Based on context: {context}
-    Please answer this specific question: {question_text}"""
-
-    llm_response = llm_handler.ask(prompt)
-    json_response = extract_json_from_wrapped_response(llm_response)
-    return {question_number: json_response.get(question_number, "")}
-
-
 def main():
     base_path = os.getcwd()
     final_md_path = os.path.join(base_path, "output", "fixed_output.md")
@@ -76,15 +65,11 @@ def main():
         system_prompt=question_system_prompt,
     )
 
-    # Process questions and collect responses
-    all_responses = {}
-    for question_number, question_text in questions_json.items():
-        response = process_single_question(
-            question_number, question_text, context, llm_handler
-        )
-        all_responses.update(response)
+    # Answer all questions over the shared document in as few calls as fit
+    all_responses = llm_handler.ask_with_context(context, questions_json)
+    for question_number, response in all_responses.items():
         print(
-            f"Processed question {question_number} question_text: {question_text} response: {response} "
+            f"Processed question {question_number} question_text: {questions_json[question_number]} response: {response} "
         )
 
     # Save final response
@@ -97,6 +82,8 @@ def main():
         loaded_responses = json.load(f)
         print(f"\nFinal responses: {loaded_responses}")
 
+    get_metrics_registry().log_summary()
+
 
 if __name__ == "__main__":
     main()
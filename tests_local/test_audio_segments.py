@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+from src.common_llm.handlers.sound.audio_segments import (  # noqa: E402
+    SAMPLE_RATE,
+    segment_bounds,
+    stitch_segments,
+)
+
+
+def test_short_recording_is_one_segment():
+    assert segment_bounds(5 * SAMPLE_RATE, 30, 2) == [
+        (0, 5 * SAMPLE_RATE, 0, 5 * SAMPLE_RATE)
+    ]
+
+
+def test_segments_overlap_and_own_every_sample_once():
+    num_samples = 65 * SAMPLE_RATE
+    bounds = segment_bounds(num_samples, 30, 2)
+
+    assert [(start, end) for start, end, _, _ in bounds] == [
+        (0, 30 * SAMPLE_RATE),
+        (28 * SAMPLE_RATE, 58 * SAMPLE_RATE),
+        (56 * SAMPLE_RATE, 65 * SAMPLE_RATE),
+    ]
+    # Owned ranges meet in the middle of every overlap and cover everything
+    owned = [(own_start, own_end) for _, _, own_start, own_end in bounds]
+    assert owned == [
+        (0, 29 * SAMPLE_RATE),
+        (29 * SAMPLE_RATE, 57 * SAMPLE_RATE),
+        (57 * SAMPLE_RATE, num_samples),
+    ]
+
+
+def test_overlap_is_capped_at_half_a_segment():
+    bounds = segment_bounds(40 * SAMPLE_RATE, 10, 30)
+    starts = [start for start, _, _, _ in bounds]
+    assert starts[1] - starts[0] == 5 * SAMPLE_RATE
+
+
+@pytest.mark.parametrize("segment_seconds", [0, -1])
+def test_non_positive_segment_length_raises(segment_seconds):
+    with pytest.raises(ValueError):
+        segment_bounds(SAMPLE_RATE, segment_seconds, 0)
+
+
+def segment(start, end, text, words=None):
+    result = {"id": 0, "start": start, "end": end, "text": text}
+    if words is not None:
+        result["words"] = words
+    return result
+
+
+def test_stitched_segments_are_shifted_and_deduplicated():
+    bounds = segment_bounds(50 * SAMPLE_RATE, 30, 4)
+    # The second part starts at 26s and the parts split the overlap at 28s.
+    # Both hear "early" (middle 27s) and "late" (middle 29s).
+    results = [
+        {
+            "segments": [
+                segment(0, 10, "first"),
+                segment(26, 28, "early in first part"),
+                segment(28, 30, "late in first part"),
+            ]
+        },
+        {
+            "segments": [
+                segment(0, 2, "early in second part"),
+                segment(2, 4, "late in second part"),
+                segment(5, 8, "second", words=[{"word": "x", "start": 5, "end": 8}]),
+            ]
+        },
+    ]
+
+    stitched = stitch_segments(results, bounds)
+
+    assert [s["text"] for s in stitched] == [
+        "first",
+        "early in first part",
+        "late in second part",
+        "second",
+    ]
+    assert [s["id"] for s in stitched] == [0, 1, 2, 3]
+    # Segments of the second part are moved by its 26s offset, words included
+    assert (stitched[2]["start"], stitched[2]["end"]) == (28, 30)
+    assert (stitched[3]["start"], stitched[3]["end"]) == (31, 34)
+    assert stitched[3]["words"][0]["start"] == 31
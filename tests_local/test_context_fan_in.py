@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.common_llm.handlers import context_fan_in
+from src.common_llm.handlers.context_fan_in import (
+    build_questions_message,
+    pack_questions,
+)
+
+
+class WordEncoding:
+    """One token per word - keeps the test offline and the numbers readable."""
+
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(context_fan_in, "_get_encoding", lambda model: WordEncoding())
+    monkeypatch.setattr(
+        context_fan_in,
+        "count_messages_tokens",
+        lambda messages, model: sum(len(m["content"].split()) for m in messages),
+    )
+
+
+def make_handler(num_ctx):
+    return SimpleNamespace(
+        model="local-model", profile=SimpleNamespace(num_ctx=num_ctx)
+    )
+
+
+def tokens(questions, answer_tokens):
+    content = build_questions_message(questions)["content"]
+    return len(content.split()) + answer_tokens * len(questions)
+
+
+QUESTIONS = {f"q{i}": f"What happened in sector {i}?" for i in range(6)}
+PREFIX = [
+    {
+        "role": "user",
+        "content": "Context: ten words of context about all the factory sectors.",
+    }
+]
+
+
+def test_everything_fits_in_one_pack():
+    handler = make_handler(tokens(QUESTIONS, 10) + 10)
+    assert pack_questions(handler, PREFIX, QUESTIONS, 10) == [QUESTIONS]
+
+
+def test_packs_respect_the_budget_and_keep_all_questions():
+    two = dict(list(QUESTIONS.items())[:2])
+    handler = make_handler(tokens(two, 10) + 10)
+
+    packs = pack_questions(handler, PREFIX, QUESTIONS, 10)
+
+    assert [list(pack) for pack in packs] == [["q0", "q1"], ["q2", "q3"], ["q4", "q5"]]
+    for pack in packs:
+        assert tokens(pack, 10) + 10 <= handler.profile.num_ctx
+
+
+def test_answer_room_counts_against_the_budget():
+    handler = make_handler(tokens(QUESTIONS, 10) + 10)
+    assert len(pack_questions(handler, PREFIX, QUESTIONS, 50)) > 1
+
+
+def test_oversized_first_question_raises():
+    handler = make_handler(tokens({"q0": QUESTIONS["q0"]}, 10))
+    with pytest.raises(ValueError, match="q0"):
+        pack_questions(handler, PREFIX, QUESTIONS, 10)
+
+
+def test_oversized_later_question_raises():
+    questions = {**QUESTIONS, "long": " ".join(["word"] * 200)}
+    handler = make_handler(tokens(QUESTIONS, 10) + 10)
+    with pytest.raises(ValueError, match="long"):
+        pack_questions(handler, PREFIX, questions, 10)
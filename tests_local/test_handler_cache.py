@@ -0,0 +1,31 @@
+import os
+from types import SimpleNamespace
+
+from src.common_llm.cache.handler_cache import get_cached_response, store_response
+from src.common_llm.cache.response_cache import ResponseCache
+
+
+def test_store_then_read_back(tmp_path):
+    # A fresh cache is empty - and must still be used
+    cache = ResponseCache(os.path.join(tmp_path, "cache.sqlite"))
+    handler = SimpleNamespace(model="test-model", temperature=0.0, cache=cache)
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "What is the capital of Poland?"},
+    ]
+
+    assert get_cached_response(handler, messages) is None
+    store_response(handler, messages, "Warsaw")
+
+    assert len(cache) == 1
+    assert get_cached_response(handler, messages) == "Warsaw"
+
+
+def test_bypass_cache_skips_lookup(tmp_path):
+    cache = ResponseCache(os.path.join(tmp_path, "cache.sqlite"))
+    handler = SimpleNamespace(model="test-model", temperature=0.0, cache=cache)
+    messages = [{"role": "user", "content": "Hello"}]
+    store_response(handler, messages, "Hi")
+
+    handler.bypass_cache = True
+    assert get_cached_response(handler, messages) is None
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.video_tools.perceptual_hash import (
+    find_duplicate_representatives,
+    group_near_duplicates,
+    hamming_distances,
+)
+
+
+def draw_picture(size, flipped=False):
+    image = Image.new("L", (256, 256), color=40)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 30, 120, 200), fill=220)
+    draw.ellipse((140, 20, 240, 120), fill=160)
+    draw.line((0, 255, 255, 160), fill=255, width=12)
+    if flipped:
+        image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    return image.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def save(image, folder, name):
+    path = os.path.join(folder, name)
+    image.convert("RGB").save(path)
+    return path
+
+
+def test_hamming_distances():
+    hashes = np.array([[True] * 8, [True] * 6 + [False] * 2, [False] * 8], dtype=bool)
+    assert hamming_distances(hashes).tolist() == [[0, 2, 8], [2, 0, 6], [8, 6, 0]]
+
+
+def test_resized_and_reencoded_copies_are_grouped(tmp_path):
+    large = save(draw_picture(256), tmp_path, "large.png")
+    small = save(draw_picture(96), tmp_path, "small.jpeg")
+    other = save(draw_picture(256, flipped=True), tmp_path, "other.png")
+
+    groups = group_near_duplicates([small, other, large])
+
+    # The largest copy represents the group
+    assert sorted(groups) == sorted([[large, small], [other]])
+
+
+def test_distance_threshold(tmp_path):
+    sharp = save(draw_picture(256), tmp_path, "sharp.png")
+    blurred = draw_picture(256).filter(ImageFilter.GaussianBlur(8))
+    blurred = save(blurred, tmp_path, "blurred.png")
+
+    # Blurring flips a couple of hash bits - within the default distance only
+    assert len(group_near_duplicates([sharp, blurred])) == 1
+    assert len(group_near_duplicates([sharp, blurred], max_distance=0)) == 2
+
+
+def test_representatives_skip_unreadable_files(tmp_path):
+    large = save(draw_picture(256), tmp_path, "large.png")
+    os.makedirs(os.path.join(tmp_path, "copies"))
+    small = save(draw_picture(128), os.path.join(tmp_path, "copies"), "small.png")
+    broken = os.path.join(tmp_path, "broken.png")
+    with open(broken, "w") as file:
+        file.write("not an image")
+
+    representatives = find_duplicate_representatives(str(tmp_path))
+
+    assert representatives == {large: large, small: large}
@@ -0,0 +1,122 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from src.common_llm.rate_limiter import (
+    RateLimiter,
+    RateLimits,
+    TokenBucket,
+    parse_duration,
+    retry_after_from_headers,
+    retry_delay_after_error,
+)
+
+
+def test_bucket_spends_capacity_then_paces():
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+
+    assert bucket.reserve(1, now=bucket.updated_at) == 0.0
+    assert bucket.reserve(1, now=bucket.updated_at) == 0.0
+    # Empty - each further request waits one refill period longer
+    assert bucket.reserve(1, now=bucket.updated_at) == pytest.approx(1.0)
+    assert bucket.reserve(1, now=bucket.updated_at) == pytest.approx(2.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    start = bucket.updated_at
+    bucket.reserve(2, now=start)
+
+    assert bucket.reserve(1, now=start + 1) == 0.0
+    # A long pause doesn't bank more than the capacity
+    assert bucket.reserve(2, now=start + 100) == 0.0
+    assert bucket.reserve(1, now=start + 100) == pytest.approx(1.0)
+
+
+def test_oversized_request_is_capped_at_capacity():
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    assert bucket.reserve(1000, now=bucket.updated_at) == 0.0
+
+
+def test_limiter_waits_for_the_tighter_limit():
+    # 60 requests and 600 tokens per minute - 1 request and 10 tokens per second
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+
+    assert limiter._reserve(600) == 0.0
+    assert limiter._reserve(10) == pytest.approx(1.0, abs=0.01)
+
+
+def test_reported_remaining_tokens_lower_the_bucket():
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "0"})
+
+    assert limiter._reserve(10) == pytest.approx(1.0, abs=0.01)
+
+
+def test_pause_holds_back_all_requests():
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+    limiter.pause(5)
+
+    assert limiter._reserve(1) == pytest.approx(5.0, abs=0.05)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h30m", 5400.0), ("soon", None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_retry_after_headers():
+    assert retry_after_from_headers(None) is None
+    assert retry_after_from_headers({"retry-after-ms": "250"}) == 0.25
+    assert retry_after_from_headers({"retry-after": "3"}) == 3.0
+    # Reset headers are the fallback, the longer of the two wins
+    assert (
+        retry_after_from_headers(
+            {"x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "6m0s"}
+        )
+        == 360.0
+    )
+
+
+def test_retry_after_http_date():
+    in_a_minute = formatdate(time.time() + 60, usegmt=True)
+    seconds = retry_after_from_headers({"retry-after": in_a_minute})
+    assert seconds == pytest.approx(60.0, abs=2.0)
+
+
+def make_error(status_code, headers):
+    return SimpleNamespace(
+        status_code=status_code, response=SimpleNamespace(headers=headers)
+    )
+
+
+def test_429_pauses_the_shared_limiter():
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+    error = make_error(429, {"retry-after": "2"})
+
+    # The caller doesn't sleep itself, the limiter holds everyone back instead
+    assert retry_delay_after_error(limiter, error, 0, initial_retry_delay=0.01) == 0.0
+    assert limiter._reserve(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_other_errors_only_delay_the_caller():
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+    error = make_error(500, {"retry-after": "2"})
+
+    delay = retry_delay_after_error(limiter, error, 0, initial_retry_delay=0.01)
+
+    assert 2.0 <= delay <= 2.01
+    assert limiter._reserve(1) == 0.0
+
+
+def test_backoff_without_retry_after_grows_with_attempts():
+    limiter = RateLimiter(RateLimits(requests_per_minute=60, tokens_per_minute=600))
+    error = make_error(500, {})
+
+    assert 1.0 <= retry_delay_after_error(limiter, error, 0, 1.0) <= 1.5
+    assert 4.0 <= retry_delay_after_error(limiter, error, 2, 1.0) <= 6.0
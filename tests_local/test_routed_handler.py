@@ -0,0 +1,102 @@
+import time
+
+from src.common_llm.handlers.routed_handler import RoutedHandler
+
+
+class StubHandler:
+    def __init__(self, model, latency=0.0, fail=False):
+        self.model = model
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def _make_request(self, messages, json_schema=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.model} is down")
+        return self.model
+
+
+def make_router(*handlers, **kwargs):
+    kwargs.setdefault("hedge", False)
+    kwargs.setdefault("min_samples", 3)
+    kwargs.setdefault("probe_every", None)
+    return RoutedHandler(list(handlers), **kwargs)
+
+
+def test_unsampled_backends_keep_configured_order():
+    primary, backup = StubHandler("primary"), StubHandler("backup")
+    router = make_router(primary, backup)
+
+    for _ in range(10):
+        assert router._make_request([{"role": "user", "content": "hi"}]) == "primary"
+    # The sampled primary must not lose its place to the unsampled backup
+    assert router._ranked_backends() == [0, 1]
+    assert backup.calls == 0
+
+
+def test_failing_backend_falls_back_and_is_demoted():
+    primary, backup = StubHandler("primary", fail=True), StubHandler("backup")
+    router = make_router(primary, backup)
+
+    for _ in range(3):
+        assert router._make_request([{"role": "user", "content": "hi"}]) == "backup"
+    # Healthy backup first, unhealthy primary last
+    assert router._ranked_backends() == [1, 0]
+
+
+def test_unhealthy_backend_ranks_after_unsampled_one():
+    broken, fresh = StubHandler("broken", fail=True), StubHandler("fresh")
+    router = make_router(broken, fresh)
+    for _ in range(3):
+        router.stats[0].record(0.1, ok=False)
+
+    assert router._ranked_backends() == [1, 0]
+
+
+def test_faster_backend_is_preferred():
+    slow, fast = StubHandler("slow"), StubHandler("fast")
+    router = make_router(slow, fast)
+    for _ in range(3):
+        router.stats[0].record(2.0, ok=True)
+        router.stats[1].record(0.5, ok=True)
+
+    assert router._ranked_backends() == [1, 0]
+
+
+def test_expired_backend_is_probed():
+    primary, backup = StubHandler("primary"), StubHandler("backup")
+    router = make_router(primary, backup, probe_every=4, stats_max_age=0.05)
+    for _ in range(3):
+        router.stats[0].record(0.1, ok=True)
+        router.stats[1].record(0.1, ok=False)
+    assert router._ranked_backends() == [0, 1]
+
+    time.sleep(0.1)
+    for _ in range(3):
+        router.stats[0].record(0.1, ok=True)
+    # The backup's failures expired - it is tried first on every 4th request
+    orders = [router._ranked_backends() for _ in range(4)]
+    assert orders.count([1, 0]) == 1
+    assert orders.count([0, 1]) == 3
+
+
+def test_all_backends_failing_raises():
+    router = make_router(StubHandler("a", fail=True), StubHandler("b", fail=True))
+    try:
+        router._make_request([{"role": "user", "content": "hi"}])
+    except RuntimeError as e:
+        assert "All backends failed" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_ask_keeps_history_in_order():
+    router = make_router(StubHandler("primary"), system_prompt="Be brief.")
+    assert router.ask("hi") == "primary"
+    assert [m["role"] for m in router.conversation_history] == [
+        "system",
+        "user",
+        "assistant",
+    ]
@@ -0,0 +1,91 @@
+import os
+
+from src.common_llm.cache.semantic_cache import SemanticCache
+
+# Hand-picked embeddings, so similarities are known without calling a model
+EMBEDDINGS = {
+    "What is the capital of Poland?": [1.0, 0.0, 0.0],
+    # cos = 0.98 with the question above
+    "What's the capital of Poland?": [0.98, 0.199, 0.0],
+    # cos = 0.8
+    "What is the largest city of Poland?": [0.8, 0.6, 0.0],
+    "How do I bake bread?": [0.0, 0.0, 1.0],
+}
+
+SYSTEM_PROMPT = "Answer in one word."
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return EMBEDDINGS[text]
+
+
+def make_cache(**kwargs):
+    cache = SemanticCache(embedding_function=CountingEmbedder(), **kwargs)
+    cache.add("gpt-4o", SYSTEM_PROMPT, "What is the capital of Poland?", "Warsaw")
+    return cache
+
+
+def test_similar_prompt_above_threshold_hits():
+    cache = make_cache(similarity_threshold=0.95)
+    hit = cache.lookup("gpt-4o", SYSTEM_PROMPT, "What's the capital of Poland?")
+    assert hit == "Warsaw"
+
+
+def test_prompt_below_threshold_misses():
+    cache = make_cache(similarity_threshold=0.95)
+    assert (
+        cache.lookup("gpt-4o", SYSTEM_PROMPT, "What is the largest city of Poland?")
+        is None
+    )
+    assert cache.lookup("gpt-4o", SYSTEM_PROMPT, "How do I bake bread?") is None
+
+
+def test_threshold_decides_the_hit():
+    # The prompts are 0.8 similar
+    question = "What is the largest city of Poland?"
+    lenient = make_cache(similarity_threshold=0.75)
+    strict = make_cache(similarity_threshold=0.85)
+
+    assert lenient.lookup("gpt-4o", SYSTEM_PROMPT, question) == "Warsaw"
+    assert strict.lookup("gpt-4o", SYSTEM_PROMPT, question) is None
+
+
+def test_other_model_or_system_prompt_misses():
+    cache = make_cache()
+    prompt = "What is the capital of Poland?"
+    assert cache.lookup("gpt-4o-mini", SYSTEM_PROMPT, prompt) is None
+    assert cache.lookup("gpt-4o", "Answer in detail.", prompt) is None
+
+
+def test_lookup_then_add_embeds_once():
+    cache = make_cache()
+    prompt = "How do I bake bread?"
+    assert cache.lookup("gpt-4o", SYSTEM_PROMPT, prompt) is None
+    cache.add("gpt-4o", SYSTEM_PROMPT, prompt, "Knead")
+    assert cache.embedding_function.calls == 2
+
+
+def test_oldest_entries_are_dropped():
+    cache = make_cache(max_entries_per_namespace=1)
+    cache.add("gpt-4o", SYSTEM_PROMPT, "How do I bake bread?", "Knead")
+
+    assert len(cache) == 1
+    assert (
+        cache.lookup("gpt-4o", SYSTEM_PROMPT, "What is the capital of Poland?") is None
+    )
+
+
+def test_saved_index_is_loaded(tmp_path):
+    path = os.path.join(tmp_path, "semantic.npz")
+    make_cache(path=path).save()
+
+    loaded = SemanticCache(embedding_function=CountingEmbedder(), path=path)
+
+    assert len(loaded) == 1
+    hit = loaded.lookup("gpt-4o", SYSTEM_PROMPT, "What's the capital of Poland?")
+    assert hit == "Warsaw"
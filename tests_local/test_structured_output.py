@@ -0,0 +1,93 @@
+import pytest
+
+from src.common_llm.handlers.base_model_handler import BaseModelHandler
+from src.common_llm.handlers.structured_output import (
+    check_json_response,
+    parse_json_response,
+    validate_json,
+)
+
+PERSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "age": {"type": "integer"},
+        "role": {"type": "string", "enum": ["teacher", "engineer"]},
+        "skills": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["name", "age"],
+    "additionalProperties": False,
+}
+
+
+def test_valid_payload_is_accepted():
+    payload = {"name": "Jan", "age": 50, "role": "teacher", "skills": ["Scala"]}
+    assert validate_json(payload, PERSON_SCHEMA) == []
+
+
+@pytest.mark.parametrize(
+    "payload, error",
+    [
+        ([], "$ should be object"),
+        ({"name": "Jan"}, "$.age is missing"),
+        ({"name": "Jan", "age": "50"}, "$.age should be integer"),
+        # bool is an int in Python, but not a JSON integer
+        ({"name": "Jan", "age": True}, "$.age should be integer"),
+        ({"name": "Jan", "age": 50, "role": "pilot"}, "$.role should be one of"),
+        ({"name": "Jan", "age": 50, "skills": ["Scala", 1]}, "$.skills[1]"),
+        ({"name": "Jan", "age": 50, "city": "Kielce"}, "$.city is not allowed"),
+    ],
+)
+def test_invalid_payload_is_rejected(payload, error):
+    errors = validate_json(payload, PERSON_SCHEMA)
+    assert any(e.startswith(error) for e in errors), errors
+
+
+def test_union_types():
+    schema = {"type": ["string", "null"]}
+    assert validate_json(None, schema) == []
+    assert validate_json(1, schema) == ["$ should be string or null"]
+
+
+def test_wrapped_json_is_parsed():
+    assert parse_json_response('```json\n{"name": "Jan"}\n```') == {"name": "Jan"}
+
+
+def test_non_json_response_is_reported():
+    errors = check_json_response("I don't know", PERSON_SCHEMA)
+    assert len(errors) == 1 and errors[0].startswith("response is not JSON")
+
+
+class ScriptedHandler(BaseModelHandler):
+    """Answers with the given responses in turn."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def _make_request(self, messages, json_schema=None):
+        self.requests.append(messages)
+        return self.responses.pop(0)
+
+    def ask(self, question, clear_history=False):
+        raise NotImplementedError
+
+    def clear_conversation(self):
+        pass
+
+    def set_system_prompt(self, system_prompt):
+        pass
+
+
+def test_ask_json_repairs_an_invalid_answer():
+    handler = ScriptedHandler(['{"name": "Jan"}', '{"name": "Jan", "age": 50}'])
+
+    assert handler.ask_json("Who?", PERSON_SCHEMA) == {"name": "Jan", "age": 50}
+    # The second request tells the model what was wrong
+    assert "$.age is missing" in handler.requests[1][-1]["content"]
+
+
+def test_ask_json_gives_up_after_max_attempts():
+    handler = ScriptedHandler(['{"name": "Jan"}'] * 2)
+    with pytest.raises(RuntimeError, match="age is missing"):
+        handler.ask_json("Who?", PERSON_SCHEMA, max_attempts=2)